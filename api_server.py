@@ -1,7 +1,9 @@
 import os
 import json
-from typing import Dict, Any, List
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from typing import Dict, Any, List, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 import sys
@@ -13,15 +15,48 @@ sys.path.append(project_root)
 
 from src.services.email_service import EmailService
 from src.services.sheet_logger import SheetLogger
-from src.utils.data_processor import DataProcessor
+from src.services.omnidim_async import AsyncOmnidimClient, OmnidimAPIError
+from src.services.webhook_queue import WebhookQueue
+from src.services.webhook_spool import WebhookSpool
+from src.services.offer_broadcaster import TopOffersBroadcaster
+from src.utils.data_processor import DataProcessor, ResellerDataWatcher
+from src.utils.offer_scoring import get_policy, list_policies
+from src.utils.dedup_cache import BloomFilter, DedupCache, payload_fingerprint
+from src.utils.response_cache import VersionedResponseCache
+from src.utils.transcript_extractor import TranscriptExtractor
 
 app = FastAPI(title="DealFinder Voice Agent API")
 
 # Initialize services
 email_service = EmailService()
-sheet_logger = SheetLogger()
+# The HTML and summary views of the logs are refreshed this often (0 to disable)
+sheet_logger = SheetLogger(render_interval=float(os.environ.get('LOG_RENDER_INTERVAL', '60')))
 data_processor = DataProcessor()
 
+# Hot-reload reseller data when the data file changes (set to 0 to disable)
+reseller_watcher = ResellerDataWatcher(
+    data_processor,
+    interval=float(os.environ.get('RESELLER_RELOAD_INTERVAL', '2'))
+)
+
+# Serialized read responses, rebuilt only when the reseller data version changes
+response_cache = VersionedResponseCache()
+
+# Offer details extracted from webhook transcripts update the rankings only
+# when the extractor is at least this confident in them
+transcript_extractor = TranscriptExtractor(
+    min_confidence=float(os.environ.get('TRANSCRIPT_MIN_CONFIDENCE', '0.7'))
+)
+
+# Pushes top-offer changes to every /stream/top-offers subscriber
+top_offers_broadcaster = TopOffersBroadcaster(
+    data_processor,
+    count=int(os.environ.get('TOP_OFFERS_STREAM_COUNT', '3'))
+)
+
+# Pooled async Omnidim client, created at startup when an API key is configured
+omnidim_client: Optional[AsyncOmnidimClient] = None
+
 # Define API models
 class ConversationLog(BaseModel):
     conversation_id: str
@@ -34,6 +69,207 @@ class EmailRequest(BaseModel):
     user_email: str
     top_offers: List[Dict[str, Any]]
     timestamp: str
+    conversation_id: Optional[str] = None
+
+class CallStatusRequest(BaseModel):
+    call_ids: List[str]
+
+def conversation_webhook(payload: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Get the dedup key of a conversation webhook and the response it is answered with
+    """
+    key = f"conversation:{payload['conversation_id']}:{payload_fingerprint(payload)}"
+    return key, {
+        "status": "success",
+        "message": f"Conversation with {payload['reseller_name']} logged successfully"
+    }
+
+def email_webhook(payload: Dict[str, Any]) -> Tuple[str, float, Dict[str, Any]]:
+    """
+    Get the dedup key of an email webhook, how long it is remembered and the
+    response it is answered with
+    
+    The key is scoped to the conversation that requested the email, so a user
+    asking for the same offers again in another call gets another email.
+    Requests without a conversation ID are only deduplicated for a short while.
+    """
+    fingerprint = payload_fingerprint(payload)
+    if payload.get('conversation_id'):
+        key, ttl = f"email:{payload['conversation_id']}:{fingerprint}", WEBHOOK_DEDUP_TTL
+    else:
+        key, ttl = f"email:{fingerprint}", EMAIL_DEDUP_TTL
+    return key, ttl, {
+        "status": "success",
+        "message": f"Email sent to {payload['user_email']} with top offers"
+    }
+
+def process_conversation_webhooks(conversations: List[Dict[str, Any]]) -> None:
+    """
+    Log a batch of conversations received through the webhook, and update
+    the resellers' offers from what their transcripts say
+    
+    The rows are written to the local logs before returning, since the
+    spooled payloads are discarded once this returns.
+    """
+    # Payloads spooled by older versions are bare interaction lists
+    conversations = [
+        conversation if isinstance(conversation, dict) else {'interactions': conversation}
+        for conversation in conversations
+    ]
+    
+    # Failed batches are retried, so skip the log rows already written for a
+    # conversation (keyed by its ID and content, so updated payloads still log)
+    def log_key(conversation, stage):
+        if conversation.get('conversation_id') is None:
+            return None
+        return f"{conversation['conversation_id']}:{payload_fingerprint(conversation)}:{stage}"
+    
+    def not_logged(stage):
+        return [
+            conversation for conversation in conversations
+            if log_key(conversation, stage) is None or logged_conversations.get(log_key(conversation, stage)) is None
+        ]
+    
+    def mark_logged(stage, logged):
+        for conversation in logged:
+            if log_key(conversation, stage) is not None:
+                logged_conversations.put(log_key(conversation, stage), True)
+    
+    pending = not_logged('interactions')
+    if pending:
+        sheet_logger.log_interactions([conversation['interactions'] for conversation in pending])
+        mark_logged('interactions', pending)
+    
+    pending = not_logged('extracted_info')
+    extracted_info_list = []
+    for conversation in pending:
+        extracted = transcript_extractor.extract(conversation['interactions'], conversation.get('reseller_name'))
+        extracted['conversation_id'] = conversation.get('conversation_id')
+        extracted_info_list.append(extracted)
+        try:
+            transcript_extractor.update_offer(data_processor, extracted)
+        except Exception as e:
+            print(f"Error updating offer from conversation {extracted['conversation_id']}: {str(e)}")
+    if extracted_info_list:
+        sheet_logger.log_extracted_info(extracted_info_list)
+        mark_logged('extracted_info', pending)
+    
+    sheet_logger.flush_local()
+    
+    # Only now are retried deliveries answered without processing them again
+    for conversation in conversations:
+        if conversation.get('conversation_id') is not None and conversation.get('reseller_name') is not None:
+            webhook_dedup.put(*conversation_webhook(conversation))
+
+def process_email_webhooks(email_requests: List[Dict[str, Any]]) -> None:
+    """
+    Send the emails requested through the webhook
+    
+    A failed email is raised so its spooled payload is retried; emails
+    already sent by an earlier attempt of the same batch are skipped.
+    """
+    error = None
+    for email_request in email_requests:
+        key, ttl, webhook_response = email_webhook(email_request)
+        if sent_emails.get(key) is not None:
+            continue
+        try:
+            response = email_service.send_top_offers_email(email_request['user_email'], email_request['top_offers'])
+            if response.get('status_code', 202) >= 400:
+                raise RuntimeError(f"Email service answered {response['status_code']}")
+        except Exception as e:
+            print(f"Error sending email to {email_request['user_email']}: {str(e)}")
+            error = error or e
+            continue
+        sent_emails.put(key, True, ttl)
+        webhook_dedup.put(key, webhook_response, ttl)
+    if error is not None:
+        raise error
+
+# Webhook payloads are spooled to disk before they are acknowledged, so a
+# restart replays the ones that weren't processed yet
+webhook_spool = WebhookSpool(
+    os.environ.get('WEBHOOK_SPOOL_PATH') or os.path.join(project_root, 'webhook_spool.db')
+)
+
+# Webhooks are acknowledged right away and processed in batches by worker threads
+webhook_queue = WebhookQueue(
+    {
+        'conversation': process_conversation_webhooks,
+        'email': process_email_webhooks
+    },
+    max_size=int(os.environ.get('WEBHOOK_QUEUE_SIZE', '10000')),
+    workers=int(os.environ.get('WEBHOOK_WORKERS', '4')),
+    batch_size=int(os.environ.get('WEBHOOK_BATCH_SIZE', '100')),
+    spool=webhook_spool
+)
+
+# Omnidim retries webhooks; deliveries repeated after the first one was
+# processed are answered from this cache (set WEBHOOK_DEDUP_BLOOM_PATH to
+# also remember keys evicted from it early)
+WEBHOOK_DEDUP_TTL = float(os.environ.get('WEBHOOK_DEDUP_TTL', '86400'))
+# Email requests without a conversation ID are only deduplicated this long
+EMAIL_DEDUP_TTL = float(os.environ.get('EMAIL_DEDUP_TTL', '600'))
+webhook_dedup = DedupCache(
+    max_entries=int(os.environ.get('WEBHOOK_DEDUP_SIZE', '100000')),
+    ttl=WEBHOOK_DEDUP_TTL,
+    bloom_filter=BloomFilter(path=os.environ['WEBHOOK_DEDUP_BLOOM_PATH'], rotate_interval=WEBHOOK_DEDUP_TTL)
+    if os.environ.get('WEBHOOK_DEDUP_BLOOM_PATH') else None
+)
+
+# Log stages already written per conversation, so retried webhook batches
+# don't log a conversation twice
+logged_conversations = DedupCache(
+    max_entries=int(os.environ.get('WEBHOOK_DEDUP_SIZE', '100000')),
+    ttl=WEBHOOK_DEDUP_TTL
+)
+
+# Emails already sent, so a batch retried after a failed email doesn't resend the others
+sent_emails = DedupCache(
+    max_entries=int(os.environ.get('WEBHOOK_DEDUP_SIZE', '100000')),
+    ttl=WEBHOOK_DEDUP_TTL
+)
+
+DUPLICATE_WEBHOOK_RESPONSE = {"status": "success", "message": "Duplicate webhook ignored"}
+
+def get_omnidim_client() -> AsyncOmnidimClient:
+    """
+    Get the Omnidim client, or fail the request if it isn't configured
+    """
+    if omnidim_client is None:
+        raise HTTPException(status_code=503, detail="Omnidim API key is not configured")
+    return omnidim_client
+
+@app.on_event("startup")
+async def start_background_services():
+    """
+    Start the background services used by the API
+    """
+    global omnidim_client
+    if reseller_watcher.interval > 0:
+        reseller_watcher.start()
+    webhook_queue.start()
+    await top_offers_broadcaster.start()
+    if os.environ.get('OMNIDIM_API_KEY'):
+        omnidim_client = AsyncOmnidimClient(
+            max_connections=int(os.environ.get('OMNIDIM_MAX_CONNECTIONS', '20')),
+            requests_per_second=float(os.environ.get('OMNIDIM_REQUESTS_PER_SECOND', '10'))
+        )
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    """
+    Stop the background services used by the API
+    """
+    reseller_watcher.stop()
+    await top_offers_broadcaster.stop()
+    # Drain queued webhooks before closing the logs they write to
+    webhook_queue.stop()
+    webhook_spool.close()
+    webhook_dedup.close()
+    sheet_logger.close()
+    if omnidim_client is not None:
+        await omnidim_client.aclose()
 
 @app.get("/")
 async def root():
@@ -42,60 +278,169 @@ async def root():
     """
     return {"message": "Welcome to the DealFinder Voice Agent API"}
 
+def enqueue_webhook(kind: str, payload: Any) -> None:
+    """
+    Queue a webhook payload, or answer 429 if the queue is full
+    """
+    if not webhook_queue.submit(kind, payload):
+        raise HTTPException(
+            status_code=429,
+            detail="Webhook queue is full, retry later",
+            headers={"Retry-After": "1"}
+        )
+
 @app.post("/webhooks/log-conversation")
-async def log_conversation(conversation: ConversationLog, background_tasks: BackgroundTasks):
+async def log_conversation(conversation: ConversationLog):
     """
     Webhook endpoint for logging conversation details
     """
-    try:
-        # Log the conversation in the background
-        background_tasks.add_task(
-            sheet_logger.log_interactions, 
-            [[interaction for interaction in conversation.interactions]]
-        )
-        
-        return {
-            "status": "success",
-            "message": f"Conversation with {conversation.reseller_name} logged successfully"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    payload = conversation.dict()
+    dedup_key, response = conversation_webhook(payload)
+    cached = webhook_dedup.get(dedup_key, DUPLICATE_WEBHOOK_RESPONSE)
+    if cached is not None:
+        return cached
+    
+    # Log the conversation and extract its offer in a batch on a worker thread
+    # (the worker records it as a duplicate once it is logged)
+    enqueue_webhook('conversation', payload)
+    return response
 
 @app.post("/webhooks/send-email")
-async def send_email(email_request: EmailRequest, background_tasks: BackgroundTasks):
+async def send_email(email_request: EmailRequest):
     """
     Webhook endpoint for sending email with top offers
     """
-    try:
-        # Send the email in the background
-        background_tasks.add_task(
-            email_service.send_top_offers_email,
-            email_request.user_email,
-            email_request.top_offers
-        )
-        
-        return {
-            "status": "success",
-            "message": f"Email sent to {email_request.user_email} with top offers"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    payload = email_request.dict()
+    dedup_key, _, response = email_webhook(payload)
+    cached = webhook_dedup.get(dedup_key, DUPLICATE_WEBHOOK_RESPONSE)
+    if cached is not None:
+        return cached
+    
+    # Send the email on a worker thread (which records it as a duplicate once sent)
+    enqueue_webhook('email', payload)
+    return response
+
+def cached_response(request: Request, key: Any, build) -> Response:
+    """
+    Answer a read request from the response cache, honoring ETags and compression
+    """
+    cached = response_cache.get(key, data_processor.data_version, build)
+    status_code, body, headers = cached.select(
+        request.headers.get('if-none-match'),
+        request.headers.get('accept-encoding')
+    )
+    return Response(content=body, status_code=status_code, headers=headers,
+                    media_type="application/json")
+
+def check_policy(policy: Optional[str]) -> None:
+    """
+    Reject unknown scoring policy names
+    """
+    if policy is not None:
+        try:
+            get_policy(policy)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/demo/top-offers")
-async def get_top_offers():
+async def get_top_offers(request: Request, policy: Optional[str] = None):
     """
     Demo endpoint that returns the top 3 offers
     """
-    top_offers = data_processor.get_top_offers(3)
-    return {"top_offers": top_offers}
+    check_policy(policy)
+    return cached_response(request, ('top-offers', 3, policy),
+                           lambda: {"top_offers": data_processor.get_top_offers(3, policy=policy)})
 
 @app.get("/demo/all-resellers")
-async def get_all_resellers():
+async def get_all_resellers(request: Request):
     """
     Demo endpoint that returns all resellers
     """
-    resellers = data_processor.get_all_resellers()
-    return {"resellers": resellers}
+    return cached_response(request, 'all-resellers',
+                           lambda: {"resellers": data_processor.get_all_resellers()})
+
+@app.get("/offers/top")
+async def get_top_product_offers(request: Request, sku: Optional[str] = None,
+                                 size: Optional[str] = None, count: int = 3,
+                                 policy: Optional[str] = None):
+    """
+    Top offers for a SKU and/or size, optionally ranked by a scoring policy
+    """
+    if count < 1 or count > 100:
+        raise HTTPException(status_code=400, detail="count must be between 1 and 100")
+    check_policy(policy)
+    return cached_response(request, ('offers-top', sku, size, count, policy),
+                           lambda: {"sku": sku, "size": size, "policy": policy,
+                                    "top_offers": data_processor.get_top_offers(count, sku=sku, size=size,
+                                                                                policy=policy)})
+
+@app.get("/offers/policies")
+async def get_scoring_policies():
+    """
+    Scoring policies available for ranking offers
+    """
+    return {"policies": [policy.to_dict() for policy in list_policies()]}
+
+@app.get("/offers/products")
+async def get_products(request: Request):
+    """
+    SKUs on offer and the sizes offered for each
+    """
+    return cached_response(request, 'products',
+                           lambda: {"products": data_processor.get_products()})
+
+@app.get("/stream/top-offers")
+async def stream_top_offers():
+    """
+    Server-sent events stream of the top offers: a snapshot, then a diff whenever they change
+    """
+    return StreamingResponse(
+        top_offers_broadcaster.subscribe(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/admin/reload-resellers")
+async def reload_resellers():
+    """
+    Reload the reseller data if the data file changed
+    """
+    reloaded = await run_in_threadpool(data_processor.reload_if_changed)
+    return {
+        "status": "success",
+        "reloaded": reloaded,
+        "reseller_count": len(data_processor.get_all_resellers())
+    }
+
+@app.post("/admin/render-logs")
+async def render_logs():
+    """
+    Add the rows logged since the last render to the HTML and summary views
+    """
+    await run_in_threadpool(sheet_logger.render_views)
+    return {
+        "status": "success",
+        "call_log_rows": sheet_logger.call_log_writer.row_count,
+        "extracted_info_rows": sheet_logger.extracted_info_writer.row_count
+    }
+
+@app.get("/calls/{call_id}")
+async def get_call_status(call_id: str):
+    """
+    Get the status of an Omnidim call
+    """
+    try:
+        return await get_omnidim_client().get_call(call_id)
+    except OmnidimAPIError as e:
+        raise HTTPException(status_code=e.status_code or 502, detail=e.message)
+
+@app.post("/calls/status")
+async def get_call_statuses(request: CallStatusRequest):
+    """
+    Get the statuses of many Omnidim calls in parallel
+    """
+    calls = await get_omnidim_client().get_calls(request.call_ids)
+    return {"calls": calls}
 
 @app.post("/demo/simulate-conversation")
 async def simulate_conversation(request: Request):
@@ -121,7 +466,7 @@ async def simulate_conversation(request: Request):
     
     return {
         "reseller_name": reseller["name"],
-        "conversation_log": conversation_log,
+        "conversation_log": [interaction.to_dict() for interaction in conversation_log],
         "extracted_info": extracted_info
     }
 
@@ -0,0 +1,262 @@
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from src.services.omnidim_service import OmnidimService
+from src.utils.call_scheduler import CallScheduler
+
+# Call statuses after which a call no longer changes
+FINAL_CALL_STATUSES = {'completed', 'failed', 'busy', 'no-answer', 'no_answer',
+                       'canceled', 'cancelled', 'ended', 'rejected'}
+
+# Seconds after which a call that never reached a final status stops being
+# tracked, so a stuck call can't keep every sync paging back to it
+OPEN_CALL_MAX_AGE = 24 * 60 * 60
+
+
+def _call_id(call: Dict[str, Any]) -> str:
+    return str(call.get('id', call.get('call_log_id', '')))
+
+
+def _call_status(call: Dict[str, Any]) -> str:
+    return str(call.get('status', call.get('call_status', '')) or '').lower()
+
+
+def _call_mark(call: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Position of a call in the newest-first ordering of the call logs
+
+    Args:
+        call: Call dictionary
+
+    Returns:
+        (created_at, id) tuple; call IDs are zero-padded so they compare numerically
+    """
+    call_id = _call_id(call)
+    return str(call.get('created_at') or ''), call_id.zfill(20) if call_id.isdigit() else call_id
+
+
+class CallLogSync:
+    """
+    Incremental sync of Omnidim call logs
+
+    Each agent's sync state is persisted as a high-water mark (the
+    `created_at` and ID of the newest call seen) plus the calls that were
+    still in progress. Repeated syncs page through the call logs newest
+    first and stop as soon as a page is older than both the high-water mark
+    and every open call, so only new calls and calls whose status changed
+    are fetched. Calls left open for longer than `open_call_max_age` are
+    dropped from the state. Per-call details (transcripts) can be fetched
+    with bounded concurrency; the state is only saved once every call has
+    been yielded with its details, and calls whose details couldn't be
+    fetched are kept in the state and yielded again by the next sync.
+    """
+
+    def __init__(self, omnidim_service: OmnidimService, state_path: str,
+                 page_size: int = 100, max_workers: int = 8,
+                 open_call_max_age: float = OPEN_CALL_MAX_AGE):
+        """
+        Initialize the CallLogSync
+
+        Args:
+            omnidim_service: Omnidim service used to fetch calls
+            state_path: Path of the JSON file holding the sync state
+            page_size: Number of calls fetched per page
+            max_workers: Maximum number of call details fetched at the same time
+            open_call_max_age: Seconds after which an open call is no longer tracked
+        """
+        self.omnidim_service = omnidim_service
+        self.state_path = state_path
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.open_call_max_age = open_call_max_age
+        self._state = self._load_state()
+        # Sync state per agent of scans whose calls are still being processed
+        self._pending_state: Dict[str, Dict[str, Any]] = {}
+
+    def _load_state(self) -> Dict[str, Any]:
+        """
+        Load the persisted sync state
+
+        Returns:
+            Sync state per agent
+        """
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Error loading call log sync state: {str(e)}")
+            return {}
+
+    def _save_state(self) -> None:
+        """
+        Atomically write the sync state
+        """
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def high_water_mark(self, agent_id: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """
+        Get the newest call seen for an agent
+
+        Args:
+            agent_id: Agent ID (None for all agents)
+
+        Returns:
+            (created_at, id) of the newest synced call, or None before the first sync
+        """
+        mark = self._state.get(str(agent_id), {}).get('high_water_mark')
+        return tuple(mark) if mark else None
+
+    def iter_new_calls(self, agent_id: Optional[str] = None, save: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the calls that are new or changed since the last sync
+
+        The sync state is only saved once the iterator is exhausted, so an
+        interrupted sync is repeated the next time.
+
+        Args:
+            agent_id: Optional agent ID to filter calls by
+            save: Save the sync state once exhausted; otherwise it is kept
+                pending until _commit_state() is called
+
+        Returns:
+            Iterator of call dictionaries
+        """
+        agent_state = self._state.get(str(agent_id), {})
+        mark = agent_state.get('high_water_mark')
+        mark = tuple(mark) if mark else None
+        now = time.time()
+        open_calls: Dict[str, Dict[str, Any]] = {}
+        for call_id, open_call in agent_state.get('open_calls', {}).items():
+            first_seen = open_call.get('first_seen', now)
+            if now - first_seen > self.open_call_max_age:
+                print(f"Call {call_id} still '{open_call['status']}' after "
+                      f"{self.open_call_max_age:.0f}s, no longer tracking it")
+                continue
+            open_calls[call_id] = dict(open_call, first_seen=first_seen)
+
+        # Paging can stop once calls are older than both the mark and every open call
+        stop_before = mark
+        for open_call in open_calls.values():
+            open_mark = tuple(open_call['mark'])
+            if stop_before is None or open_mark < stop_before:
+                stop_before = open_mark
+
+        new_mark = mark
+        page_old = 0
+        for position, call in enumerate(self.omnidim_service.iter_calls(agent_id=agent_id,
+                                                                       page_size=self.page_size)):
+            call_mark = _call_mark(call)
+            call_id = _call_id(call)
+            status = _call_status(call)
+            if stop_before is not None and call_mark <= stop_before:
+                page_old += 1
+
+            is_new = mark is None or call_mark > mark
+            previous = open_calls.get(call_id)
+            # Calls whose details couldn't be fetched last time are yielded again
+            changed = previous is not None and (previous['status'] != status or previous.get('retry', False))
+
+            if status in FINAL_CALL_STATUSES:
+                open_calls.pop(call_id, None)
+            elif is_new or previous is not None:
+                first_seen = previous['first_seen'] if previous is not None else now
+                open_calls[call_id] = {'status': status, 'mark': list(call_mark), 'first_seen': first_seen}
+
+            if new_mark is None or call_mark > new_mark:
+                new_mark = call_mark
+            if is_new or changed:
+                yield call
+
+            if (position + 1) % self.page_size == 0:
+                if page_old == self.page_size:
+                    break
+                page_old = 0
+
+        state = {
+            'high_water_mark': list(new_mark) if new_mark else None,
+            'open_calls': open_calls
+        }
+        if save:
+            self._state[str(agent_id)] = state
+            self._save_state()
+        else:
+            self._pending_state[str(agent_id)] = state
+
+    def _commit_state(self, agent_id: Optional[str], retry_calls: Iterable[Dict[str, Any]] = ()) -> None:
+        """
+        Save the pending sync state of a scan once all its calls were processed
+
+        Args:
+            agent_id: Agent ID the scan was for
+            retry_calls: Calls to yield again on the next sync (their details failed)
+        """
+        state = self._pending_state.pop(str(agent_id), None)
+        if state is None:
+            return
+        now = time.time()
+        open_calls = state['open_calls']
+        for call in retry_calls:
+            call_id = _call_id(call)
+            previous = open_calls.get(call_id) or {}
+            open_calls[call_id] = {
+                'status': _call_status(call),
+                'mark': list(_call_mark(call)),
+                'first_seen': previous.get('first_seen', now),
+                'retry': True
+            }
+        self._state[str(agent_id)] = state
+        self._save_state()
+
+    def iter_call_details(self, calls: Iterator[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]], Optional[BaseException]]]:
+        """
+        Fetch the full details (transcripts) of calls with bounded concurrency
+
+        Args:
+            calls: Call summaries
+
+        Returns:
+            Iterator of (call, details, error) tuples in completion order
+        """
+        scheduler = CallScheduler(max_in_flight=self.max_workers, key_func=_call_id)
+        for call, response, error in scheduler.run(
+                calls, lambda c: self.omnidim_service.get_call(_call_id(c))):
+            details = None if error is not None else OmnidimService._response_body(response)
+            yield call, details, error
+
+    def sync(self, agent_id: Optional[str] = None,
+             fetch_details: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the calls that are new or changed since the last sync
+
+        Args:
+            agent_id: Optional agent ID to filter calls by
+            fetch_details: Fetch each call's full details (transcript) concurrently
+
+        Returns:
+            Iterator of call dictionaries, with details when requested
+        """
+        if not fetch_details:
+            yield from self.iter_new_calls(agent_id)
+            return
+
+        # The state is saved once every call was yielded with its details, so
+        # details still being fetched when the scan ends can't be skipped
+        retry_calls = []
+        for call, details, error in self.iter_call_details(self.iter_new_calls(agent_id, save=False)):
+            if error is not None:
+                print(f"Error fetching details of call {_call_id(call)}: {str(error)}, retrying on the next sync")
+                retry_calls.append(call)
+                yield call
+            else:
+                yield {**call, **details} if isinstance(details, dict) else call
+        self._commit_state(agent_id, retry_calls)
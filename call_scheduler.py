@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+
+def _default_call_key(item: Any) -> Hashable:
+    """
+    Default pacing key for a work item: the reseller ID for reseller records,
+    otherwise the item itself (e.g. a phone number)
+    """
+    try:
+        return item['id']
+    except (TypeError, KeyError, IndexError):
+        return item
+
+
+class CallScheduler:
+    """
+    Scheduler that runs per-reseller call work concurrently
+
+    At most `max_in_flight` calls run at the same time, consecutive calls to
+    the same reseller are spaced at least `pacing` seconds apart, and results
+    are yielded as soon as each call finishes rather than in input order.
+    """
+
+    def __init__(self, max_in_flight: int = 8, pacing: float = 0.0,
+                 key_func: Optional[Callable[[Any], Hashable]] = None):
+        """
+        Initialize the CallScheduler
+
+        Args:
+            max_in_flight: Maximum number of calls running at the same time
+            pacing: Minimum number of seconds between two calls to the same reseller
+            key_func: Function mapping a work item to its pacing key (defaults to the reseller ID)
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        if pacing < 0:
+            raise ValueError("pacing must not be negative")
+
+        self.max_in_flight = max_in_flight
+        self.pacing = pacing
+        self.key_func = key_func or _default_call_key
+        self._next_slot: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def _wait_for_slot(self, key: Hashable) -> None:
+        """
+        Block until the pacing window for a reseller allows another call
+
+        Args:
+            key: Pacing key of the reseller being called
+        """
+        if not self.pacing:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot.get(key, now))
+            self._next_slot[key] = start + self.pacing
+
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def _run_one(self, item: Any, work: Callable[[Any], Any]) -> Any:
+        """
+        Run the work for a single item once its pacing slot is available
+
+        Args:
+            item: Work item (usually a reseller)
+            work: Callable performing the call
+
+        Returns:
+            Result of the call
+        """
+        self._wait_for_slot(self.key_func(item))
+        return work(item)
+
+    def run(self, items: Iterable[Any],
+            work: Callable[[Any], Any]) -> Iterator[Tuple[Any, Any, Optional[BaseException]]]:
+        """
+        Run `work` for every item and yield results in completion order
+
+        Items are pulled lazily from `items`, so only a small window of work
+        is queued at any time even for very large reseller lists.
+
+        Args:
+            items: Work items to process (usually resellers or phone numbers)
+            work: Callable performing the call for a single item
+
+        Returns:
+            Iterator of (item, result, error) tuples; `error` is None on success
+        """
+        items = iter(items)
+        pending = {}
+        exhausted = False
+
+        executor = ThreadPoolExecutor(max_workers=self.max_in_flight)
+        try:
+            while True:
+                # Keep the pool saturated without materializing the whole input
+                while not exhausted and len(pending) < self.max_in_flight * 2:
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[executor.submit(self._run_one, item, work)] = item
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    error = future.exception()
+                    result = None if error else future.result()
+                    yield item, result, error
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
@@ -0,0 +1,298 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.services.omnidim_service import OmnidimService
+from src.utils.call_scheduler import CallScheduler
+from src.utils.data_processor import normalize_phone_number
+
+SHARD_SUBMITTING = 'submitting'
+SHARD_SUBMITTED = 'submitted'
+SHARD_FAILED = 'failed'
+
+
+class CampaignDispatcher:
+    """
+    Sharded dispatcher for large bulk-call campaigns
+
+    The phones file is streamed line by line; numbers are normalized and
+    deduplicated, then split into shards of `shard_size` numbers that are
+    submitted as separate bulk-call campaigns, at most `max_parallel` at a
+    time. Every shard is checkpointed to a JSON file as "submitting" right
+    before its request is sent and with its outcome once it completes, so a
+    crashed or interrupted run resumes with the shards that were not
+    submitted yet instead of dialing everyone again.
+
+    The bulk call API takes no idempotency key, so a shard whose outcome
+    is unknown (still "submitting", or failed) is first looked up among the
+    existing campaigns by its unique shard name. Shards found there are
+    recorded as submitted; "submitting" shards that can't be found are
+    reported and left alone unless `resubmit_unconfirmed` is set, as the
+    campaign may exist without being listed yet.
+    """
+
+    def __init__(self, omnidim_service: OmnidimService, agent_id: str, checkpoint_path: str,
+                 shard_size: int = 1000, max_parallel: int = 4, default_country_code: str = '1'):
+        """
+        Initialize the CampaignDispatcher
+
+        Args:
+            omnidim_service: Omnidim service used to create the campaigns
+            agent_id: ID of the agent making the calls
+            checkpoint_path: Path of the JSON checkpoint file
+            shard_size: Maximum number of phone numbers per campaign shard
+            max_parallel: Maximum number of shards submitted at the same time
+            default_country_code: Country code assumed for 10-digit national numbers
+        """
+        if shard_size < 1:
+            raise ValueError("shard_size must be at least 1")
+
+        self.omnidim_service = omnidim_service
+        self.agent_id = agent_id
+        self.checkpoint_path = checkpoint_path
+        self.shard_size = shard_size
+        self.max_parallel = max_parallel
+        self.default_country_code = default_country_code
+
+    def iter_phone_numbers(self, phones_file: str, stats: Optional[Dict[str, int]] = None) -> Iterator[str]:
+        """
+        Stream the normalized, deduplicated phone numbers of a phones file
+
+        Blank lines and lines starting with '#' are skipped.
+
+        Args:
+            phones_file: File with phone numbers, one per line
+            stats: Optional dictionary updated with 'numbers', 'duplicates' and 'invalid' counts
+
+        Returns:
+            Iterator of normalized phone numbers in file order
+        """
+        stats = stats if stats is not None else {}
+        for key in ('numbers', 'duplicates', 'invalid'):
+            stats.setdefault(key, 0)
+
+        seen = set()
+        with open(phones_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                phone = normalize_phone_number(line, self.default_country_code)
+                if len(phone) < 8:
+                    stats['invalid'] += 1
+                    continue
+                if phone in seen:
+                    stats['duplicates'] += 1
+                    continue
+                seen.add(phone)
+                stats['numbers'] += 1
+                yield phone
+
+    def iter_shards(self, phones_file: str, stats: Optional[Dict[str, int]] = None) -> Iterator[Tuple[int, List[str]]]:
+        """
+        Split the phone numbers of a phones file into shards
+
+        Args:
+            phones_file: File with phone numbers, one per line
+            stats: Optional dictionary updated with number counts
+
+        Returns:
+            Iterator of (shard index, phone numbers) tuples
+        """
+        shard: List[str] = []
+        index = 0
+        for phone in self.iter_phone_numbers(phones_file, stats):
+            shard.append(phone)
+            if len(shard) == self.shard_size:
+                yield index, shard
+                index += 1
+                shard = []
+        if shard:
+            yield index, shard
+
+    def _load_checkpoint(self, phones_file: str, campaign_name: str) -> Dict[str, Any]:
+        """
+        Load the checkpoint of a previous run of the same campaign
+
+        Args:
+            phones_file: File with phone numbers
+            campaign_name: Name of the campaign
+
+        Returns:
+            Checkpoint dictionary (a fresh one if there is no previous run)
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        with open(phones_file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        source = {
+            'phones_file': os.path.abspath(phones_file),
+            'digest': digest.hexdigest(),
+            'shard_size': self.shard_size,
+            'campaign_name': campaign_name
+        }
+
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return {'source': source, 'shards': {}}
+
+        if checkpoint.get('source') != source:
+            # Shard boundaries would not line up, so resuming could call numbers twice
+            raise ValueError(
+                f"Checkpoint {self.checkpoint_path} belongs to a different phones file, "
+                "shard size or campaign name; remove it or use another checkpoint path"
+            )
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        """
+        Atomically write the checkpoint
+
+        Args:
+            checkpoint: Checkpoint dictionary
+        """
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _find_campaigns(self, names: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Look up existing bulk call campaigns by name
+
+        Args:
+            names: Campaign names to look for
+
+        Returns:
+            Dictionary mapping each found name to its campaign ID, or None if
+            the campaigns could not be listed
+        """
+        wanted = set(names)
+        found = {}
+        try:
+            for campaign in self.omnidim_service.iter_bulk_call_campaigns():
+                name = campaign.get('name')
+                if name in wanted:
+                    found[name] = campaign.get('id')
+                    if len(found) == len(wanted):
+                        break
+        except Exception as e:
+            print(f"Error listing bulk call campaigns: {str(e)}")
+            return None
+        return found
+
+    def _reconcile(self, shard_states: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Record shards of an interrupted run that turn out to have been created
+
+        Args:
+            shard_states: Shard states of the checkpoint, updated in place
+        """
+        unsettled = {
+            state['name']: index for index, state in shard_states.items()
+            if state.get('status') in (SHARD_SUBMITTING, SHARD_FAILED) and state.get('name')
+        }
+        if not unsettled:
+            return
+
+        found = self._find_campaigns(list(unsettled))
+        for name, index in unsettled.items():
+            if found is not None and name in found:
+                shard_states[index].update(status=SHARD_SUBMITTED, campaign_id=found[name])
+                shard_states[index].pop('error', None)
+                print(f"Shard #{int(index) + 1} was already created, campaign ID: {found[name]}")
+
+    def dispatch(self, phones_file: str, campaign_name: str,
+                 metadata: Optional[Dict[str, Any]] = None,
+                 resubmit_unconfirmed: bool = False) -> Dict[str, Any]:
+        """
+        Submit the campaign shards that haven't been submitted yet
+
+        Args:
+            phones_file: File with phone numbers, one per line
+            campaign_name: Name of the campaign (shards are named "<name> #<n>")
+            metadata: Optional metadata for every shard
+            resubmit_unconfirmed: Submit shards interrupted mid-request again
+                even though their campaign may already exist
+
+        Returns:
+            Summary with shard and phone number counts; `unconfirmed` counts the
+            interrupted shards that were neither found nor submitted again
+        """
+        checkpoint = self._load_checkpoint(phones_file, campaign_name)
+        shard_states = checkpoint['shards']
+        self._reconcile(shard_states)
+        self._save_checkpoint(checkpoint)
+        stats: Dict[str, int] = {}
+        unconfirmed = 0
+
+        def pending_shards():
+            nonlocal unconfirmed
+            for index, numbers in self.iter_shards(phones_file, stats):
+                state = shard_states.get(str(index), {})
+                if state.get('status') == SHARD_SUBMITTED:
+                    continue
+                if state.get('status') == SHARD_SUBMITTING and not resubmit_unconfirmed:
+                    unconfirmed += 1
+                    print(f"Shard #{index + 1} ({len(numbers)} numbers) was interrupted while being "
+                          f"submitted and no campaign named '{state['name']}' was found; check it "
+                          "and dispatch with resubmit_unconfirmed to submit it again")
+                    continue
+                yield index, numbers
+
+        # Submissions run on worker threads while results are checkpointed here
+        checkpoint_lock = threading.Lock()
+
+        def submit(shard):
+            index, numbers = shard
+            name = f"{campaign_name} #{index + 1}"
+            # Checkpoint the attempt right before the request, so a crash mid-request
+            # can't lead to a blind resubmit and shards that were only queued aren't held back
+            with checkpoint_lock:
+                shard_states[str(index)] = {'status': SHARD_SUBMITTING, 'count': len(numbers), 'name': name}
+                self._save_checkpoint(checkpoint)
+            return self.omnidim_service.create_bulk_call_campaign(
+                agent_id=self.agent_id,
+                phone_numbers=numbers,
+                name=name,
+                metadata=metadata
+            )
+
+        scheduler = CallScheduler(max_in_flight=self.max_parallel, key_func=lambda shard: shard[0])
+        submitted = failed = 0
+        for (index, numbers), response, error in scheduler.run(pending_shards(), submit):
+            with checkpoint_lock:
+                state = shard_states.setdefault(str(index), {
+                    'count': len(numbers),
+                    'name': f"{campaign_name} #{index + 1}"
+                })
+                if error is not None:
+                    failed += 1
+                    state.update(status=SHARD_FAILED, error=str(error))
+                    print(f"Failed to submit shard #{index + 1} ({len(numbers)} numbers): {str(error)}")
+                else:
+                    submitted += 1
+                    body = OmnidimService._response_body(response)
+                    campaign_id = body.get('id') if isinstance(body, dict) else None
+                    state.update(status=SHARD_SUBMITTED, campaign_id=campaign_id)
+                    print(f"Submitted shard #{index + 1} ({len(numbers)} numbers), campaign ID: {campaign_id}")
+                self._save_checkpoint(checkpoint)
+
+        total_shards = -(-stats.get('numbers', 0) // self.shard_size)
+        return {
+            'shards': total_shards,
+            'submitted': submitted,
+            'failed': failed,
+            'unconfirmed': unconfirmed,
+            'skipped': total_shards - submitted - failed - unconfirmed,
+            'numbers': stats.get('numbers', 0),
+            'duplicates': stats.get('duplicates', 0),
+            'invalid': stats.get('invalid', 0)
+        }
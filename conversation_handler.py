@@ -1,21 +1,168 @@
 import json
 import random
-from typing import Dict, List, Any, Tuple
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from src.utils.personality import Personality, classify_personality, primary_personality, reseller_personality
+
+# Timestamp recorded on simulated interactions
+SIMULATED_TIMESTAMP = "2025-05-25T18:00:00+05:30"
+
+# Flavor text added to reseller responses, per personality trait
+PERSONALITY_FLAVORS: Dict[Personality, Tuple[str, ...]] = {
+    Personality.PROFESSIONAL: (
+        "I'd be happy to assist you with that.",
+        "Let me provide you with that information.",
+        "Thank you for your interest in our products."
+    ),
+    Personality.ENTHUSIASTIC: (
+        "I'm super excited to tell you about this amazing deal!",
+        "You're going to love these sneakers, they're flying off the shelves!",
+        "I might be able to work something out if you're ready to buy today!"
+    ),
+    Personality.KNOWLEDGEABLE: (
+        "These are part of the iconic Chicago colorway series that first released in 1985.",
+        "The quality on these is exceptional, with premium leather uppers and the classic Nike Air branding.",
+        "These have been one of our most popular releases this year."
+    ),
+    Personality.CASUAL: (
+        "Hey, no problem at all!",
+        "Yeah, these are really cool kicks.",
+        "Let me know if you need anything else, happy to help!"
+    ),
+    Personality.PREMIUM: (
+        "We pride ourselves on offering only the finest authenticated products.",
+        "Our clients appreciate the exceptional service we provide with every purchase.",
+        "We can arrange a private viewing if you'd like to see the product before purchase."
+    ),
+}
+
+# Agent questions about a topic; other topics get a generic question
+FOLLOW_UP_QUESTIONS = {
+    "delivery": "Could you tell me more about your delivery options and timeframes?",
+    "special_offers": "Do you have any special offers or promotions available for this product?",
+    "payment_options": "What payment options do you accept?",
+    "authenticity": "How do you verify the authenticity of your products?"
+}
+
+# Generator used by handlers created without a seed or RNG
+_SHARED_RNG = random.Random()
+
+CLOSING = (
+    "Thank you for the information. I'm comparing offers from several sellers "
+    "and will get back to you if I decide to proceed with your offer. "
+    "Have a great day!"
+)
+
+def personality_flavors(personality: Union[Personality, str, None]) -> Tuple[str, ...]:
+    """
+    Get the flavor phrases for a personality
+    
+    Args:
+        personality: Personality traits, or a description to classify
+        
+    Returns:
+        Flavor phrases of the highest-priority trait, or an empty tuple
+    """
+    if not isinstance(personality, Personality):
+        personality = classify_personality(personality)
+    return PERSONALITY_FLAVORS.get(primary_personality(personality), ())
+
+class InteractionRecord(Mapping):
+    """
+    Compact, read-only record of one conversation turn
+    
+    Records of a conversation share one (reseller ID, reseller name) tuple
+    and the timestamp string instead of each holding a five-key dict. They
+    behave like the dicts they replace (`record['message']`, `.get()`,
+    iteration) and are turned into real dicts with to_dict() when they are
+    serialized.
+    """
+    
+    __slots__ = ('timestamp', 'speaker', 'message', 'reseller')
+    
+    KEYS = ('timestamp', 'speaker', 'message', 'reseller_id', 'reseller_name')
+    
+    def __init__(self, timestamp: str, speaker: str, message: str, reseller: Tuple[Any, str]):
+        """
+        Initialize the InteractionRecord
+        
+        Args:
+            timestamp: Time of the turn
+            speaker: Who is speaking (agent or reseller)
+            message: The message content
+            reseller: Shared (reseller ID, reseller name) tuple
+        """
+        self.timestamp = timestamp
+        self.speaker = speaker
+        self.message = message
+        self.reseller = reseller
+    
+    def __getitem__(self, key: str) -> Any:
+        if key == 'message':
+            return self.message
+        if key == 'speaker':
+            return self.speaker
+        if key == 'timestamp':
+            return self.timestamp
+        if key == 'reseller_id':
+            return self.reseller[0]
+        if key == 'reseller_name':
+            return self.reseller[1]
+        raise KeyError(key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+    
+    def __len__(self) -> int:
+        return len(self.KEYS)
+    
+    def __repr__(self) -> str:
+        return f"InteractionRecord({self.to_dict()!r})"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the record to a dictionary
+        
+        Returns:
+            Interaction dictionary
+        """
+        return {
+            "timestamp": self.timestamp,
+            "speaker": self.speaker,
+            "message": self.message,
+            "reseller_id": self.reseller[0],
+            "reseller_name": self.reseller[1]
+        }
 
 class ConversationHandler:
     """
     Utility class for handling voice agent conversations with resellers
+    
+    Flavor text comes from module-level phrase tables resolved once per
+    handler, and random choices come from the handler's own RNG, so a
+    seeded handler always produces the same conversation.
     """
     
-    def __init__(self, reseller_data: Dict[str, Any]):
+    def __init__(self, reseller_data: Dict[str, Any], seed: Any = None, rng: Optional[random.Random] = None):
         """
         Initialize the ConversationHandler with reseller data
         
         Args:
             reseller_data: Dictionary containing reseller information
+            seed: Optional seed for reproducible conversations
+            rng: Optional random generator to draw from (overrides seed); handlers
+                without either share one unseeded generator
         """
         self.reseller = reseller_data
-        self.conversation_log = []
+        if rng is None:
+            rng = random.Random(seed) if seed is not None else _SHARED_RNG
+        self.rng = rng
+        self.conversation_log: List[InteractionRecord] = []
+        self._reseller_ref = (reseller_data['id'], reseller_data['name'])
+        # Classified once when the reseller was loaded (or once per distinct description)
+        self.personality = reseller_personality(reseller_data)
+        self._flavors = personality_flavors(self.personality)
         
     def generate_greeting(self) -> str:
         """
@@ -43,8 +190,6 @@ class ConversationHandler:
         Returns:
             Simulated reseller response
         """
-        personality = self.reseller['personality'].lower()
-        
         # Base response with product information
         if query_type == "pricing":
             base_response = f"The {self.reseller['product']['name']} in size {self.reseller['product']['size']} is priced at ${self.reseller['price']:.2f}."
@@ -55,44 +200,13 @@ class ConversationHandler:
         elif query_type == "special_offers":
             base_response = f"We do have a special offer: {self.reseller['special_offers']}."
         else:
-            base_response = f"I'm not sure I understand what you're asking about."
+            base_response = "I'm not sure I understand what you're asking about."
         
         # Add personality flavor to the response
-        if "professional" in personality:
-            flavor = random.choice([
-                "I'd be happy to assist you with that.",
-                "Let me provide you with that information.",
-                "Thank you for your interest in our products."
-            ])
-        elif "enthusiastic" in personality or "eager" in personality:
-            flavor = random.choice([
-                "I'm super excited to tell you about this amazing deal!",
-                "You're going to love these sneakers, they're flying off the shelves!",
-                "I might be able to work something out if you're ready to buy today!"
-            ])
-        elif "knowledgeable" in personality:
-            flavor = random.choice([
-                "These are part of the iconic Chicago colorway series that first released in 1985.",
-                "The quality on these is exceptional, with premium leather uppers and the classic Nike Air branding.",
-                "These have been one of our most popular releases this year."
-            ])
-        elif "casual" in personality or "friendly" in personality:
-            flavor = random.choice([
-                "Hey, no problem at all!",
-                "Yeah, these are really cool kicks.",
-                "Let me know if you need anything else, happy to help!"
-            ])
-        elif "premium" in personality:
-            flavor = random.choice([
-                "We pride ourselves on offering only the finest authenticated products.",
-                "Our clients appreciate the exceptional service we provide with every purchase.",
-                "We can arrange a private viewing if you'd like to see the product before purchase."
-            ])
+        if self._flavors:
+            response = f"{base_response} {self.rng.choice(self._flavors)}"
         else:
-            flavor = ""
-        
-        # Combine base response with personality flavor
-        response = f"{base_response} {flavor}"
+            response = base_response
         
         self.log_interaction("reseller", response)
         return response
@@ -107,15 +221,8 @@ class ConversationHandler:
         Returns:
             Follow-up question
         """
-        if topic == "delivery":
-            question = f"Could you tell me more about your delivery options and timeframes?"
-        elif topic == "special_offers":
-            question = f"Do you have any special offers or promotions available for this product?"
-        elif topic == "payment_options":
-            question = f"What payment options do you accept?"
-        elif topic == "authenticity":
-            question = f"How do you verify the authenticity of your products?"
-        else:
+        question = FOLLOW_UP_QUESTIONS.get(topic)
+        if question is None:
             question = f"Could you provide more information about {topic}?"
         
         self.log_interaction("agent", question)
@@ -128,32 +235,21 @@ class ConversationHandler:
         Returns:
             Closing statement
         """
-        closing = (
-            f"Thank you for the information. I'm comparing offers from several sellers "
-            f"and will get back to you if I decide to proceed with your offer. "
-            f"Have a great day!"
-        )
-        
-        self.log_interaction("agent", closing)
-        return closing
+        self.log_interaction("agent", CLOSING)
+        return CLOSING
     
-    def log_interaction(self, speaker: str, message: str) -> None:
+    def log_interaction(self, speaker: str, message: str, timestamp: str = SIMULATED_TIMESTAMP) -> None:
         """
         Log an interaction in the conversation
         
         Args:
             speaker: Who is speaking (agent or reseller)
             message: The message content
+            timestamp: Time of the interaction (defaults to the simulated call time)
         """
-        self.conversation_log.append({
-            "timestamp": "2025-05-25T18:00:00+05:30",  # Using current date from metadata
-            "speaker": speaker,
-            "message": message,
-            "reseller_id": self.reseller['id'],
-            "reseller_name": self.reseller['name']
-        })
+        self.conversation_log.append(InteractionRecord(timestamp, speaker, message, self._reseller_ref))
     
-    def get_conversation_log(self) -> List[Dict[str, Any]]:
+    def get_conversation_log(self) -> List[InteractionRecord]:
         """
         Get the full conversation log
         
@@ -162,7 +258,7 @@ class ConversationHandler:
         """
         return self.conversation_log
     
-    def simulate_full_conversation(self) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    def simulate_full_conversation(self) -> Tuple[List[InteractionRecord], Dict[str, Any]]:
         """
         Simulate a full conversation with the reseller and extract key information
         
@@ -1,9 +1,101 @@
+import hashlib
 import json
 import os
-from typing import Dict, List, Any
+import threading
+from typing import Callable, Dict, List, Any, Tuple
 import pandas as pd
 from datetime import datetime
 
+from src.utils.delivery_parser import (
+    AVAILABILITY_IN_STOCK, AVAILABILITY_LIMITED, AVAILABILITY_UNKNOWN,
+    parse_availability_tier, parse_delivery_days
+)
+from src.utils.ranking_index import RankingIndex
+from src.utils.offer_scoring import OfferFeatureCache, OfferScoringEngine
+from src.utils.offer_table import OfferTable, offer_sku_and_size
+from src.utils.personality import Personality, classify_personality, reseller_personality
+from src.utils.reseller_records import ResellerRecord, iter_reseller_sources
+
+# Score bonus per availability tier
+_AVAILABILITY_SCORES = {AVAILABILITY_UNKNOWN: 0, AVAILABILITY_LIMITED: 25, AVAILABILITY_IN_STOCK: 50}
+
+def normalize_phone_number(phone: str, default_country_code: str = '1') -> str:
+    """
+    Normalize a phone number to E.164-style digits for matching
+    
+    Args:
+        phone: Phone number in any common format (e.g. "+1-555-123-4567")
+        default_country_code: Country code assumed for 10-digit national numbers
+        
+    Returns:
+        Normalized phone number (e.g. "+15551234567"), or an empty string if
+        the input contains no digits
+    """
+    digits = ''.join(ch for ch in str(phone) if ch.isdigit())
+    if not digits:
+        return ''
+    if len(digits) == 10:
+        digits = default_country_code + digits
+    return '+' + digits
+
+class _ResellerSnapshot:
+    """
+    Immutable view of the loaded reseller data and everything derived from it
+    
+    DataProcessor swaps whole snapshots on reload, so readers that grab the
+    current snapshot once never see a half-built list, index or ranking.
+    """
+    
+    __slots__ = ('resellers', 'by_id', 'by_name', 'by_phone', 'by_email', 'ranking', 'offers',
+                 'source_digests', 'content_hash', 'file_state', 'dirty_ids')
+    
+    def __init__(self, resellers: List[ResellerRecord], source_digests: Dict[bytes, ResellerRecord] = None,
+                 content_hash: str = None, file_state: Tuple[int, int] = None,
+                 scorer: Callable[[Any], float] = None):
+        """
+        Build the lookup indexes and rankings for a list of scored resellers
+        
+        Args:
+            resellers: Reseller records with their score already set
+            source_digests: Digest of each reseller's raw JSON text, used to reuse unchanged records
+            content_hash: Hash of the whole reseller catalog
+            file_state: (mtime_ns, size) of the data file when it was read
+            scorer: Function scoring the resellers' additional offers
+        """
+        self.source_digests = source_digests or {}
+        self.content_hash = content_hash
+        self.file_state = file_state
+        self.dirty_ids = set()
+        
+        self.by_id = {}
+        self.by_name = {}
+        self.by_phone = {}
+        self.by_email = {}
+        # Only the first reseller with an ID is kept, so the lookups,
+        # rankings and offers all agree on which record an ID refers to
+        self.resellers = []
+        for reseller in resellers:
+            if reseller['id'] in self.by_id:
+                print(f"Warning: duplicate reseller ID {reseller['id']} ({reseller['name']}), ignoring it")
+                continue
+            self.by_id[reseller['id']] = reseller
+            self.resellers.append(reseller)
+            self.by_name.setdefault(reseller['name'].casefold(), reseller)
+            
+            contact = reseller.get('contact') or {}
+            phone = normalize_phone_number(contact.get('phone', ''))
+            if phone:
+                self.by_phone.setdefault(phone, reseller)
+            email = contact.get('email')
+            if email:
+                self.by_email.setdefault(email.strip().casefold(), reseller)
+        
+        self.ranking = RankingIndex.from_items(
+            (reseller['id'], reseller, reseller['score']) for reseller in self.resellers
+        )
+        # Every (reseller, SKU, size) offer, ranked per SKU and size
+        self.offers = OfferTable.from_resellers(self.resellers, scorer)
+
 class DataProcessor:
     """
     Utility class for loading and processing reseller data
@@ -14,7 +106,7 @@ class DataProcessor:
         Initialize the DataProcessor with the path to the reseller data
         
         Args:
-            data_path: Path to the reseller data JSON file
+            data_path: Path to the reseller data file (.json, or .jsonl/.ndjson with one reseller per line)
         """
         if data_path is None:
             # Default path relative to the project root
@@ -23,22 +115,128 @@ class DataProcessor:
             data_path = os.path.join(project_root, 'src', 'data', 'resellers.json')
         
         self.data_path = data_path
-        self.resellers = self._load_data()
+        self.scoring_engine = OfferScoringEngine()
+        # Offer features shared by every scoring policy, rebuilt once per snapshot
+        self.feature_cache = OfferFeatureCache(self.scoring_engine)
+        # Serializes writers (updates and reloads); readers never take it
+        self._write_lock = threading.RLock()
+        self._snapshot = self._load_data()
+        # Bumped whenever reseller data changes, so derived caches know when to rebuild
+        self._data_version = 0
+        self._change_listeners: List[Callable[[int], None]] = []
+    
+    @property
+    def resellers(self) -> List[ResellerRecord]:
+        """
+        List of all reseller records in the current snapshot
+        """
+        return self._snapshot.resellers
+    
+    @property
+    def data_version(self) -> int:
+        """
+        Counter incremented every time the reseller data changes
+        """
+        return self._data_version
+    
+    def add_change_listener(self, listener: Callable[[int], None]) -> None:
+        """
+        Register a function called with the new data version whenever reseller data changes
+        
+        Listeners run on the thread that made the change, so they should only
+        schedule work rather than do it.
+        
+        Args:
+            listener: Function taking the new data version
+        """
+        self._change_listeners.append(listener)
     
-    def _load_data(self) -> List[Dict[str, Any]]:
+    def remove_change_listener(self, listener: Callable[[int], None]) -> None:
         """
-        Load reseller data from the JSON file
+        Unregister a change listener
+        
+        Args:
+            listener: Previously registered function
+        """
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+    
+    def _data_changed(self) -> None:
+        """
+        Bump the data version and notify the change listeners; the caller holds the write lock
+        """
+        self._data_version += 1
+        for listener in list(self._change_listeners):
+            try:
+                listener(self._data_version)
+            except Exception as e:
+                print(f"Error in reseller data change listener: {e}")
+    
+    def _file_state(self) -> Tuple[int, int]:
+        """
+        Get the modification time and size of the data file
         
         Returns:
-            List of reseller data dictionaries
+            Tuple of (mtime_ns, size)
+        """
+        stat = os.stat(self.data_path)
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _read_snapshot(self, previous: _ResellerSnapshot = None) -> _ResellerSnapshot:
+        """
+        Stream the data file into a new snapshot
+        
+        Resellers whose raw JSON is unchanged since the previous snapshot are
+        reused as-is (JSON-Lines entries are not even parsed again), so only
+        new or modified resellers are decoded and re-scored.
+        
+        Args:
+            previous: Snapshot to reuse unchanged resellers from
+            
+        Returns:
+            New snapshot
+        """
+        file_state = self._file_state()
+        previous_digests = previous.source_digests if previous is not None else {}
+        dirty_ids = previous.dirty_ids if previous is not None else ()
+        
+        resellers = []
+        source_digests = {}
+        shared_products = {}
+        content_hash = hashlib.sha1()
+        for raw, data in iter_reseller_sources(self.data_path):
+            digest = hashlib.blake2b(raw.encode('utf-8'), digest_size=16).digest()
+            content_hash.update(digest)
+            
+            reseller = previous_digests.get(digest)
+            if reseller is None or reseller['id'] in dirty_ids:
+                if data is None:
+                    data = json.loads(raw)
+                reseller = ResellerRecord.from_dict(data, shared_products)
+                reseller['score'] = self.score_offer(reseller)
+                reseller.traits = classify_personality(reseller['personality'])
+            
+            resellers.append(reseller)
+            source_digests[digest] = reseller
+        
+        return _ResellerSnapshot(resellers, source_digests, content_hash.hexdigest(), file_state,
+                                 scorer=self.score_offer)
+    
+    def _load_data(self) -> _ResellerSnapshot:
+        """
+        Load reseller data from the JSON or JSON-Lines file
+        
+        Records are streamed from the file one at a time and stored in a
+        compact form, so large catalogs load quickly and use little memory.
+        
+        Returns:
+            Snapshot of the loaded reseller data
         """
         try:
-            with open(self.data_path, 'r') as f:
-                data = json.load(f)
-                return data['resellers']
+            return self._read_snapshot()
         except Exception as e:
             print(f"Error loading reseller data: {e}")
-            return []
+            return _ResellerSnapshot([])
     
     def get_all_resellers(self) -> List[Dict[str, Any]]:
         """
@@ -47,7 +245,54 @@ class DataProcessor:
         Returns:
             List of all reseller data dictionaries
         """
-        return self.resellers
+        return self._snapshot.resellers
+    
+    def reload(self) -> None:
+        """
+        Reload the reseller data from disk and rebuild the lookup indexes and ranking
+        
+        The current data is kept if the file can't be read.
+        """
+        with self._write_lock:
+            try:
+                self._snapshot = self._read_snapshot()
+            except Exception as e:
+                print(f"Error reloading reseller data: {e}")
+                return
+            self._data_changed()
+    
+    def reload_if_changed(self) -> bool:
+        """
+        Reload the reseller data if the data file changed since it was last read
+        
+        The file's modification time and size are checked first; if they
+        changed, the file is streamed and its content hash compared, and only
+        new or modified resellers are parsed. The new lookup indexes and
+        ranking are built off to the side and swapped in with a single
+        assignment, so concurrent readers keep using the old snapshot until
+        the new one is complete. On errors the current data is kept.
+        
+        Returns:
+            True if new reseller data was loaded
+        """
+        with self._write_lock:
+            current = self._snapshot
+            try:
+                if self._file_state() == current.file_state:
+                    return False
+                snapshot = self._read_snapshot(current)
+            except Exception as e:
+                print(f"Error reloading reseller data: {e}")
+                return False
+            
+            if snapshot.content_hash == current.content_hash:
+                # Touched but not modified; keep any live updates
+                current.file_state = snapshot.file_state
+                return False
+            
+            self._snapshot = snapshot
+            self._data_changed()
+            return True
     
     def get_reseller_by_id(self, reseller_id: int) -> Dict[str, Any]:
         """
@@ -59,14 +304,11 @@ class DataProcessor:
         Returns:
             Reseller data dictionary or None if not found
         """
-        for reseller in self.resellers:
-            if reseller['id'] == reseller_id:
-                return reseller
-        return None
+        return self._snapshot.by_id.get(reseller_id)
     
     def get_reseller_by_name(self, name: str) -> Dict[str, Any]:
         """
-        Get a reseller by name
+        Get a reseller by name (case-insensitive)
         
         Args:
             name: Name of the reseller to retrieve
@@ -74,67 +316,223 @@ class DataProcessor:
         Returns:
             Reseller data dictionary or None if not found
         """
-        for reseller in self.resellers:
-            if reseller['name'].lower() == name.lower():
+        return self._snapshot.by_name.get(name.casefold())
+    
+    def get_reseller_by_phone(self, phone: str) -> Dict[str, Any]:
+        """
+        Get a reseller by contact phone number, ignoring formatting
+        
+        Args:
+            phone: Phone number of the reseller to retrieve
+            
+        Returns:
+            Reseller data dictionary or None if not found
+        """
+        return self._snapshot.by_phone.get(normalize_phone_number(phone))
+    
+    def get_reseller_by_email(self, email: str) -> Dict[str, Any]:
+        """
+        Get a reseller by contact email address (case-insensitive)
+        
+        Args:
+            email: Email address of the reseller to retrieve
+            
+        Returns:
+            Reseller data dictionary or None if not found
+        """
+        return self._snapshot.by_email.get(email.strip().casefold())
+    
+    def get_resellers_by_personality(self, traits: Personality) -> List[Dict[str, Any]]:
+        """
+        Get the resellers that have all of the given personality traits
+        
+        Args:
+            traits: Personality trait(s), e.g. Personality.CASUAL | Personality.KNOWLEDGEABLE
+            
+        Returns:
+            List of matching reseller data dictionaries
+        """
+        return [reseller for reseller in self.resellers if reseller_personality(reseller) & traits == traits]
+    
+    def find_reseller(self, name: str = None, phone: str = None, email: str = None) -> Dict[str, Any]:
+        """
+        Match an inbound webhook or call to a reseller using whichever identifiers are available
+        
+        Args:
+            name: Reseller name
+            phone: Reseller phone number
+            email: Reseller email address
+            
+        Returns:
+            Reseller data dictionary or None if no identifier matches
+        """
+        if phone:
+            reseller = self.get_reseller_by_phone(phone)
+            if reseller is not None:
                 return reseller
+        if email:
+            reseller = self.get_reseller_by_email(email)
+            if reseller is not None:
+                return reseller
+        if name:
+            return self.get_reseller_by_name(name)
         return None
     
-    def rank_offers(self) -> List[Dict[str, Any]]:
+    @staticmethod
+    def score_offer(reseller: Dict[str, Any]) -> float:
         """
-        Rank reseller offers based on price and delivery time
+        Calculate the ranking score of a single reseller offer
         
+        Args:
+            reseller: Reseller data dictionary
+            
         Returns:
-            List of ranked reseller data dictionaries
+            Score of the offer (higher is better)
+        """
+        # Lower price is better
+        price_score = 1000 - reseller['price']
+        
+        # Convert delivery time to numeric value (earliest estimated day, 7 if unparseable)
+        delivery_days = parse_delivery_days(reseller['delivery_time'])
+        
+        # Lower delivery time is better
+        delivery_score = 100 - (delivery_days * 10)
+        
+        # Availability bonus
+        availability_score = _AVAILABILITY_SCORES[parse_availability_tier(reseller['availability'])]
+        
+        # Calculate total score (price is most important)
+        return price_score + delivery_score + availability_score
+    
+    def update_reseller(self, reseller_id: int, price: float = None,
+                        availability: str = None, delivery_time: str = None,
+                        sku: str = None, size: str = None) -> Dict[str, Any]:
         """
-        # Create a copy of the resellers list to avoid modifying the original
-        ranked_resellers = self.resellers.copy()
+        Update a reseller's offer and re-rank it in O(log n)
         
-        # Calculate a score for each reseller based on price and delivery time
-        for reseller in ranked_resellers:
-            # Lower price is better
-            price_score = 1000 - reseller['price']
+        Args:
+            reseller_id: ID of the reseller to update
+            price: New price (unchanged if None)
+            availability: New availability (unchanged if None)
+            delivery_time: New delivery time (unchanged if None)
+            sku: SKU of the offer to update (defaults to the reseller's main product)
+            size: Size of the offer to update (defaults to the reseller's main product)
             
-            # Convert delivery time to numeric value (estimated days)
-            delivery_time = reseller['delivery_time'].lower()
-            if 'next day' in delivery_time:
-                delivery_days = 1
-            elif '-' in delivery_time:
-                # Extract the lower range (e.g., "3-5 days" -> 3)
-                delivery_days = int(delivery_time.split('-')[0].strip().split(' ')[0])
-            else:
-                # Default to 7 days if we can't parse
-                delivery_days = 7
+        Returns:
+            Updated offer dictionary or None if not found
+        """
+        with self._write_lock:
+            snapshot = self._snapshot
+            reseller = snapshot.by_id.get(reseller_id)
+            if reseller is None:
+                return None
             
-            # Lower delivery time is better
-            delivery_score = 100 - (delivery_days * 10)
+            offer = reseller
+            if sku is not None or size is not None:
+                main_sku, main_size = offer_sku_and_size(reseller)
+                offer = snapshot.offers.get((reseller_id, sku or main_sku, size or main_size))
+                if offer is None:
+                    return None
             
-            # Availability bonus
-            availability_score = 0
-            if 'in stock' in reseller['availability'].lower():
-                availability_score = 50
-            elif 'limited' in reseller['availability'].lower():
-                availability_score = 25
+            if price is not None:
+                offer['price'] = price
+            if availability is not None:
+                offer['availability'] = availability
+            if delivery_time is not None:
+                offer['delivery_time'] = delivery_time
             
-            # Calculate total score (price is most important)
-            reseller['score'] = price_score + delivery_score + availability_score
+            offer['score'] = self.score_offer(offer)
+            if offer is reseller:
+                snapshot.ranking.upsert(reseller_id, reseller, reseller['score'])
+            snapshot.offers.upsert((reseller_id,) + offer_sku_and_size(offer), offer, offer['score'])
+            self.feature_cache.update_offer(snapshot, offer)
+            # The record no longer matches the file, so a reload must re-read it
+            snapshot.dirty_ids.add(reseller_id)
+            self._data_changed()
+            return offer
+    
+    @staticmethod
+    def _policy_offers(snapshot: _ResellerSnapshot) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        List the offers of a snapshot ranked by scoring policies
         
-        # Sort by score (higher is better)
-        ranked_resellers.sort(key=lambda x: x['score'], reverse=True)
+        Args:
+            snapshot: Reseller snapshot
+            
+        Returns:
+            Tuple of (offers with each reseller's main offer first, number of main offers)
+        """
+        main_offers = list(snapshot.resellers)
+        additional_offers = [offer for offer in snapshot.offers.offers()
+                             if snapshot.by_id.get(offer['id']) is not offer]
+        return main_offers + additional_offers, len(main_offers)
+    
+    def rank_offers(self, policy: str = None) -> List[Dict[str, Any]]:
+        """
+        Rank reseller offers based on price and delivery time
         
-        return ranked_resellers
+        Args:
+            policy: Optional name of the scoring policy to rank by (see offer_scoring)
+            
+        Returns:
+            List of ranked reseller data dictionaries
+        """
+        if policy is None:
+            return self._snapshot.ranking.ranked()
+        snapshot = self._snapshot
+        return self.feature_cache.top_offers(snapshot, lambda: self._policy_offers(snapshot), policy)
     
-    def get_top_offers(self, count: int = 3) -> List[Dict[str, Any]]:
+    def get_top_offers(self, count: int = 3, sku: str = None, size: str = None,
+                       policy: str = None) -> List[Dict[str, Any]]:
         """
         Get the top N offers based on ranking
         
+        Without a SKU or size, each reseller's main offer is ranked; with
+        them, the offers for that product are read from its own ranking.
+        With a policy, the offers are ranked by that policy's weights over
+        the cached offer features instead.
+        
         Args:
             count: Number of top offers to return
+            sku: Optional SKU to rank offers for
+            size: Optional size to rank offers for
+            policy: Optional name of the scoring policy to rank by
             
         Returns:
             List of top N reseller data dictionaries
         """
-        ranked_offers = self.rank_offers()
-        return ranked_offers[:count]
+        if policy is not None:
+            snapshot = self._snapshot
+            return self.feature_cache.top_offers(snapshot, lambda: self._policy_offers(snapshot), policy,
+                                                 count, sku=sku, size=size)
+        if sku is None and size is None:
+            return self._snapshot.ranking.top_k(count)
+        return self._snapshot.offers.top_k(count, sku=sku, size=size)
+    
+    def get_products(self) -> Dict[str, List[str]]:
+        """
+        List the SKUs on offer and the sizes offered for each
+        
+        Returns:
+            Dictionary mapping each SKU to its sizes
+        """
+        return self._snapshot.offers.products()
+    
+    def rank_offers_frame(self, offers: List[Dict[str, Any]] = None, count: int = None) -> pd.DataFrame:
+        """
+        Rank a large batch of offers with the vectorized scoring engine
+        
+        Args:
+            offers: Offer dictionaries to rank (defaults to all resellers)
+            count: Optional number of top offers to keep
+            
+        Returns:
+            DataFrame of offer features and scores, sorted best first
+        """
+        if offers is None:
+            offers = self.resellers
+        
+        return self.scoring_engine.rank(offers, count)
     
     def format_offer_for_email(self, offer: Dict[str, Any]) -> str:
         """
@@ -180,3 +578,51 @@ Contact: {offer['contact']['phone']} | {offer['contact']['email']}
             })
             
         return pd.DataFrame(data)
+
+
+class ResellerDataWatcher:
+    """
+    Background thread that hot-reloads reseller data when the data file changes
+    """
+    
+    def __init__(self, data_processor: DataProcessor, interval: float = 2.0):
+        """
+        Initialize the watcher
+        
+        Args:
+            data_processor: DataProcessor whose data file should be watched
+            interval: Number of seconds between checks of the data file
+        """
+        self.data_processor = data_processor
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def start(self) -> None:
+        """
+        Start watching the data file in a daemon thread
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="reseller-data-watcher", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """
+        Stop watching the data file
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self) -> None:
+        """
+        Poll the data file until stopped
+        """
+        while not self._stop_event.wait(self.interval):
+            if self.data_processor.reload_if_changed():
+                print(f"Reloaded reseller data from {self.data_processor.data_path} "
+                      f"({len(self.data_processor.get_all_resellers())} resellers)")
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import math
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+def payload_fingerprint(payload: Any) -> str:
+    """
+    Hash a JSON-serializable payload independently of its key order
+
+    Args:
+        payload: Payload to hash
+
+    Returns:
+        Hex digest of the canonical JSON encoding of the payload
+    """
+    data = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class BloomFilter:
+    """
+    Fixed-size, aging Bloom filter that can be saved to and loaded from a file
+
+    Sized for `capacity` keys at the given false-positive rate; membership
+    tests never miss a recently added key but may report a key that wasn't
+    added. With a `rotate_interval`, keys are kept in two generations: every
+    interval the current generation becomes the previous one and the oldest
+    is dropped, so a key is remembered for one to two intervals and the
+    false-positive rate doesn't creep up as keys accumulate.
+    """
+
+    def __init__(self, capacity: int = 1000000, error_rate: float = 0.001, path: Optional[str] = None,
+                 rotate_interval: Optional[float] = None, clock: Callable[[], float] = time.time):
+        """
+        Initialize the BloomFilter, loading it from `path` if the file exists
+
+        Args:
+            capacity: Expected number of keys per generation
+            error_rate: Target false-positive rate at full capacity
+            path: Optional file the filter is persisted to
+            rotate_interval: Optional number of seconds between generation rotations
+            clock: Wall clock function (rotations are persisted), replaceable for testing
+        """
+        self.path = path
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.rotate_interval = rotate_interval
+        self._clock = clock
+        self._bits = bytearray((self.size + 7) // 8)
+        self._previous_bits = bytearray(len(self._bits))
+        self._rotated_at = clock()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def _load(self, path: str) -> None:
+        """
+        Load both generations and the last rotation time from a file
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        length = len(self._bits)
+        if len(data) == 2 * length + 8:
+            self._bits = bytearray(data[:length])
+            self._previous_bits = bytearray(data[length:2 * length])
+            self._rotated_at = struct.unpack('<d', data[2 * length:])[0]
+        elif len(data) == length:
+            # Single-generation file written before filters aged
+            self._bits = bytearray(data)
+        else:
+            print(f"Ignoring Bloom filter {path}: it was built for a different capacity")
+
+    def _positions(self, key: str):
+        """
+        Bit positions of a key, derived from two halves of one hash
+        """
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def _maybe_rotate(self) -> None:
+        """
+        Start a new generation once the rotation interval has passed
+        """
+        if self.rotate_interval is None:
+            return
+        now = self._clock()
+        if now - self._rotated_at < self.rotate_interval:
+            return
+        if now - self._rotated_at >= 2 * self.rotate_interval:
+            # Both generations are too old
+            self._previous_bits = bytearray(len(self._bits))
+        else:
+            self._previous_bits = self._bits
+        self._bits = bytearray(len(self._previous_bits))
+        self._rotated_at = now
+        self._dirty = True
+
+    def add(self, key: str) -> None:
+        """
+        Add a key to the filter
+
+        Args:
+            key: Key to add
+        """
+        with self._lock:
+            self._maybe_rotate()
+            for position in self._positions(key):
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self._dirty = True
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._maybe_rotate()
+            bits, previous_bits = self._bits, self._previous_bits
+        positions = self._positions(key)
+        return (all(bits[position >> 3] & (1 << (position & 7)) for position in positions)
+                or all(previous_bits[position >> 3] & (1 << (position & 7)) for position in positions))
+
+    @property
+    def dirty(self) -> bool:
+        """
+        Whether the filter changed since it was last saved
+        """
+        return self._dirty
+
+    def save(self) -> None:
+        """
+        Atomically write the filter to its file
+        """
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with self._lock:
+            with open(tmp_path, 'wb') as f:
+                f.write(self._bits)
+                f.write(self._previous_bits)
+                f.write(struct.pack('<d', self._rotated_at))
+            self._dirty = False
+        os.replace(tmp_path, self.path)
+
+
+class DedupCache:
+    """
+    Bounded cache of already handled requests, for idempotent webhooks
+
+    Keys (e.g. a conversation ID plus a payload fingerprint) map to the
+    response that was returned the first time. Entries live in an
+    OrderedDict used as an LRU, capped at `max_entries` and expiring after
+    `ttl` seconds. An optional Bloom filter remembers the keys evicted for
+    capacity before their TTL ran out, so late retries are still
+    recognized as duplicates; expired keys are not remembered. Requests
+    recognized only by the Bloom filter may be false positives, so they
+    are counted in `bloom_hits` and logged. The filter is saved every
+    `save_interval` seconds while it changes, and on close.
+    """
+
+    def __init__(self, max_entries: int = 100000, ttl: float = 86400.0,
+                 bloom_filter: Optional[BloomFilter] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 save_interval: float = 60.0):
+        """
+        Initialize the DedupCache
+
+        Args:
+            max_entries: Maximum number of cached responses
+            ttl: Number of seconds a response stays cached
+            bloom_filter: Optional Bloom filter for keys evicted from the cache
+                (give it a `rotate_interval` of about `ttl` so it ages too)
+            clock: Monotonic clock function, replaceable for testing
+            save_interval: Minimum number of seconds between Bloom filter saves
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.bloom_filter = bloom_filter
+        self.save_interval = save_interval
+        self._clock = clock
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._saved_at = clock()
+        self.hits = 0
+        self.misses = 0
+        self.bloom_hits = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get the response cached for a key
+
+        Args:
+            key: Request key
+            default: Value returned for keys the Bloom filter has seen but the
+                cache no longer holds
+
+        Returns:
+            Cached response, `default` for a Bloom filter hit, or None for a new
+            or expired key
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, response = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+                # Expired keys were never added to the Bloom filter
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            if self.bloom_filter is not None and key in self.bloom_filter:
+                self.hits += 1
+                self.bloom_hits += 1
+                print(f"Dropping request {key} recognized only by the Bloom filter "
+                      f"({self.bloom_hits} so far; may be a false positive)")
+                return default
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: Any, ttl: Optional[float] = None) -> None:
+        """
+        Cache the response returned for a key
+
+        Args:
+            key: Request key
+            response: Response to return for duplicates
+            ttl: Number of seconds this response stays cached (defaults to the cache's TTL)
+        """
+        now = self._clock()
+        evicted = []
+        with self._lock:
+            self._entries[key] = (now + (self.ttl if ttl is None else ttl), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted_key, (expires_at, _) = self._entries.popitem(last=False)
+                if expires_at > now:
+                    evicted.append(evicted_key)
+            save = (self.bloom_filter is not None and now - self._saved_at >= self.save_interval)
+            if save:
+                self._saved_at = now
+
+        if self.bloom_filter is not None:
+            for evicted_key in evicted:
+                self.bloom_filter.add(evicted_key)
+            if save and self.bloom_filter.dirty:
+                self.bloom_filter.save()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        """
+        Persist the Bloom filter
+        """
+        if self.bloom_filter is not None:
+            self.bloom_filter.save()
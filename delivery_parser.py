@@ -0,0 +1,147 @@
+import math
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Availability tiers, ordered from worst to best
+AVAILABILITY_UNKNOWN = 0
+AVAILABILITY_LIMITED = 1
+AVAILABILITY_IN_STOCK = 2
+
+# Delivery days used when a delivery time can't be parsed
+DEFAULT_DELIVERY_DAYS = 7
+
+# Largest bare range ("3-5") read as days; wider or descending ranges are
+# dates or other numbers ("2025-06-01"), not delivery windows
+MAX_BARE_RANGE_DAYS = 60
+
+# Number of distinct strings remembered by each parser; offer catalogs only
+# use a handful of delivery and availability phrasings
+PARSE_CACHE_SIZE = 4096
+
+# Delivery time grammar: same day, next day, or an amount (or range) of
+# hours, days or weeks, optionally counted in business days
+_DELIVERY_RE = re.compile(
+    r"""
+    (?P<same>\bsame[\s-]?day\b)
+    | (?P<next>\bnext[\s-]?day\b|\bovernight\b|\btomorrow\b)
+    | (?P<low>\d+(?:\.\d+)?)\s*
+      (?:(?:-|–|to)\s*(?P<high>\d+(?:\.\d+)?)\s*)?
+      (?P<business>(?:business|working)\s+)?
+      (?P<unit>hours?|hrs?|days?|weeks?|wks?)?\b
+    """,
+    re.IGNORECASE | re.VERBOSE
+)
+
+# Stock phrases, most specific first so "not in stock" isn't read as in
+# stock; pre-orders and back-orders can't ship yet, so they count as out.
+# A bare "limited" ("Limited", "Limited edition") counts as limited stock
+# only when no other stock phrase is found, as it always has
+_AVAILABILITY_RE = re.compile(
+    r"(?P<out>\bout of stock\b|\bsold out\b|\bnot (?:currently )?(?:in stock|available)\b|\bunavailable\b"
+    r"|\bno longer available\b|\bpre-?orders?(?:ed)?\b|\bback-?orders?(?:ed)?\b)"
+    r"|(?P<limited>\blimited (?:stock|quantit(?:y|ies)|supply|availability)\b|\blow stock\b|\brunning low\b"
+    r"|\b\d+ (?:pairs?|units?) left\b|\bonly \d+ left\b)"
+    r"|(?P<in_stock>\bin[\s-]stock\b|\bavailable (?:now|today|to ship)\b|\bready to ship\b)"
+    r"|(?P<limited_word>\blimited\b)",
+    re.IGNORECASE
+)
+
+_AVAILABILITY_TIERS = {
+    'out': AVAILABILITY_UNKNOWN,
+    'limited': AVAILABILITY_LIMITED,
+    'in_stock': AVAILABILITY_IN_STOCK
+}
+
+_UNIT_DAYS = {'h': 1 / 24, 'd': 1, 'w': 7}
+
+
+def _days(amount: str, unit: str) -> int:
+    """
+    Convert an amount of a time unit to whole days, rounding partial days up
+    """
+    return math.ceil(float(amount) * _UNIT_DAYS[unit[0].lower()])
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_delivery_window(delivery_time: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse a delivery time string into a window of days
+
+    Examples: "3-5 business days" -> (3, 5), "1 week" -> (7, 7),
+    "2 to 3 weeks" -> (14, 21), "Next day delivery" -> (1, 1),
+    "Same day" -> (0, 0), "Within 48 hours" -> (2, 2).
+
+    Args:
+        delivery_time: Delivery time string
+
+    Returns:
+        Tuple of (earliest, latest) delivery days, or None if the string
+        doesn't describe a delivery time
+    """
+    for match in _DELIVERY_RE.finditer(delivery_time):
+        if match.group('same'):
+            return 0, 0
+        if match.group('next'):
+            return 1, 1
+        if match.group('low') is None:
+            continue
+
+        unit = match.group('unit')
+        high = match.group('high')
+        if unit is None:
+            # A short ascending range ("3-5") is read as days; a bare number,
+            # or a range like the start of "2025-06-01", is not a delivery time
+            if high is None or not float(match.group('low')) <= float(high) <= MAX_BARE_RANGE_DAYS:
+                continue
+            unit = 'days'
+        low_days = _days(match.group('low'), unit)
+        high_days = _days(high, unit) if high is not None else low_days
+        return min(low_days, high_days), max(low_days, high_days)
+    return None
+
+
+def parse_delivery_days(delivery_time: Optional[str], default: int = DEFAULT_DELIVERY_DAYS) -> int:
+    """
+    Estimate the delivery days of a delivery time string
+
+    Args:
+        delivery_time: Delivery time string
+        default: Days returned if the string can't be parsed
+
+    Returns:
+        Earliest delivery day of the window (e.g. 3 for "3-5 business days")
+    """
+    if not delivery_time:
+        return default
+    window = parse_delivery_window(delivery_time)
+    return window[0] if window is not None else default
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_availability_tier(availability: str) -> int:
+    """
+    Cached part of parse_availability_tier
+    """
+    # Mixed phrases ("in stock, only 2 left") get the worst tier they mention
+    groups = [match.lastgroup for match in _AVAILABILITY_RE.finditer(availability)]
+    tiers = [_AVAILABILITY_TIERS[group] for group in groups if group != 'limited_word']
+    if not tiers and 'limited_word' in groups:
+        return AVAILABILITY_LIMITED
+    return min(tiers, default=AVAILABILITY_UNKNOWN)
+
+
+def parse_availability_tier(availability: Optional[str]) -> int:
+    """
+    Classify an availability string
+
+    Args:
+        availability: Availability string (e.g. "In Stock", "Limited Stock (3 pairs left)")
+
+    Returns:
+        Worst availability tier mentioned; out-of-stock, pre-order and
+        unrecognized strings are AVAILABILITY_UNKNOWN
+    """
+    if not availability:
+        return AVAILABILITY_UNKNOWN
+    return _parse_availability_tier(availability)
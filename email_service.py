@@ -1,68 +1,106 @@
 import os
-from typing import Dict, List, Any
+import string
+from html import escape
+from typing import Dict, List, Any, Tuple
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, Email, To, Content, HtmlContent
 import json
 
-class EmailService:
+
+class HtmlTemplate:
     """
-    Service for sending emails with deal recommendations to users
+    HTML template compiled once into static chunks and placeholders
+    
+    Placeholders use str.format syntax (e.g. `{price:.2f}`); every rendered
+    value is HTML-escaped.
     """
     
-    def __init__(self, api_key: str = None):
+    __slots__ = ('_parts',)
+    
+    def __init__(self, source: str):
         """
-        Initialize the EmailService with a SendGrid API key
+        Compile a template
         
         Args:
-            api_key: SendGrid API key (defaults to environment variable)
+            source: Template source with str.format placeholders
         """
-        self.api_key = api_key or os.environ.get('SENDGRID_API_KEY', 'your_sendgrid_api_key_here')
+        parts: List[Tuple[str, str, str]] = []
+        for literal, field, spec, _ in string.Formatter().parse(source):
+            if literal:
+                if parts and parts[-1][1] is None:
+                    parts[-1] = (parts[-1][0] + literal, None, None)
+                else:
+                    parts.append((literal, None, None))
+            if field is not None:
+                parts.append((None, field, spec))
+        self._parts = tuple(parts)
     
-    def format_offers_html(self, offers: List[Dict[str, Any]]) -> str:
+    def render_into(self, out: List[str], values: Dict[str, Any]) -> None:
         """
-        Format offers as HTML for email content
+        Append the rendered template to a list of HTML chunks
         
         Args:
-            offers: List of top offers
+            out: List the chunks are appended to
+            values: Placeholder values
+        """
+        for literal, field, spec in self._parts:
+            if field is None:
+                out.append(literal)
+            else:
+                out.append(escape(format(values[field], spec)))
+    
+    def render(self, values: Dict[str, Any]) -> str:
+        """
+        Render the template
+        
+        Args:
+            values: Placeholder values
             
         Returns:
-            HTML-formatted offers
+            Rendered HTML
         """
-        html = """
-        <h2>Top 3 Deals for Air Jordan 1 High OG 'Chicago Reimagined'</h2>
+        out: List[str] = []
+        self.render_into(out, values)
+        return ''.join(out)
+
+
+_CELL_STYLE = "padding: 12px; text-align: left; border: 1px solid #ddd;"
+
+# Gold, silver and bronze highlighting for the first three ranks
+_RANK_STYLES = (
+    "background-color: #ffd700; font-weight: bold;",
+    "background-color: #c0c0c0; font-weight: bold;",
+    "background-color: #cd7f32; font-weight: bold;",
+)
+
+# Product shown when the offers don't name one
+DEFAULT_PRODUCT_NAME = "Air Jordan 1 High OG 'Chicago Reimagined'"
+
+_EMAIL_TITLE_TEMPLATE = HtmlTemplate("""
+        <h2>Top {count} Deals for {product_name}</h2>""")
+
+_EMAIL_HEADER_HTML = """
         <p>Based on our research, here are the best deals available:</p>
         <table style="width: 100%; border-collapse: collapse; margin-top: 20px;">
             <tr style="background-color: #f2f2f2;">
-                <th style="padding: 12px; text-align: left; border: 1px solid #ddd;">Rank</th>
-                <th style="padding: 12px; text-align: left; border: 1px solid #ddd;">Seller</th>
-                <th style="padding: 12px; text-align: left; border: 1px solid #ddd;">Price</th>
-                <th style="padding: 12px; text-align: left; border: 1px solid #ddd;">Delivery</th>
-                <th style="padding: 12px; text-align: left; border: 1px solid #ddd;">Availability</th>
-                <th style="padding: 12px; text-align: left; border: 1px solid #ddd;">Special Offer</th>
-            </tr>
-        """
-        
-        for i, offer in enumerate(offers):
-            rank_style = ""
-            if i == 0:
-                rank_style = "background-color: #ffd700; font-weight: bold;"  # Gold for 1st place
-            elif i == 1:
-                rank_style = "background-color: #c0c0c0; font-weight: bold;"  # Silver for 2nd place
-            elif i == 2:
-                rank_style = "background-color: #cd7f32; font-weight: bold;"  # Bronze for 3rd place
-                
-            html += f"""
+""" + "".join(
+    f'                <th style="{_CELL_STYLE}">{title}</th>\n'
+    for title in ("Rank", "Seller", "Price", "Delivery", "Availability", "Special Offer")
+) + """            </tr>
+"""
+
+_OFFER_ROW_TEMPLATE = HtmlTemplate(f"""
             <tr>
-                <td style="padding: 12px; text-align: left; border: 1px solid #ddd; {rank_style}">{i+1}</td>
-                <td style="padding: 12px; text-align: left; border: 1px solid #ddd;">{offer['name']}</td>
-                <td style="padding: 12px; text-align: left; border: 1px solid #ddd;">${offer['price']:.2f}</td>
-                <td style="padding: 12px; text-align: left; border: 1px solid #ddd;">{offer['delivery_time']}</td>
-                <td style="padding: 12px; text-align: left; border: 1px solid #ddd;">{offer['availability']}</td>
-                <td style="padding: 12px; text-align: left; border: 1px solid #ddd;">{offer['special_offers']}</td>
+                <td style="{_CELL_STYLE} {{rank_style}}">{{rank}}</td>
+                <td style="{_CELL_STYLE}">{{name}}</td>
+                <td style="{_CELL_STYLE}">${{price:.2f}}</td>
+                <td style="{_CELL_STYLE}">{{delivery_time}}</td>
+                <td style="{_CELL_STYLE}">{{availability}}</td>
+                <td style="{_CELL_STYLE}">{{special_offers}}</td>
             </tr>
-            """
-        
-        html += """
+""")
+
+_EMAIL_MIDDLE_HTML = """
         </table>
         <div style="margin-top: 30px;">
             <h3>Why We Selected These Deals</h3>
@@ -76,32 +114,107 @@ class EmailService:
         </div>
         <div style="margin-top: 30px;">
             <h3>Contact Information</h3>
-        """
-        
-        for i, offer in enumerate(offers):
-            html += f"""
-            <p><strong>{i+1}. {offer['name']}</strong><br>
-            Phone: {offer['contact']['phone']}<br>
-            Email: <a href="mailto:{offer['contact']['email']}">{offer['contact']['email']}</a></p>
-            """
-        
-        html += """
+"""
+
+_CONTACT_TEMPLATE = HtmlTemplate("""
+            <p><strong>{rank}. {name}</strong><br>
+            Phone: {phone}<br>
+            Email: <a href="mailto:{email}">{email}</a></p>
+""")
+
+_EMAIL_FOOTER_HTML = """
         </div>
         <div style="margin-top: 30px; padding: 15px; background-color: #f9f9f9; border-radius: 5px;">
             <p>This information was gathered by our AI voice agent on May 25, 2025. Prices and availability may change.</p>
             <p>To purchase, contact the seller directly using the information provided above.</p>
         </div>
+"""
+
+class EmailService:
+    """
+    Service for sending emails with deal recommendations to users
+    """
+    
+    def __init__(self, api_key: str = None):
+        """
+        Initialize the EmailService with a SendGrid API key
+        
+        Args:
+            api_key: SendGrid API key (defaults to environment variable)
         """
+        self.api_key = api_key or os.environ.get('SENDGRID_API_KEY', 'your_sendgrid_api_key_here')
+    
+    @staticmethod
+    def product_name(offers: List[Dict[str, Any]]) -> str:
+        """
+        Get the name of the product the offers are for
+        
+        Args:
+            offers: List of offers
+            
+        Returns:
+            Product name of the first offer, or the default product name
+        """
+        for offer in offers:
+            product = offer.get('product') or {}
+            if product.get('name'):
+                return product['name']
+        return DEFAULT_PRODUCT_NAME
+    
+    def format_offers_html(self, offers: List[Dict[str, Any]], product_name: str = None) -> str:
+        """
+        Format offers as HTML for email content
+        
+        The static parts of the email are compiled once at import time; only
+        the reseller fields are rendered (and HTML-escaped) per call, and the
+        pieces are joined once at the end.
+        
+        Args:
+            offers: List of top offers
+            product_name: Product the offers are for (defaults to the offers' product)
+            
+        Returns:
+            HTML-formatted offers
+        """
+        parts = []
+        _EMAIL_TITLE_TEMPLATE.render_into(parts, {
+            'count': len(offers),
+            'product_name': product_name or self.product_name(offers),
+        })
+        parts.append(_EMAIL_HEADER_HTML)
+        for i, offer in enumerate(offers):
+            _OFFER_ROW_TEMPLATE.render_into(parts, {
+                'rank': i + 1,
+                'rank_style': _RANK_STYLES[i] if i < len(_RANK_STYLES) else '',
+                'name': offer['name'],
+                'price': offer['price'],
+                'delivery_time': offer['delivery_time'],
+                'availability': offer['availability'],
+                'special_offers': offer['special_offers'],
+            })
+        
+        parts.append(_EMAIL_MIDDLE_HTML)
+        for i, offer in enumerate(offers):
+            contact = offer['contact']
+            _CONTACT_TEMPLATE.render_into(parts, {
+                'rank': i + 1,
+                'name': offer['name'],
+                'phone': contact['phone'],
+                'email': contact['email'],
+            })
         
-        return html
+        parts.append(_EMAIL_FOOTER_HTML)
+        return ''.join(parts)
     
-    def send_top_offers_email(self, to_email: str, offers: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def send_top_offers_email(self, to_email: str, offers: List[Dict[str, Any]],
+                              product_name: str = None) -> Dict[str, Any]:
         """
         Send an email with the top offers to the user
         
         Args:
             to_email: Recipient email address
             offers: List of top offers
+            product_name: Product the offers are for (defaults to the offers' product)
             
         Returns:
             Response from the SendGrid API
@@ -111,8 +224,9 @@ class EmailService:
         
         from_email = Email("deals@dealfinder.ai", "DealFinder AI")
         to_email = To(to_email)
-        subject = "Your Top 3 Deals for Air Jordan 1 Chicago Sneakers"
-        html_content = HtmlContent(self.format_offers_html(offers))
+        product_name = product_name or self.product_name(offers)
+        subject = f"Your Top {len(offers)} Deals for {product_name}"
+        html_content = HtmlContent(self.format_offers_html(offers, product_name))
         
         # Create a mock email object
         email = {
@@ -0,0 +1,311 @@
+import heapq
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.utils.conversation_handler import ConversationHandler
+from src.utils.data_processor import DataProcessor
+from src.utils.transcript_extractor import TranscriptExtractor
+from src.services.email_service import EmailService
+from src.services.log_writer import AppendOnlyLogWriter
+
+# Pipeline stages, in the order each conversation goes through them
+STAGES = ('conversation', 'extraction', 'ranking', 'logging', 'email')
+
+# Reported latency percentiles
+PERCENTILES = (50, 90, 99)
+
+_NAME_PREFIXES = ('Sneaker', 'Sole', 'Kicks', 'Urban', 'Premium', 'Hype', 'Street', 'Court', 'Retro', 'Drop')
+_NAME_SUFFIXES = ('Hub', 'Society', 'Master', 'Footwear', 'Sneaks', 'Vault', 'Lab', 'Depot', 'Exchange', 'Closet')
+_PERSONALITIES = (
+    'Professional and courteous',
+    'Enthusiastic and eager to sell',
+    'Knowledgeable sneakerhead',
+    'Casual and friendly',
+    'Premium and exclusive',
+    'Blunt and busy'
+)
+_DELIVERY_TIMES = (
+    'Next day delivery', 'Same day delivery', '1-2 business days', '2-3 business days',
+    '3-5 business days', '5-7 business days', '2 business days', '1 week', '1-2 weeks'
+)
+_SPECIAL_OFFERS = (
+    'Free shipping on orders over $300',
+    '10% discount for returning customers',
+    '5% off when you pay by bank transfer',
+    'Free limited edition shoelaces',
+    'Buy now, pay later option available',
+    'Includes exclusive sneaker care kit',
+    'No special offers at the moment'
+)
+
+
+def generate_resellers(count: int, seed: int = 0, start_id: int = 1,
+                       product: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Generate a reproducible catalog of synthetic resellers
+
+    Every reseller is drawn from its own generator seeded with the workload
+    seed and its ID, so a reseller is the same however the catalog is split.
+
+    Args:
+        count: Number of resellers
+        seed: Random seed; the same seed always gives the same reseller for an ID
+        start_id: ID of the first reseller
+        product: Product offered (defaults to the Air Jordan 1 used by the demo data)
+
+    Returns:
+        List of reseller dictionaries in the resellers.json format
+    """
+    product = product or {
+        'sku': 'DZ5485-612',
+        'name': "Air Jordan 1 High OG 'Chicago Reimagined'",
+        'size': 'US 10',
+        'condition': 'New',
+        'authenticity': 'Verified Authentic'
+    }
+    sizes = ('US 8', 'US 9', 'US 9.5', 'US 10', 'US 10.5', 'US 11', 'US 12')
+
+    resellers = []
+    for reseller_id in range(start_id, start_id + count):
+        rng = random.Random(f"{seed}:{reseller_id}")
+        name = f"{rng.choice(_NAME_PREFIXES)}{rng.choice(_NAME_SUFFIXES)} {reseller_id}"
+        stock = rng.random()
+        if stock < 0.6:
+            availability = 'In Stock'
+        elif stock < 0.9:
+            availability = f"Limited Stock ({rng.randint(1, 5)} pairs left)"
+        else:
+            availability = 'Out of Stock'
+        resellers.append({
+            'id': reseller_id,
+            'name': name,
+            'contact': {
+                'phone': f"+1-555-{reseller_id // 10000 % 1000:03d}-{reseller_id % 10000:04d}",
+                'email': f"sales{reseller_id}@example.com"
+            },
+            'product': dict(product, size=rng.choice(sizes)),
+            'price': round(rng.gauss(370, 35), 2),
+            'availability': availability,
+            'delivery_time': rng.choice(_DELIVERY_TIMES),
+            'special_offers': rng.choice(_SPECIAL_OFFERS),
+            'personality': rng.choice(_PERSONALITIES)
+        })
+    return resellers
+
+
+def _run_chunk(start_id: int, count: int, seed: int, output_dir: str, top_count: int) -> Dict[str, Any]:
+    """
+    Run a chunk of synthetic conversations through the pipeline in a worker process
+
+    Args:
+        start_id: ID of the chunk's first reseller
+        count: Number of conversations
+        seed: Workload seed
+        output_dir: Directory of the worker's call log
+        top_count: Number of top offers kept and emailed
+
+    Returns:
+        Dictionary with the per-stage latencies (in seconds) and the chunk's top offers
+    """
+    resellers = generate_resellers(count, seed, start_id)
+    data_path = os.path.join(output_dir, f"resellers_{start_id}.json")
+    with open(data_path, 'w') as f:
+        json.dump(resellers, f)
+
+    # Offers are updated and ranked the way the API does it
+    data_processor = DataProcessor(data_path)
+    extractor = TranscriptExtractor()
+    email_service = EmailService()
+    log_writer = AppendOnlyLogWriter(
+        os.path.join(output_dir, f"call_logs_{start_id}.csv"),
+        flush_interval=0
+    )
+    latencies = {stage: np.empty(count, dtype=np.float64) for stage in STAGES}
+    clock = time.perf_counter
+
+    for i, reseller in enumerate(resellers):
+        started = clock()
+        # Seeded per reseller, so results don't depend on the chunk size
+        handler = ConversationHandler(reseller, seed=f"{seed}:{reseller['id']}:conversation")
+        conversation_log, _ = handler.simulate_full_conversation()
+        conversation_done = clock()
+
+        offer = extractor.extract(conversation_log)
+        extraction_done = clock()
+
+        extractor.update_offer(data_processor, offer)
+        top_offers = data_processor.get_top_offers(top_count)
+        ranking_done = clock()
+
+        log_writer.append(conversation_log)
+        logging_done = clock()
+
+        email_service.format_offers_html(top_offers)
+        email_done = clock()
+
+        latencies['conversation'][i] = conversation_done - started
+        latencies['extraction'][i] = extraction_done - conversation_done
+        latencies['ranking'][i] = ranking_done - extraction_done
+        latencies['logging'][i] = logging_done - ranking_done
+        latencies['email'][i] = email_done - logging_done
+
+    # Writing the buffered rows is part of the logging cost
+    flush_started = clock()
+    log_writer.close()
+    latencies['logging'][-1] += clock() - flush_started
+
+    return {
+        'count': count,
+        'latencies': latencies,
+        'top_offers': [offer.to_dict() for offer in data_processor.get_top_offers(top_count)]
+    }
+
+
+def summarize_latencies(samples: np.ndarray) -> Dict[str, float]:
+    """
+    Summarize latency samples
+
+    Args:
+        samples: Latencies in seconds
+
+    Returns:
+        Dictionary with the mean, percentiles and maximum in milliseconds
+    """
+    if not len(samples):
+        return {}
+    summary = {'mean_ms': float(samples.mean() * 1000)}
+    for percentile, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES)):
+        summary[f"p{percentile}_ms"] = float(value * 1000)
+    summary['max_ms'] = float(samples.max() * 1000)
+    return summary
+
+
+class LoadSimulator:
+    """
+    Drives a synthetic drop-day workload through the voice agent pipeline
+
+    A seeded generator creates N resellers with varied personalities,
+    prices, stock levels and delivery windows. Chunks of them are run
+    through conversation -> extraction -> ranking -> logging -> email in a
+    process pool, and the run reports the overall throughput and the
+    latency percentiles of every stage. Email is rendered but not sent.
+    """
+
+    def __init__(self, conversations: int = 10000, workers: int = None, chunk_size: int = 1000,
+                 seed: int = 42, output_dir: str = None, top_count: int = 3):
+        """
+        Initialize the LoadSimulator
+
+        Args:
+            conversations: Number of synthetic conversations
+            workers: Number of worker processes (defaults to the CPU count)
+            chunk_size: Number of conversations per task sent to a worker
+            seed: Workload seed
+            output_dir: Directory for the call logs written during the run
+                (defaults to a temporary directory that is removed afterwards)
+            top_count: Number of top offers kept and emailed
+        """
+        if conversations < 1 or chunk_size < 1:
+            raise ValueError("conversations and chunk_size must be positive")
+        self.conversations = conversations
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.output_dir = output_dir
+        self.top_count = top_count
+
+    def run(self, progress: Callable[[int, int], None] = None) -> Dict[str, Any]:
+        """
+        Run the workload
+
+        Args:
+            progress: Optional callback receiving (completed, total) conversations
+
+        Returns:
+            Report with the throughput, per-stage latency summaries and the
+            overall top offers
+        """
+        output_dir = self.output_dir or tempfile.mkdtemp(prefix='dealfinder-load-')
+        os.makedirs(output_dir, exist_ok=True)
+
+        chunks = [
+            (start_id, min(self.chunk_size, self.conversations - start_id + 1))
+            for start_id in range(1, self.conversations + 1, self.chunk_size)
+        ]
+        latencies = {stage: [] for stage in STAGES}
+        top_offers = []
+        completed = 0
+
+        started = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [
+                    executor.submit(_run_chunk, start_id, count, self.seed, output_dir, self.top_count)
+                    for start_id, count in chunks
+                ]
+                for future in as_completed(futures):
+                    result = future.result()
+                    for stage in STAGES:
+                        latencies[stage].append(result['latencies'][stage])
+                    top_offers.extend(result['top_offers'])
+                    completed += result['count']
+                    if progress is not None:
+                        progress(completed, self.conversations)
+            wall_time = time.perf_counter() - started
+        finally:
+            if self.output_dir is None:
+                shutil.rmtree(output_dir, ignore_errors=True)
+
+        stage_samples = {stage: np.concatenate(samples) for stage, samples in latencies.items()}
+        total = sum(stage_samples.values())
+        return {
+            'conversations': self.conversations,
+            'workers': self.workers,
+            'seed': self.seed,
+            'wall_time': wall_time,
+            'throughput': self.conversations / wall_time if wall_time else 0.0,
+            'stages': {stage: summarize_latencies(samples) for stage, samples in stage_samples.items()},
+            'end_to_end': summarize_latencies(total),
+            # Ties go to the lowest reseller ID, as they do within a chunk
+            'top_offers': heapq.nlargest(self.top_count, top_offers,
+                                         key=lambda offer: (offer['score'], -offer['id']))
+        }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """
+    Format a load test report as a text table
+
+    Args:
+        report: Report returned by LoadSimulator.run
+
+    Returns:
+        Report text
+    """
+    lines = [
+        f"Conversations: {report['conversations']} on {report['workers']} workers (seed {report['seed']})",
+        f"Wall time:     {report['wall_time']:.2f}s",
+        f"Throughput:    {report['throughput']:.0f} conversations/s",
+        "",
+        f"{'stage':<14}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}   (ms)"
+    ]
+    rows = list(report['stages'].items()) + [('end-to-end', report['end_to_end'])]
+    for stage, summary in rows:
+        lines.append(
+            f"{stage:<14}{summary['mean_ms']:>10.3f}{summary['p50_ms']:>10.3f}"
+            f"{summary['p90_ms']:>10.3f}{summary['p99_ms']:>10.3f}{summary['max_ms']:>10.3f}"
+        )
+    if report['top_offers']:
+        lines.append("")
+        lines.append("Top offers:")
+        for i, offer in enumerate(report['top_offers']):
+            lines.append(f"{i + 1}. {offer['name']} - ${offer['price']:.2f} - {offer['delivery_time']}")
+    return "\n".join(lines)
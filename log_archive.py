@@ -0,0 +1,408 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Schemas of the archived tables; incoming fields the schema doesn't name are
+# kept as a JSON object in the `extra` column. Files written before a column
+# was added read it back as nulls.
+CALL_LOG_SCHEMA = pa.schema([
+    ('timestamp', pa.string()),
+    ('speaker', pa.string()),
+    ('message', pa.string()),
+    ('reseller_id', pa.int64()),
+    ('reseller_name', pa.string()),
+    ('conversation_id', pa.string()),
+    ('extra', pa.string()),
+])
+
+EXTRACTED_INFO_SCHEMA = pa.schema([
+    ('reseller_id', pa.int64()),
+    ('reseller_name', pa.string()),
+    ('product_name', pa.string()),
+    ('price', pa.float64()),
+    ('delivery_time', pa.string()),
+    ('availability', pa.string()),
+    ('special_offers', pa.string()),
+    ('conversation_id', pa.string()),
+    ('price_confidence', pa.float64()),
+    ('availability_confidence', pa.float64()),
+    ('delivery_time_confidence', pa.float64()),
+    ('special_offers_confidence', pa.float64()),
+    ('confidence', pa.float64()),
+    ('extra', pa.string()),
+])
+
+_EXTRA_FIELD = 'extra'
+
+TABLE_SCHEMAS = {
+    'call_logs': CALL_LOG_SCHEMA,
+    'extracted_info': EXTRACTED_INFO_SCHEMA,
+}
+
+# Schema of the hive-style partition directories (date=YYYY-MM-DD/campaign=name)
+PARTITION_SCHEMA = pa.schema([('date', pa.string()), ('campaign', pa.string())])
+
+DEFAULT_CAMPAIGN = 'default'
+
+# In-progress files start with '_' so dataset scans skip them until they are finalized
+_IN_PROGRESS_PREFIX = '_inprogress-'
+
+# Seconds after which an open partition file is finalized, so readers see
+# recent rows without waiting for a full file or a shutdown
+MAX_FILE_AGE = 300
+
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def _partition_value(value: str) -> str:
+    """
+    Encode a partition value for use as a directory name
+
+    Values are percent-encoded (as hive partitioning decodes them), so a
+    campaign name can't contain path separators or escape the archive.
+
+    Args:
+        value: Raw partition value
+
+    Returns:
+        Encoded value
+    """
+    return quote(value, safe='')
+
+
+def _extra(row: Dict[str, Any], schema: pa.Schema) -> Optional[str]:
+    """
+    Serialize the fields of a row that its table's schema doesn't name
+
+    Args:
+        row: Row dictionary
+        schema: Arrow schema of the table
+
+    Returns:
+        JSON object of the extra fields, or None if there are none
+    """
+    extra = {key: value for key, value in row.items() if schema.get_field_index(key) < 0}
+    return json.dumps(extra, default=str, sort_keys=True) if extra else None
+
+
+def _coerce(value: Any, field_type: pa.DataType) -> Any:
+    """
+    Convert a raw value to the Python type expected by an Arrow field
+
+    Args:
+        value: Raw value from a log row
+        field_type: Arrow type of the field
+
+    Returns:
+        Converted value, or None if it can't be converted
+    """
+    if value is None or value == '':
+        return None
+    try:
+        if pa.types.is_integer(field_type):
+            return int(value)
+        if pa.types.is_floating(field_type):
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+class _PartitionWriter:
+    """
+    Open Parquet file of one partition plus the rows waiting for the next row group
+    """
+
+    __slots__ = ('directory', 'name', 'writer', 'buffer', 'rows_written', 'opened_at')
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.name = f"part-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        self.writer = None
+        self.buffer: List[Dict[str, Any]] = []
+        self.rows_written = 0
+        self.opened_at = time.monotonic()
+
+    @property
+    def in_progress_path(self) -> str:
+        return os.path.join(self.directory, _IN_PROGRESS_PREFIX + self.name)
+
+    @property
+    def final_path(self) -> str:
+        return os.path.join(self.directory, self.name)
+
+
+class ParquetLogArchive:
+    """
+    Columnar Parquet archive of call logs and extracted information
+
+    Rows are partitioned by date and campaign
+    (`<root>/<table>/date=YYYY-MM-DD/campaign=<name>/part-*.parquet`) and
+    appended to an open Parquet file per partition, one row group per batch
+    of `row_group_size` rows. Files are finalized when they reach
+    `max_rows_per_file` rows or are `max_file_age` seconds old, or when the
+    archive is flushed with `finalize=True` or closed; only finalized files
+    are visible to readers. Analytics can then scan just the partitions and
+    columns they need. In-progress files left by a crash are finalized at
+    startup if they are readable and removed otherwise.
+    """
+
+    def __init__(self, root_dir: str, row_group_size: int = 10000,
+                 max_rows_per_file: int = 1000000, compression: str = 'zstd',
+                 max_file_age: float = MAX_FILE_AGE):
+        """
+        Initialize the ParquetLogArchive
+
+        Args:
+            root_dir: Root directory of the archive
+            row_group_size: Number of buffered rows written as one row group
+            max_rows_per_file: Number of rows after which a partition starts a new file
+            compression: Parquet compression codec
+            max_file_age: Number of seconds after which a partition's file is
+                finalized on the next append or flush (0 to only roll over by size)
+        """
+        self.root_dir = root_dir
+        self.row_group_size = row_group_size
+        self.max_rows_per_file = max_rows_per_file
+        self.compression = compression
+        self.max_file_age = max_file_age
+        self._partitions: Dict[Tuple[str, str, str], _PartitionWriter] = {}
+        self._lock = threading.Lock()
+        self._recover_in_progress()
+
+    def _recover_in_progress(self) -> None:
+        """
+        Finalize or remove the in-progress files left by a previous run
+
+        A file is only readable if its writer was closed (the Parquet footer
+        is written last); files cut off by a crash can't be read and are removed.
+        """
+        if not os.path.isdir(self.root_dir):
+            return
+        for directory, _, files in os.walk(self.root_dir):
+            for name in files:
+                if not name.startswith(_IN_PROGRESS_PREFIX):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    pq.ParquetFile(path).close()
+                except Exception as e:
+                    print(f"Removing unreadable in-progress archive file {path}: {str(e)}")
+                    os.remove(path)
+                    continue
+                os.replace(path, os.path.join(directory, name[len(_IN_PROGRESS_PREFIX):]))
+
+    @staticmethod
+    def _schema(table: str) -> pa.Schema:
+        """
+        Get the schema of an archived table
+
+        Args:
+            table: Table name
+
+        Returns:
+            Arrow schema of the table
+        """
+        try:
+            return TABLE_SCHEMAS[table]
+        except KeyError:
+            raise ValueError(f"Unknown archive table: {table}")
+
+    def append(self, table: str, rows: Iterable[Dict[str, Any]],
+               campaign: Optional[str] = None, date: Optional[str] = None) -> None:
+        """
+        Append rows to a table partition
+
+        Args:
+            table: Table name ('call_logs' or 'extracted_info')
+            rows: Row dictionaries
+            campaign: Campaign the rows belong to
+            date: Partition date as YYYY-MM-DD (defaults to today, UTC)
+        """
+        schema = self._schema(table)
+        rows = list(rows)
+        if not rows:
+            return
+
+        date = date or datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        if not _DATE_RE.match(date):
+            raise ValueError(f"Invalid archive partition date: {date}")
+        campaign = str(campaign or DEFAULT_CAMPAIGN)
+        key = (table, date, campaign)
+
+        with self._lock:
+            partition = self._partitions.get(key)
+            if partition is None:
+                directory = os.path.join(self.root_dir, table, f"date={date}",
+                                         f"campaign={_partition_value(campaign)}")
+                partition = self._partitions[key] = _PartitionWriter(directory)
+
+            partition.buffer.extend(rows)
+            if len(partition.buffer) >= self.row_group_size:
+                self._write_row_group(key, partition, schema)
+            self._roll_over_expired()
+
+    def _write_row_group(self, key: Tuple[str, str, str], partition: _PartitionWriter, schema: pa.Schema) -> None:
+        """
+        Write a partition's buffered rows as a new row group; the caller holds the lock
+
+        Args:
+            key: (table, date, campaign) key of the partition
+            partition: Partition writer
+            schema: Arrow schema of the table
+        """
+        if not partition.buffer:
+            return
+
+        columns = {
+            field.name: [_coerce(row.get(field.name), field.type) for row in partition.buffer]
+            for field in schema if field.name != _EXTRA_FIELD
+        }
+        if schema.get_field_index(_EXTRA_FIELD) >= 0:
+            columns[_EXTRA_FIELD] = [_extra(row, schema) for row in partition.buffer]
+        batch = pa.Table.from_pydict(columns, schema=schema)
+        partition.buffer = []
+
+        if partition.writer is None:
+            os.makedirs(partition.directory, exist_ok=True)
+            partition.writer = pq.ParquetWriter(partition.in_progress_path, schema, compression=self.compression)
+        partition.writer.write_table(batch, row_group_size=self.row_group_size)
+        partition.rows_written += batch.num_rows
+
+        if partition.rows_written >= self.max_rows_per_file:
+            self._finalize(key, partition)
+
+    def _finalize(self, key: Tuple[str, str, str], partition: _PartitionWriter) -> None:
+        """
+        Close a partition's file and make it visible to readers; the caller holds the lock
+
+        Args:
+            key: (table, date, campaign) key of the partition
+            partition: Partition writer
+        """
+        if partition.writer is not None:
+            partition.writer.close()
+            os.replace(partition.in_progress_path, partition.final_path)
+        del self._partitions[key]
+
+    def _roll_over_expired(self) -> None:
+        """
+        Finalize the files older than the maximum file age; the caller holds the lock
+        """
+        if not self.max_file_age:
+            return
+        now = time.monotonic()
+        for key, partition in list(self._partitions.items()):
+            if now - partition.opened_at >= self.max_file_age:
+                self._write_row_group(key, partition, self._schema(key[0]))
+                if key in self._partitions:
+                    self._finalize(key, partition)
+
+    def flush(self, finalize: bool = False) -> None:
+        """
+        Write all buffered rows as row groups
+
+        Args:
+            finalize: Also close the open files so readers can see them
+                (files older than the maximum file age are always finalized)
+        """
+        with self._lock:
+            for key, partition in list(self._partitions.items()):
+                self._write_row_group(key, partition, self._schema(key[0]))
+                if finalize and key in self._partitions:
+                    self._finalize(key, partition)
+            self._roll_over_expired()
+
+    def close(self) -> None:
+        """
+        Write all buffered rows and finalize every open file
+        """
+        self.flush(finalize=True)
+
+    def dataset(self, table: str) -> ds.Dataset:
+        """
+        Open a table of the archive as a partitioned Arrow dataset
+
+        Args:
+            table: Table name
+
+        Returns:
+            Dataset with `date` and `campaign` partition columns
+        """
+        schema = self._schema(table)
+        path = os.path.join(self.root_dir, table)
+        partitioning = ds.partitioning(PARTITION_SCHEMA, flavor='hive')
+        if not os.path.isdir(path):
+            return ds.dataset([], schema=pa.unify_schemas([schema, PARTITION_SCHEMA]), format='parquet')
+        return ds.dataset(path, format='parquet', partitioning=partitioning,
+                          schema=pa.unify_schemas([schema, PARTITION_SCHEMA]))
+
+    def _filter(self, start_date: Optional[str], end_date: Optional[str],
+                campaign: Optional[str]) -> Optional[ds.Expression]:
+        """
+        Build a partition filter expression
+
+        Args:
+            start_date: First date to include (YYYY-MM-DD)
+            end_date: Last date to include (YYYY-MM-DD)
+            campaign: Campaign to include
+
+        Returns:
+            Filter expression or None
+        """
+        expression = None
+        conditions = []
+        if start_date:
+            conditions.append(ds.field('date') >= start_date)
+        if end_date:
+            conditions.append(ds.field('date') <= end_date)
+        if campaign:
+            conditions.append(ds.field('campaign') == campaign)
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def read(self, table: str, columns: Optional[List[str]] = None,
+             start_date: Optional[str] = None, end_date: Optional[str] = None,
+             campaign: Optional[str] = None) -> pa.Table:
+        """
+        Read archived rows, touching only the requested columns and partitions
+
+        Args:
+            table: Table name
+            columns: Columns to read (defaults to all)
+            start_date: First date to include (YYYY-MM-DD)
+            end_date: Last date to include (YYYY-MM-DD)
+            campaign: Campaign to include
+
+        Returns:
+            Arrow table of matching rows (use .to_pandas() for a DataFrame)
+        """
+        return self.dataset(table).to_table(columns=columns, filter=self._filter(start_date, end_date, campaign))
+
+    def scan_batches(self, table: str, columns: Optional[List[str]] = None,
+                     start_date: Optional[str] = None, end_date: Optional[str] = None,
+                     campaign: Optional[str] = None) -> Iterator[pa.RecordBatch]:
+        """
+        Stream archived rows batch by batch, for scans larger than memory
+
+        Args:
+            table: Table name
+            columns: Columns to read (defaults to all)
+            start_date: First date to include (YYYY-MM-DD)
+            end_date: Last date to include (YYYY-MM-DD)
+            campaign: Campaign to include
+
+        Returns:
+            Iterator of Arrow record batches
+        """
+        return self.dataset(table).to_batches(columns=columns, filter=self._filter(start_date, end_date, campaign))
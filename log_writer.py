@@ -0,0 +1,330 @@
+import csv
+import html
+import io
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Closing tags of a rendered HTML view; rows appended later are written over them
+_HTML_FOOTER = '  </tbody>\n</table>'
+_HTML_FOOTER_SIZE = len(_HTML_FOOTER.encode('utf-8'))
+
+# Control characters shown escaped in HTML cells, so every row stays on its own lines
+_HTML_CELL_ESCAPES = str.maketrans({'\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _html_row(values: Iterable[str]) -> str:
+    """
+    Format one row of an HTML view
+
+    Args:
+        values: Cell values
+
+    Returns:
+        Table row markup
+    """
+    cells = ''.join(f"      <td>{html.escape(value, quote=False).translate(_HTML_CELL_ESCAPES)}</td>\n" for value in values)
+    return f"    <tr>\n{cells}    </tr>\n"
+
+
+class AppendOnlyLogWriter:
+    """
+    Buffered, append-only CSV log
+
+    Rows are buffered in memory and appended to the CSV file in batches,
+    either once `batch_size` rows are waiting or `flush_interval` seconds
+    after the oldest buffered row, so the cost of logging a conversation no
+    longer depends on how much history is already on disk. A lock makes it
+    safe to call from concurrent webhook handlers. Row counts and sample
+    rows are tracked incrementally; HTML views are rendered on demand and
+    only the rows appended since the last render are added to them.
+    """
+
+    def __init__(self, csv_path: str, batch_size: int = 500, flush_interval: float = 2.0,
+                 sample_size: int = 5):
+        """
+        Initialize the AppendOnlyLogWriter
+
+        Args:
+            csv_path: Path of the CSV log file
+            batch_size: Number of buffered rows that triggers a flush
+            flush_interval: Maximum number of seconds a row stays buffered (0 to only flush by size)
+            sample_size: Number of leading rows kept as a sample for summaries
+        """
+        self.csv_path = csv_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_size = sample_size
+
+        self._lock = threading.RLock()
+        self._buffer: List[Dict[str, Any]] = []
+        self._oldest_buffered = None
+        # (CSV size, HTML size) of each HTML view when it was last rendered
+        self._rendered: Dict[str, Tuple[int, int]] = {}
+        self._flusher = None
+        self._stop_event = threading.Event()
+
+        self._columns, self._row_count, self._samples = self._scan_existing_log()
+
+    def _scan_existing_log(self):
+        """
+        Read the header, row count and sample rows of an existing log file
+
+        Returns:
+            Tuple of (columns, row_count, sample_rows)
+        """
+        if not os.path.exists(self.csv_path) or os.path.getsize(self.csv_path) == 0:
+            return [], 0, []
+
+        with open(self.csv_path, 'r', newline='') as f:
+            reader = csv.DictReader(f)
+            columns = list(reader.fieldnames or [])
+            row_count = 0
+            samples = []
+            for row in reader:
+                if row_count < self.sample_size:
+                    samples.append(dict(row))
+                row_count += 1
+        return columns, row_count, samples
+
+    @property
+    def columns(self) -> List[str]:
+        """
+        Columns of the log
+        """
+        return list(self._columns)
+
+    @property
+    def row_count(self) -> int:
+        """
+        Number of rows in the log, including rows not flushed yet
+        """
+        with self._lock:
+            return self._row_count + len(self._buffer)
+
+    @property
+    def sample_rows(self) -> List[Dict[str, Any]]:
+        """
+        First rows of the log, used for summaries
+        """
+        with self._lock:
+            missing = self.sample_size - len(self._samples)
+            return self._samples + [dict(row) for row in self._buffer[:max(missing, 0)]]
+
+    def append(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Buffer rows for appending to the log
+
+        Args:
+            rows: Rows to append
+        """
+        rows = [row if isinstance(row, dict) else dict(row) for row in rows]
+        if not rows:
+            return
+
+        with self._lock:
+            if not self._buffer:
+                self._oldest_buffered = time.monotonic()
+            self._buffer.extend(rows)
+
+            if len(self._buffer) >= self.batch_size or self._buffer_expired():
+                self._flush_locked()
+            elif self.flush_interval:
+                self._ensure_flusher()
+
+    def _buffer_expired(self) -> bool:
+        """
+        Check whether the oldest buffered row has waited longer than the flush interval
+        """
+        return (bool(self.flush_interval) and self._oldest_buffered is not None
+                and time.monotonic() - self._oldest_buffered >= self.flush_interval)
+
+    def flush(self) -> int:
+        """
+        Append all buffered rows to the log file
+
+        Returns:
+            Number of rows written
+        """
+        with self._lock:
+            return self._flush_locked()
+
+    def _flush_locked(self) -> int:
+        """
+        Append all buffered rows to the log file; the caller holds the lock
+
+        Returns:
+            Number of rows written
+        """
+        if not self._buffer:
+            return 0
+
+        rows = self._buffer
+        self._buffer = []
+        self._oldest_buffered = None
+
+        # New columns are rare; when they appear the header has to be rewritten
+        new_columns = []
+        known = set(self._columns)
+        for row in rows:
+            for key in row:
+                if key not in known:
+                    known.add(key)
+                    new_columns.append(key)
+        if new_columns:
+            if self._row_count:
+                self._rewrite_header(self._columns + new_columns)
+            self._columns = self._columns + new_columns
+            # Rendered views lack the new columns
+            self._rendered.clear()
+
+        directory = os.path.dirname(self.csv_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_header = not os.path.exists(self.csv_path) or os.path.getsize(self.csv_path) == 0
+        with open(self.csv_path, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self._columns, restval='')
+            if write_header:
+                writer.writeheader()
+            writer.writerows(rows)
+
+        if len(self._samples) < self.sample_size:
+            self._samples.extend(rows[:self.sample_size - len(self._samples)])
+        self._row_count += len(rows)
+        return len(rows)
+
+    def _rewrite_header(self, columns: List[str]) -> None:
+        """
+        Rewrite the log file with an extended set of columns
+
+        Args:
+            columns: New list of columns
+        """
+        tmp_path = self.csv_path + '.tmp'
+        with open(self.csv_path, 'r', newline='') as src, open(tmp_path, 'w', newline='') as dst:
+            writer = csv.DictWriter(dst, fieldnames=columns, restval='')
+            writer.writeheader()
+            writer.writerows(csv.DictReader(src))
+        os.replace(tmp_path, self.csv_path)
+
+    def _ensure_flusher(self) -> None:
+        """
+        Start the background thread that flushes rows older than the flush interval
+        """
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._flusher = threading.Thread(target=self._run_flusher, name="log-writer-flusher", daemon=True)
+        self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        """
+        Periodically flush expired buffered rows until stopped
+        """
+        while not self._stop_event.wait(self.flush_interval):
+            with self._lock:
+                if self._buffer_expired():
+                    self._flush_locked()
+
+    def render_html(self, html_path: str, force: bool = False) -> str:
+        """
+        Render the log as an HTML table, only if it changed since the last render
+
+        Rows appended since the last render are added to the existing view;
+        the whole view is only rewritten the first time, after the columns
+        changed or when the file was modified by something else.
+
+        Args:
+            html_path: Path of the HTML file to write
+            force: Rewrite the whole view even if the log hasn't changed
+
+        Returns:
+            Path of the HTML file
+        """
+        with self._lock:
+            self._flush_locked()
+            csv_size = os.path.getsize(self.csv_path) if os.path.exists(self.csv_path) else 0
+            html_size = os.path.getsize(html_path) if os.path.exists(html_path) else None
+            rendered = self._rendered.get(html_path)
+
+            if not force and rendered is not None and rendered[1] == html_size:
+                if rendered[0] == csv_size:
+                    return html_path
+                html_size = self._append_html(html_path, rendered[0], html_size)
+            else:
+                html_size = self._write_html(html_path)
+            self._rendered[html_path] = (csv_size, html_size)
+        return html_path
+
+    def _iter_csv_rows(self, offset: int) -> Iterable[List[str]]:
+        """
+        Read the rows of the log file from a byte offset, padded to all columns
+
+        Args:
+            offset: Byte offset of the first row (0 to read the whole file)
+
+        Returns:
+            Iterator of row values in column order
+        """
+        if not os.path.exists(self.csv_path):
+            return
+        width = len(self._columns)
+        with open(self.csv_path, 'rb') as raw:
+            raw.seek(offset)
+            reader = csv.reader(io.TextIOWrapper(raw, newline=''))
+            if offset == 0:
+                next(reader, None)
+            for row in reader:
+                yield row + [''] * (width - len(row))
+
+    def _write_html(self, html_path: str) -> int:
+        """
+        Write the whole HTML view; the caller holds the lock
+
+        Args:
+            html_path: Path of the HTML file to write
+
+        Returns:
+            Size of the HTML file
+        """
+        tmp_path = html_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('<table border="1" class="dataframe">\n  <thead>\n    <tr style="text-align: right;">\n')
+            f.writelines(f"      <th>{html.escape(column, quote=False)}</th>\n" for column in self._columns)
+            f.write('    </tr>\n  </thead>\n  <tbody>\n')
+            f.writelines(_html_row(row) for row in self._iter_csv_rows(0))
+            f.write(_HTML_FOOTER)
+        os.replace(tmp_path, html_path)
+        return os.path.getsize(html_path)
+
+    def _append_html(self, html_path: str, csv_offset: int, html_size: int) -> int:
+        """
+        Add the rows appended to the log since a previous render to its HTML view
+
+        Args:
+            html_path: Path of the rendered HTML file
+            csv_offset: Size of the log file when the view was rendered
+            html_size: Size of the HTML file when it was rendered
+
+        Returns:
+            New size of the HTML file
+        """
+        with open(html_path, 'r+b') as f:
+            f.seek(html_size - _HTML_FOOTER_SIZE)
+            for row in self._iter_csv_rows(csv_offset):
+                f.write(_html_row(row).encode('utf-8'))
+            f.write(_HTML_FOOTER.encode('utf-8'))
+            f.truncate()
+            return f.tell()
+
+    def close(self) -> None:
+        """
+        Flush buffered rows and stop the background flusher
+        """
+        self._stop_event.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
@@ -0,0 +1,213 @@
+import asyncio
+import json
+from collections.abc import Mapping
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from src.utils.data_processor import DataProcessor
+
+# Idle subscribers get a comment line this often so proxies keep the connection open
+HEARTBEAT_INTERVAL = 15.0
+
+
+def _json_default(value: Any) -> Any:
+    """
+    Serialize values the json module doesn't handle (e.g. read-only product views)
+    """
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
+
+
+def _sse_message(event: str, event_id: int, data: Dict[str, Any]) -> bytes:
+    """
+    Encode one server-sent event
+
+    Args:
+        event: Event name
+        event_id: Event ID (the data version)
+        data: JSON-serializable event data
+
+    Returns:
+        Encoded event
+    """
+    payload = json.dumps(data, separators=(',', ':'), default=_json_default)
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode('utf-8')
+
+
+class TopOffersBroadcaster:
+    """
+    Pushes changes of the top offers to server-sent event subscribers
+
+    DataProcessor change notifications wake a single task that recomputes
+    the top K offers once in a worker thread (so ranking never blocks the
+    event loop), diffs them against the previous top K and, only
+    if something visible changed, encodes one `top-offers-diff` event that
+    is queued for every subscriber. New subscribers first receive a
+    `top-offers` snapshot. Subscribers that fall `max_queue` events behind
+    are disconnected so one slow client can't hold memory for everyone;
+    they get a fresh snapshot when they reconnect.
+    """
+
+    def __init__(self, data_processor: DataProcessor, count: int = 3, max_queue: int = 16):
+        """
+        Initialize the TopOffersBroadcaster
+
+        Args:
+            data_processor: Source of the offer rankings
+            count: Number of top offers tracked
+            max_queue: Maximum number of undelivered events per subscriber
+        """
+        self.data_processor = data_processor
+        self.count = count
+        self.max_queue = max_queue
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._offers: List[Dict[str, Any]] = []
+        self._version = 0
+        self._snapshot_message = b''
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _compute(self) -> Tuple[int, List[Dict[str, Any]], bytes]:
+        """
+        Compute the top offers and the snapshot event; runs in a worker thread
+
+        Returns:
+            Tuple of (data version, top offers, encoded snapshot event)
+        """
+        version = self.data_processor.data_version
+        offers = [dict(offer) for offer in self.data_processor.get_top_offers(self.count)]
+        message = _sse_message('top-offers', version, {
+            'version': version,
+            'top_offers': offers
+        })
+        return version, offers, message
+
+    async def _refresh(self) -> None:
+        """
+        Recompute the top offers off the event loop and publish them as the current snapshot
+        """
+        self._version, self._offers, self._snapshot_message = await asyncio.to_thread(self._compute)
+
+    def _on_data_changed(self, version: int) -> None:
+        """
+        DataProcessor listener; runs on the writer's thread and only wakes the broadcast task
+        """
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._changed.set)
+
+    async def start(self) -> None:
+        """
+        Start listening for ranking changes; must be called from the event loop
+        """
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        await self._refresh()
+        self.data_processor.add_change_listener(self._on_data_changed)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the broadcast task and disconnect every subscriber
+        """
+        self.data_processor.remove_change_listener(self._on_data_changed)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for queue in list(self._subscribers):
+            self._disconnect(queue)
+
+    async def _run(self) -> None:
+        """
+        Recompute and broadcast the top offers after each batch of changes
+        """
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+            previous = self._offers
+            await self._refresh()
+            diff = self._diff(previous, self._offers)
+            if diff is not None:
+                self._broadcast(_sse_message('top-offers-diff', self._version, diff))
+
+    def _diff(self, previous: List[Dict[str, Any]], current: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Describe how the top offers changed
+
+        Args:
+            previous: Previous top offers
+            current: Current top offers
+
+        Returns:
+            Diff with the new order, added, changed and removed offers, or
+            None if nothing changed
+        """
+        previous_by_id = {offer['id']: offer for offer in previous}
+        current_ids = {offer['id'] for offer in current}
+        added = [offer for offer in current if offer['id'] not in previous_by_id]
+        changed = [offer for offer in current
+                   if offer['id'] in previous_by_id and previous_by_id[offer['id']] != offer]
+        removed = [offer_id for offer_id in previous_by_id if offer_id not in current_ids]
+        order = [offer['id'] for offer in current]
+
+        if not added and not changed and not removed and order == [offer['id'] for offer in previous]:
+            return None
+        return {
+            'version': self._version,
+            'order': order,
+            'added': added,
+            'changed': changed,
+            'removed': removed
+        }
+
+    def _broadcast(self, message: bytes) -> None:
+        """
+        Queue an encoded event for every subscriber
+        """
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._disconnect(queue)
+
+    def _disconnect(self, queue: asyncio.Queue) -> None:
+        """
+        Drop a subscriber and wake its stream so it ends
+        """
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def subscribe(self) -> AsyncIterator[bytes]:
+        """
+        Stream encoded events: a snapshot first, then diffs as rankings change
+
+        Returns:
+            Async iterator of server-sent event chunks
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue + 1)
+        self._subscribers.add(queue)
+        try:
+            yield self._snapshot_message
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self._subscribers.discard(queue)
@@ -0,0 +1,446 @@
+import threading
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from src.utils.delivery_parser import (
+    AVAILABILITY_IN_STOCK, AVAILABILITY_LIMITED, AVAILABILITY_UNKNOWN, DEFAULT_DELIVERY_DAYS,
+    parse_availability_tier, parse_delivery_days
+)
+from src.utils.offer_table import offer_sku_and_size
+
+# Name of the policy matching DataProcessor.score_offer
+DEFAULT_POLICY = 'balanced'
+
+
+class ScoringPolicy:
+    """
+    Named weighted combination of the cached offer features
+
+    A policy never parses offers itself: it only combines the columns of a
+    feature frame (price, delivery days, availability tier and promotion
+    features), so many policies can rank the same catalog from one frame.
+    """
+
+    def __init__(self, name: str, price_weight: float = -1.0, delivery_weight: float = -10.0,
+                 availability_bonus: Sequence[float] = (0, 25, 50), discount_weight: float = 0.0,
+                 free_shipping_bonus: float = 0.0, base: float = 1100.0, description: str = ''):
+        """
+        Initialize the ScoringPolicy
+
+        Args:
+            name: Policy name
+            price_weight: Score per dollar of price
+            delivery_weight: Score per day of delivery
+            availability_bonus: Score bonus per availability tier (unknown, limited, in stock)
+            discount_weight: Score per dollar of advertised discount
+            free_shipping_bonus: Score bonus for offers with free shipping
+            base: Constant added to every score
+            description: Human-readable description
+        """
+        if len(availability_bonus) != 3:
+            raise ValueError("availability_bonus needs one bonus per availability tier")
+        self.name = name
+        self.price_weight = float(price_weight)
+        self.delivery_weight = float(delivery_weight)
+        self.availability_bonus = np.asarray(availability_bonus, dtype=np.float64)
+        self.discount_weight = float(discount_weight)
+        self.free_shipping_bonus = float(free_shipping_bonus)
+        self.base = float(base)
+        self.description = description
+
+    def score(self, frame: pd.DataFrame) -> np.ndarray:
+        """
+        Score every offer in a feature frame
+
+        Args:
+            frame: Feature frame built by OfferScoringEngine.build_frame
+
+        Returns:
+            Array of scores (higher is better)
+        """
+        scores = self.base + self.price_weight * frame['price'].to_numpy()
+        scores += self.delivery_weight * frame['delivery_days'].to_numpy(dtype=np.float64)
+        scores += self.availability_bonus[frame['availability_tier'].to_numpy()]
+        if self.discount_weight:
+            scores += self.discount_weight * frame['discount'].to_numpy()
+        if self.free_shipping_bonus:
+            scores += self.free_shipping_bonus * frame['free_shipping'].to_numpy(dtype=np.float64)
+        return scores
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Describe the policy
+
+        Returns:
+            Dictionary with the policy's name, description and weights
+        """
+        return {
+            'name': self.name,
+            'description': self.description,
+            'price_weight': self.price_weight,
+            'delivery_weight': self.delivery_weight,
+            'availability_bonus': self.availability_bonus.tolist(),
+            'discount_weight': self.discount_weight,
+            'free_shipping_bonus': self.free_shipping_bonus,
+            'base': self.base
+        }
+
+
+_POLICIES: Dict[str, ScoringPolicy] = {}
+
+
+def register_policy(policy: ScoringPolicy) -> ScoringPolicy:
+    """
+    Register a scoring policy under its name, replacing any policy of the same name
+
+    Args:
+        policy: Policy to register
+
+    Returns:
+        The registered policy
+    """
+    _POLICIES[policy.name] = policy
+    return policy
+
+
+def get_policy(policy: Any = None) -> ScoringPolicy:
+    """
+    Look up a scoring policy
+
+    Args:
+        policy: Policy name, ScoringPolicy, or None for the default policy
+
+    Returns:
+        Scoring policy
+    """
+    if isinstance(policy, ScoringPolicy):
+        return policy
+    name = policy or DEFAULT_POLICY
+    try:
+        return _POLICIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown scoring policy: {name}") from None
+
+
+def list_policies() -> List[ScoringPolicy]:
+    """
+    List the registered scoring policies
+
+    Returns:
+        Registered policies, sorted by name
+    """
+    return [_POLICIES[name] for name in sorted(_POLICIES)]
+
+
+register_policy(ScoringPolicy(
+    DEFAULT_POLICY,
+    description="Price first, then delivery time and availability"
+))
+register_policy(ScoringPolicy(
+    'cheapest', price_weight=-1.0, delivery_weight=-1.0, availability_bonus=(0, 5, 10),
+    discount_weight=1.0, free_shipping_bonus=10.0, base=1000.0,
+    description="Lowest price after advertised discounts"
+))
+register_policy(ScoringPolicy(
+    'fastest', price_weight=-0.1, delivery_weight=-100.0, availability_bonus=(0, 50, 100), base=1000.0,
+    description="Shortest delivery time"
+))
+register_policy(ScoringPolicy(
+    'in_stock', price_weight=-0.5, delivery_weight=-5.0, availability_bonus=(0, 200, 400), base=1000.0,
+    description="Offers that are in stock now"
+))
+register_policy(ScoringPolicy(
+    'best_value', discount_weight=1.0, free_shipping_bonus=20.0,
+    description="Balanced, with credit for discounts and free shipping"
+))
+
+
+class OfferScoringEngine:
+    """
+    Columnar scoring engine for large offer catalogs
+
+    Offers are converted once into typed columns (price, delivery days,
+    availability tier) and scored in a single vectorized pass. Delivery and
+    availability strings are parsed per distinct value rather than per
+    offer, since a catalog only contains a handful of them. Scores and
+    ordering match DataProcessor.score_offer and DataProcessor.rank_offers.
+    """
+
+    # Score bonus per availability tier
+    AVAILABILITY_BONUS = np.array([0, 25, 50], dtype=np.float64)
+
+    # Delivery days used when a delivery time can't be parsed
+    DEFAULT_DELIVERY_DAYS = DEFAULT_DELIVERY_DAYS
+
+    @classmethod
+    def _parse_delivery_days(cls, values: pd.Index) -> np.ndarray:
+        """
+        Convert distinct delivery time strings to estimated days
+
+        Args:
+            values: Distinct delivery time strings
+
+        Returns:
+            Array of estimated delivery days (lower end of any range)
+        """
+        return np.fromiter(
+            (parse_delivery_days(value, cls.DEFAULT_DELIVERY_DAYS) for value in values),
+            dtype=np.int16, count=len(values)
+        )
+
+    @staticmethod
+    def _parse_availability_tiers(values: pd.Index) -> np.ndarray:
+        """
+        Convert distinct availability strings to availability tiers
+
+        Args:
+            values: Distinct availability strings
+
+        Returns:
+            Array of availability tiers
+        """
+        return np.fromiter(map(parse_availability_tier, values), dtype=np.int8, count=len(values))
+
+    @staticmethod
+    def _parse_promotions(values: pd.Index) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Convert distinct special offer strings to promotion features
+
+        Args:
+            values: Distinct special offer strings
+
+        Returns:
+            Tuple of (discount percent, discount amount in dollars, free shipping flag) arrays
+        """
+        lowered = values.str.lower()
+        percent = pd.to_numeric(lowered.str.extract(r'(\d+(?:\.\d+)?)\s*%', expand=False), errors='coerce')
+        amount = pd.to_numeric(
+            lowered.str.extract(r'\$\s*(\d+(?:\.\d+)?)\s*(?:off|discount)', expand=False),
+            errors='coerce'
+        )
+        free_shipping = lowered.str.contains('free shipping', regex=False)
+        return (
+            np.nan_to_num(np.asarray(percent, dtype=np.float64)),
+            np.nan_to_num(np.asarray(amount, dtype=np.float64)),
+            np.asarray(free_shipping, dtype=bool)
+        )
+
+    def build_frame(self, offers: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Build a typed feature frame from offer dictionaries
+
+        Args:
+            offers: Offer dictionaries with price, delivery_time and availability
+
+        Returns:
+            DataFrame with price, delivery_days, availability_tier, discount
+            (advertised discount in dollars) and free_shipping columns,
+            indexed by each offer's position in the input
+        """
+        offers = offers if isinstance(offers, list) else list(offers)
+
+        # Factorize the string columns so each distinct value is parsed once
+        delivery_codes, delivery_values = pd.factorize(list(map(itemgetter('delivery_time'), offers)))
+        availability_codes, availability_values = pd.factorize(list(map(itemgetter('availability'), offers)))
+
+        delivery_days = self._parse_delivery_days(pd.Index(delivery_values, dtype=object))
+        availability_tiers = self._parse_availability_tiers(pd.Index(availability_values, dtype=object))
+        promotion_codes, promotion_values = pd.factorize([offer.get('special_offers') or '' for offer in offers])
+        percent, amount, free_shipping = self._parse_promotions(pd.Index(promotion_values, dtype=object))
+
+        prices = np.fromiter(map(itemgetter('price'), offers), dtype=np.float64, count=len(offers))
+        return pd.DataFrame({
+            'price': prices,
+            'delivery_days': delivery_days.take(delivery_codes),
+            'availability_tier': availability_tiers.take(availability_codes),
+            'discount': prices * percent.take(promotion_codes) / 100 + amount.take(promotion_codes),
+            'free_shipping': free_shipping.take(promotion_codes),
+        })
+
+    def score_frame(self, frame: pd.DataFrame, policy: Any = None) -> np.ndarray:
+        """
+        Score every offer in a feature frame in one vectorized pass
+
+        Args:
+            frame: Feature frame built by build_frame
+            policy: Scoring policy or policy name (defaults to the balanced policy)
+
+        Returns:
+            Array of scores (higher is better)
+        """
+        if policy is None:
+            price_score = 1000 - frame['price'].to_numpy()
+            delivery_score = 100 - frame['delivery_days'].to_numpy(dtype=np.float64) * 10
+            availability_score = self.AVAILABILITY_BONUS[frame['availability_tier'].to_numpy()]
+            return price_score + delivery_score + availability_score
+        return get_policy(policy).score(frame)
+
+    def rank(self, offers: Iterable[Dict[str, Any]], count: Optional[int] = None,
+             policy: Any = None) -> pd.DataFrame:
+        """
+        Score and rank offers
+
+        Args:
+            offers: Offer dictionaries to rank
+            count: Optional number of top offers to keep
+            policy: Scoring policy or policy name (defaults to the balanced policy)
+
+        Returns:
+            Feature frame with a score column, sorted best first; the index
+            holds each offer's position in the input
+        """
+        frame = self.build_frame(offers)
+        scores = self.score_frame(frame, policy)
+        frame['score'] = scores
+
+        # Stable sort so that ties keep their input order
+        order = np.argsort(-scores, kind='stable')
+        if count is not None:
+            order = order[:count]
+        return frame.iloc[order]
+
+    def rank_offers(self, offers: List[Dict[str, Any]], count: Optional[int] = None,
+                    policy: Any = None) -> List[Dict[str, Any]]:
+        """
+        Rank offer dictionaries using the vectorized scorer
+
+        Args:
+            offers: Offer dictionaries to rank
+            count: Optional number of top offers to return
+            policy: Scoring policy or policy name (defaults to the balanced policy)
+
+        Returns:
+            List of offer dictionaries, best first
+        """
+        ranked = self.rank(offers, count, policy)
+        return [offers[position] for position in ranked.index.to_numpy()]
+
+
+class OfferFeatureCache:
+    """
+    Feature frame of an offer catalog, built once per catalog snapshot
+
+    The frame (and each offer's SKU and size) is computed the first time a
+    catalog snapshot is ranked; every policy then only evaluates its
+    weighted sum over the cached columns, and each policy's scores are
+    cached too, so serving many preference profiles costs one parse of the
+    catalog. An offer updated in place only has its own row and scores
+    recomputed; the frame is rebuilt when the snapshot is replaced.
+    """
+
+    def __init__(self, engine: OfferScoringEngine = None):
+        """
+        Initialize the OfferFeatureCache
+
+        Args:
+            engine: Scoring engine used to build the feature frame
+        """
+        self.engine = engine or OfferScoringEngine()
+        self._entry = None
+        self._lock = threading.Lock()
+
+    def _features(self, catalog: Any, load: Callable[[], Tuple[List[Any], int]]) -> Dict[str, Any]:
+        """
+        Get the cached features of a catalog snapshot, building them if needed
+
+        Args:
+            catalog: Catalog snapshot the offers belong to (compared by identity)
+            load: Function returning (offers, number of leading main offers)
+
+        Returns:
+            Cache entry with the offers, frame, SKUs, sizes and per-policy scores
+        """
+        entry = self._entry
+        if entry is not None and entry['catalog'] is catalog:
+            return entry
+
+        with self._lock:
+            entry = self._entry
+            if entry is not None and entry['catalog'] is catalog:
+                return entry
+            offers, main_count = load()
+            products = [offer_sku_and_size(offer) for offer in offers]
+            entry = {
+                'catalog': catalog,
+                'offers': offers,
+                'positions': {id(offer): position for position, offer in enumerate(offers)},
+                'main_count': main_count,
+                'frame': self.engine.build_frame(offers),
+                'skus': np.array([sku for sku, _ in products], dtype=object),
+                'sizes': np.array([size for _, size in products], dtype=object),
+                'scores': {}
+            }
+            self._entry = entry
+            return entry
+
+    def update_offer(self, catalog: Any, offer: Any) -> None:
+        """
+        Recompute the features and scores of one offer changed in place
+
+        Args:
+            catalog: Catalog snapshot the offer belongs to
+            offer: Updated offer (its SKU and size must not have changed)
+        """
+        with self._lock:
+            entry = self._entry
+            if entry is None or entry['catalog'] is not catalog:
+                return
+            position = entry['positions'].get(id(offer))
+            if position is None:
+                # Not an offer of the cached catalog; rebuild on the next ranking
+                self._entry = None
+                return
+            row = self.engine.build_frame([offer])
+            frame = entry['frame']
+            for column in row.columns:
+                frame.iloc[position, frame.columns.get_loc(column)] = row[column].iat[0]
+            for policy, scores in entry['scores'].items():
+                scores[position] = policy.score(row)[0]
+
+    def top_offers(self, catalog: Any, load: Callable[[], Tuple[List[Any], int]], policy: Any = None,
+                   count: Optional[int] = None, sku: Optional[str] = None,
+                   size: Optional[str] = None) -> List[Any]:
+        """
+        Rank the cached offers with a policy
+
+        Args:
+            catalog: Current catalog snapshot
+            load: Function returning (offers, number of leading main offers)
+            policy: Scoring policy or policy name (defaults to the balanced policy)
+            count: Optional number of top offers to return
+            sku: Optional SKU to rank offers for
+            size: Optional size to rank offers for
+
+        Returns:
+            List of offers, best first; only the main offers are ranked
+            unless a SKU or size is given
+        """
+        policy = get_policy(policy)
+        entry = self._features(catalog, load)
+
+        scores = entry['scores'].get(policy)
+        if scores is None:
+            # Scored under the lock so that an offer update can't be missed
+            with self._lock:
+                scores = entry['scores'].get(policy)
+                if scores is None:
+                    scores = entry['scores'][policy] = policy.score(entry['frame'])
+
+        if sku is None and size is None:
+            candidates = np.arange(entry['main_count'])
+        else:
+            mask = np.ones(len(entry['offers']), dtype=bool)
+            if sku is not None:
+                mask &= entry['skus'] == sku
+            if size is not None:
+                mask &= entry['sizes'] == size
+            candidates = np.flatnonzero(mask)
+
+        # Stable sort so that ties keep catalog order
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        if count is not None:
+            order = order[:count]
+        offers = entry['offers']
+        return [offers[position] for position in order]
@@ -0,0 +1,210 @@
+import heapq
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from src.utils.ranking_index import RankingIndex
+from src.utils.reseller_records import ResellerRecord
+
+# An offer is identified by (reseller ID, SKU, size)
+OfferKey = Tuple[Hashable, str, str]
+
+# Reseller fields shared by all of a reseller's offers
+_RESELLER_FIELDS = ('id', 'name', 'contact', 'personality')
+
+# Offer fields a reseller's additional offers may override
+_OFFER_FIELDS = ('price', 'delivery_time', 'availability', 'special_offers')
+
+
+def offer_sku_and_size(offer: Any) -> Tuple[str, str]:
+    """
+    Get the SKU and size of an offer
+
+    Args:
+        offer: Reseller record or offer
+
+    Returns:
+        Tuple of (SKU, size); the product name stands in for a missing SKU
+    """
+    product = offer.get('product') or {}
+    sku = product.get('sku') or product.get('name') or ''
+    return str(sku), str(product.get('size') or '')
+
+
+def iter_reseller_offers(reseller: ResellerRecord,
+                         shared_products: Optional[Dict[tuple, Dict[str, Any]]] = None) -> Iterator[ResellerRecord]:
+    """
+    Expand a reseller into one record per offered product and size
+
+    The reseller record itself is the first offer; each entry of its
+    optional `offers` list adds another one that inherits the reseller's
+    name, contact and product details and overrides the fields it sets
+    (`sku`, `size`, `product`, `price`, `delivery_time`, `availability`,
+    `special_offers`).
+
+    Args:
+        reseller: Reseller record
+        shared_products: Optional cache used to share identical product dictionaries
+
+    Returns:
+        Iterator of offer records
+    """
+    yield reseller
+
+    for entry in reseller.get('offers') or ():
+        product = dict(reseller.get('product') or {})
+        product.update(entry.get('product') or {})
+        for key in ('sku', 'size'):
+            if key in entry:
+                product[key] = entry[key]
+
+        data = {key: reseller.get(key) for key in _RESELLER_FIELDS}
+        data['product'] = product
+        for key in _OFFER_FIELDS:
+            data[key] = entry.get(key, reseller.get(key))
+        offer = ResellerRecord.from_dict(data, shared_products)
+        offer.traits = getattr(reseller, 'traits', None)
+        yield offer
+
+
+class OfferTable:
+    """
+    Offers keyed by (reseller, SKU, size) with one ranking per (SKU, size)
+
+    Top-offer queries for a SKU and size read that product's own
+    RankingIndex instead of scanning every offer; queries over several
+    sizes (or SKUs) merge the top K of each matching ranking.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty OfferTable
+        """
+        self._offers: Dict[OfferKey, Any] = {}
+        self._rankings: Dict[Tuple[str, str], RankingIndex] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_resellers(cls, resellers: Iterable[ResellerRecord],
+                       scorer: Callable[[Any], float]) -> 'OfferTable':
+        """
+        Build the offer table of a reseller catalog
+
+        Args:
+            resellers: Reseller records (their own offer must already be scored)
+            scorer: Function scoring the additional offers
+
+        Returns:
+            OfferTable containing every offer
+        """
+        table = cls()
+        shared_products = {}
+        # A reseller listing the same SKU and size twice keeps its first
+        # offer, so an extra offer never replaces the reseller's own record
+        groups: Dict[Tuple[str, str], List[tuple]] = {}
+        for reseller in resellers:
+            for offer in iter_reseller_offers(reseller, shared_products):
+                sku, size = offer_sku_and_size(offer)
+                key = (offer['id'], sku, size)
+                if key in table._offers:
+                    continue
+                if offer is not reseller:
+                    offer['score'] = scorer(offer)
+                table._offers[key] = offer
+                groups.setdefault((sku, size), []).append((offer['id'], offer, offer['score']))
+
+        table._rankings = {
+            product: RankingIndex.from_items(items) for product, items in groups.items()
+        }
+        return table
+
+    def __len__(self) -> int:
+        return len(self._offers)
+
+    def get(self, key: OfferKey) -> Optional[Any]:
+        """
+        Get an offer
+
+        Args:
+            key: (reseller ID, SKU, size) of the offer
+
+        Returns:
+            Offer or None if there is no such offer
+        """
+        return self._offers.get(key)
+
+    def upsert(self, key: OfferKey, offer: Any, score: float) -> None:
+        """
+        Add an offer or update its score
+
+        Args:
+            key: (reseller ID, SKU, size) of the offer
+            offer: Offer record
+            score: Offer score (higher is better)
+        """
+        reseller_id, sku, size = key
+        with self._lock:
+            self._offers[key] = offer
+            ranking = self._rankings.get((sku, size))
+            if ranking is None:
+                ranking = self._rankings[(sku, size)] = RankingIndex()
+        ranking.upsert(reseller_id, offer, score)
+
+    def remove(self, key: OfferKey) -> None:
+        """
+        Remove an offer
+
+        Args:
+            key: (reseller ID, SKU, size) of the offer
+        """
+        reseller_id, sku, size = key
+        with self._lock:
+            self._offers.pop(key, None)
+            ranking = self._rankings.get((sku, size))
+        if ranking is not None:
+            ranking.remove(reseller_id)
+
+    def offers(self) -> List[Any]:
+        """
+        List every offer
+
+        Returns:
+            List of offer records
+        """
+        with self._lock:
+            return list(self._offers.values())
+
+    def products(self) -> Dict[str, List[str]]:
+        """
+        List the offered SKUs and their sizes
+
+        Returns:
+            Dictionary mapping each SKU to its sorted sizes
+        """
+        products: Dict[str, List[str]] = {}
+        for sku, size in list(self._rankings):
+            products.setdefault(sku, []).append(size)
+        return {sku: sorted(sizes) for sku, sizes in sorted(products.items())}
+
+    def top_k(self, k: int, sku: Optional[str] = None, size: Optional[str] = None) -> List[Any]:
+        """
+        Get the K best offers for a SKU and/or size
+
+        Args:
+            k: Number of offers to return
+            sku: SKU to rank (all SKUs if None)
+            size: Size to rank (all sizes if None)
+
+        Returns:
+            List of up to K offers, best first
+        """
+        if sku is not None and size is not None:
+            ranking = self._rankings.get((sku, size))
+            return ranking.top_k(k) if ranking is not None else []
+
+        rankings = [ranking for (ranking_sku, ranking_size), ranking in list(self._rankings.items())
+                    if (sku is None or ranking_sku == sku) and (size is None or ranking_size == size)]
+        if len(rankings) == 1:
+            return rankings[0].top_k(k)
+
+        candidates = [offer for ranking in rankings for offer in ranking.top_k(k)]
+        return heapq.nlargest(k, candidates, key=lambda offer: offer['score'])
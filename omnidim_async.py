@@ -0,0 +1,255 @@
+import asyncio
+import os
+from typing import Any, Dict, Iterable, List, Optional, Union
+import httpx
+
+from src.utils.rate_limiter import TokenBucket, backoff_delay
+
+OMNIDIM_API_BASE_URL = "https://backend.omnidim.io/api/v1"
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Methods that can be repeated without side effects. Other methods (POST
+# dispatches calls and creates campaigns) are only retried when the
+# request can't have reached the server: on 429 and connection failures
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+UNSENT_RETRYABLE_STATUS_CODES = {429}
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+class OmnidimAPIError(Exception):
+    """
+    Raised when the Omnidim API rejects a request
+    """
+
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        self.message = message
+        super().__init__(f"Omnidim API error ({status_code}): {message}")
+
+
+class AsyncOmnidimClient:
+    """
+    Asyncio client for the Omnidim call endpoints
+
+    Requests share one pooled HTTP client with a bounded number of
+    connections, so hundreds of coroutines can check call statuses at
+    once without opening hundreds of sockets: requests beyond the pool
+    size wait for a free connection. Each request has connect and read
+    timeouts, goes through a client-side token bucket, and is retried
+    with jittered exponential backoff on 429 and 5xx responses and on
+    network errors. Non-idempotent requests (POST) are only retried on 429
+    and connection failures, so a call is never dispatched twice. Responses have the same {"status", "json"} shape as
+    the omnidimension SDK. The base URL (or an httpx transport) can point
+    at a local stub server for testing.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = OMNIDIM_API_BASE_URL,
+                 max_connections: int = 20, max_keepalive_connections: int = 10,
+                 timeout: float = 10.0, connect_timeout: float = 5.0,
+                 max_retries: int = 4, requests_per_second: float = 10.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Initialize the AsyncOmnidimClient
+
+        Args:
+            api_key: Optional API key. If not provided, will attempt to get from environment variable
+            base_url: Base URL of the Omnidim API
+            max_connections: Maximum number of open connections
+            max_keepalive_connections: Maximum number of idle connections kept alive
+            timeout: Read/write timeout of each request, in seconds
+            connect_timeout: Connection timeout, in seconds
+            max_retries: Number of retries for rate-limit, server and network errors
+            requests_per_second: Client-side request budget
+            transport: Optional httpx transport, e.g. for tests
+        """
+        if api_key is None:
+            api_key = os.environ.get('OMNIDIM_API_KEY')
+
+        if not api_key:
+            raise ValueError("Omnidim API key is required. Set OMNIDIM_API_KEY environment variable or pass directly.")
+
+        self.max_retries = max_retries
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip('/') + '/',
+            headers={
+                'Authorization': f'Bearer {api_key}',
+                'Accept': 'application/json',
+            },
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_keepalive_connections),
+            # No pool timeout: requests queue for a connection instead of failing
+            timeout=httpx.Timeout(timeout, connect=connect_timeout, pool=None),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> 'AsyncOmnidimClient':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled connections
+        """
+        await self.client.aclose()
+
+    async def request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                      json_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Send a request, retrying rate-limit, server and network errors
+
+        Non-idempotent methods are only retried when the request can't
+        have been processed (429 responses and connection failures).
+
+        Args:
+            method: HTTP method
+            endpoint: API endpoint path (without base URL)
+            params: Optional URL parameters (None values are dropped)
+            json_data: Optional JSON body
+
+        Returns:
+            Response with status code and JSON data
+        """
+        if params:
+            params = {key: value for key, value in params.items() if value is not None}
+
+        if method.upper() in IDEMPOTENT_METHODS:
+            retryable_errors, retryable_status_codes = httpx.HTTPError, RETRYABLE_STATUS_CODES
+        else:
+            retryable_errors, retryable_status_codes = UNSENT_ERRORS, UNSENT_RETRYABLE_STATUS_CODES
+
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire_async()
+            try:
+                response = await self.client.request(method, endpoint.lstrip('/'),
+                                                     params=params, json=json_data)
+            except httpx.HTTPError as e:
+                if not isinstance(e, retryable_errors) or attempt >= self.max_retries:
+                    raise OmnidimAPIError(0, f"Network error: {str(e)}")
+            else:
+                if response.status_code < 400:
+                    return {
+                        "status": response.status_code,
+                        "json": response.json() if response.content else {}
+                    }
+                if response.status_code not in retryable_status_codes or attempt >= self.max_retries:
+                    raise OmnidimAPIError(response.status_code, response.text)
+                retry_after = response.headers.get('Retry-After')
+                if retry_after and retry_after.isdigit():
+                    await asyncio.sleep(int(retry_after))
+                    attempt += 1
+                    continue
+
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+
+    async def make_call(self, agent_id: Union[int, str], phone_number: str,
+                        metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Initiate a call using an agent
+
+        Args:
+            agent_id: ID of the agent to use for the call
+            phone_number: Target phone number to call, with country code
+            metadata: Optional call context passed to the agent
+
+        Returns:
+            Call details
+        """
+        call_data = {
+            "agent_id": int(agent_id),
+            "to_number": phone_number,
+            "call_context": metadata or {}
+        }
+        return await self.request("POST", "calls/dispatch", json_data=call_data)
+
+    async def get_call(self, call_id: Union[int, str]) -> Dict[str, Any]:
+        """
+        Get details for a specific call
+
+        Args:
+            call_id: ID of the call log
+
+        Returns:
+            Call details
+        """
+        return await self.request("GET", f"calls/logs/{call_id}")
+
+    async def list_calls(self, agent_id: Optional[Union[int, str]] = None,
+                         page: int = 1, page_size: int = 30) -> Dict[str, Any]:
+        """
+        List calls, optionally filtered by agent
+
+        Args:
+            agent_id: Optional agent ID to filter calls by
+            page: Page number
+            page_size: Number of calls per page
+
+        Returns:
+            Page of call logs
+        """
+        params = {"pageno": page, "pagesize": page_size, "agentid": agent_id}
+        return await self.request("GET", "calls/logs", params=params)
+
+    async def create_bulk_call_campaign(self, agent_id: Union[int, str], phone_numbers: List[str],
+                                        name: str, metadata: Optional[Dict[str, Any]] = None,
+                                        phone_number_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Create a bulk call campaign
+
+        Args:
+            agent_id: ID of the agent to use
+            phone_numbers: List of phone numbers to call
+            name: Campaign name
+            metadata: Optional extra data attached to every contact
+            phone_number_id: Optional ID of the imported number to call from
+
+        Returns:
+            Campaign details
+        """
+        contact_list = []
+        for phone_number in phone_numbers:
+            contact = {"phone_number": phone_number}
+            if metadata:
+                contact["extra_data"] = metadata
+            contact_list.append(contact)
+
+        campaign_data = {
+            "name": name,
+            "contact_list": contact_list,
+            "bot_id": int(agent_id)
+        }
+        if phone_number_id is not None:
+            campaign_data["phone_number_id"] = phone_number_id
+
+        return await self.request("POST", "calls/bulk_call/create", json_data=campaign_data)
+
+    async def get_calls(self, call_ids: Iterable[Union[int, str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the details of many calls concurrently
+
+        Args:
+            call_ids: IDs of the call logs
+
+        Returns:
+            Dictionary mapping each call ID to its details, or to an error entry
+            ({"error": message, "status": status code}) if it could not be fetched
+        """
+        call_ids = [str(call_id) for call_id in dict.fromkeys(call_ids)]
+        results = await asyncio.gather(*(self.get_call(call_id) for call_id in call_ids),
+                                       return_exceptions=True)
+
+        calls = {}
+        for call_id, result in zip(call_ids, results):
+            if isinstance(result, OmnidimAPIError):
+                calls[call_id] = {"error": result.message, "status": result.status_code}
+            elif isinstance(result, Exception):
+                raise result
+            else:
+                calls[call_id] = result
+        return calls
@@ -1,8 +1,17 @@
 import os
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional
 from omnidimension import Client
 
+# Keys under which the call logs endpoint returns the calls of a page
+_CALL_LIST_KEYS = ('call_log_data', 'call_logs', 'calls', 'data', 'results')
+
+# Keys under which the bulk call endpoint returns the campaigns of a page
+_BULK_CALL_LIST_KEYS = ('bulk_call_data', 'bulk_calls', 'campaigns', 'data', 'results')
+
+# Keys under which the paged endpoints report the total number of records
+_TOTAL_KEYS = ('total_records', 'total', 'total_count', 'count')
+
 class OmnidimService:
     """
     Service class for interacting with the Omnidim voice assistant API
@@ -123,23 +132,108 @@ class OmnidimService:
         Returns:
             Call details
         """
-        return self.client.call.get(call_id)
+        return self.client.call.get_call_log(call_id)
         
     def list_calls(self, agent_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         List all calls, optionally filtered by agent
         
+        Prefer iter_calls() for agents with many calls; this loads every page.
+        
         Args:
             agent_id: Optional agent ID to filter calls by
             
         Returns:
             List of call dictionaries
         """
-        params = {}
-        if agent_id:
-            params["agent_id"] = agent_id
+        return list(self.iter_calls(agent_id=agent_id))
+    
+    @staticmethod
+    def _response_body(response: Any) -> Any:
+        """
+        Unwrap the {"status", "json"} envelope returned by the SDK
+        
+        Args:
+            response: Raw SDK response
             
-        return self.client.call.list(**params)
+        Returns:
+            Response body
+        """
+        if isinstance(response, dict) and 'json' in response and 'status' in response:
+            return response['json']
+        return response
+    
+    @classmethod
+    def _page_calls(cls, response: Any, list_keys: tuple = _CALL_LIST_KEYS) -> List[Dict[str, Any]]:
+        """
+        Extract the calls from one page of the call logs endpoint
+        
+        Args:
+            response: Raw SDK response
+            list_keys: Keys that may hold the page's items
+            
+        Returns:
+            Calls of the page
+        """
+        body = cls._response_body(response)
+        if isinstance(body, list):
+            return body
+        if isinstance(body, dict):
+            for key in list_keys:
+                if isinstance(body.get(key), list):
+                    return body[key]
+        return []
+    
+    @classmethod
+    def _page_total(cls, response: Any) -> Optional[int]:
+        """
+        Extract the total number of records reported by a paged endpoint
+        
+        Args:
+            response: Raw SDK response
+            
+        Returns:
+            Total number of records, or None if the page doesn't report it
+        """
+        body = cls._response_body(response)
+        if isinstance(body, dict):
+            for key in _TOTAL_KEYS:
+                total = body.get(key)
+                if isinstance(total, int) and not isinstance(total, bool):
+                    return total
+        return None
+    
+    def iter_calls(self, agent_id: Optional[str] = None, page_size: int = 100,
+                   start_page: int = 1) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over calls page by page, newest first, without loading them all
+        
+        Pages are only fetched as the caller consumes the iterator, so callers
+        can stop early (e.g. once they reach calls they have already seen).
+        
+        Args:
+            agent_id: Optional agent ID to filter calls by
+            page_size: Number of calls fetched per request
+            start_page: First page to fetch
+            
+        Returns:
+            Iterator of call dictionaries
+        """
+        page = start_page
+        fetched = (start_page - 1) * page_size
+        while True:
+            response = self.client.call.get_call_logs(page=page, page_size=page_size, agent_id=agent_id)
+            calls = self._page_calls(response)
+            if not calls:
+                return
+            yield from calls
+            # The API may cap the page size below the one requested, so a short
+            # page is not the last one; stop at the reported total instead
+            fetched += len(calls)
+            total = self._page_total(response)
+            if total is not None and fetched >= total:
+                return
+            page += 1
         
     def configure_webhooks(self, agent_id: str, webhook_config: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -174,7 +268,8 @@ class OmnidimService:
         return response
     
     def create_bulk_call_campaign(self, agent_id: str, phone_numbers: List[str], 
-                                  name: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                                  name: str, metadata: Optional[Dict[str, Any]] = None,
+                                  phone_number_id: Optional[int] = None) -> Dict[str, Any]:
         """
         Create a bulk call campaign
         
@@ -182,18 +277,52 @@ class OmnidimService:
             agent_id: ID of the agent to use
             phone_numbers: List of phone numbers to call
             name: Campaign name
-            metadata: Optional metadata for the campaign
+            metadata: Optional extra data attached to every contact
+            phone_number_id: ID of the imported number to call from (defaults to
+                the OMNIDIM_PHONE_NUMBER_ID environment variable)
             
         Returns:
             Campaign details
         """
-        campaign_data = {
-            "agent_id": agent_id,
-            "name": name,
-            "phone_numbers": phone_numbers
-        }
+        if phone_number_id is None:
+            phone_number_id = os.environ.get('OMNIDIM_PHONE_NUMBER_ID')
+        if not phone_number_id:
+            raise ValueError("A phone number ID is required for bulk calls. Set OMNIDIM_PHONE_NUMBER_ID environment variable or pass directly.")
         
-        if metadata:
-            campaign_data["metadata"] = metadata
+        contact_list = []
+        for phone_number in phone_numbers:
+            contact = {"phone_number": phone_number}
+            if metadata:
+                contact["extra_data"] = metadata
+            contact_list.append(contact)
             
-        return self.client.bulk_call.create(**campaign_data)
+        return self.client.bulk_call.create_bulk_calls(
+            name=name,
+            contact_list=contact_list,
+            phone_number_id=phone_number_id,
+            bot_id=int(agent_id)
+        )
+    
+    def iter_bulk_call_campaigns(self, page_size: int = 50) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the bulk call campaigns page by page
+        
+        Args:
+            page_size: Number of campaigns fetched per request
+            
+        Returns:
+            Iterator of campaign dictionaries
+        """
+        page = 1
+        fetched = 0
+        while True:
+            response = self.client.bulk_call.fetch_bulk_calls(page=page, page_size=page_size)
+            campaigns = self._page_calls(response, _BULK_CALL_LIST_KEYS)
+            if not campaigns:
+                return
+            yield from campaigns
+            fetched += len(campaigns)
+            total = self._page_total(response)
+            if total is not None and fetched >= total:
+                return
+            page += 1
@@ -0,0 +1,178 @@
+import enum
+import re
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+
+
+class Personality(enum.Flag):
+    """
+    Reseller personality traits; a reseller can have several
+    """
+
+    NONE = 0
+    PROFESSIONAL = enum.auto()
+    ENTHUSIASTIC = enum.auto()
+    KNOWLEDGEABLE = enum.auto()
+    CASUAL = enum.auto()
+    PREMIUM = enum.auto()
+
+
+# Traits in priority order, used when a single trait has to be picked
+PERSONALITY_PRIORITY = (
+    Personality.PROFESSIONAL,
+    Personality.ENTHUSIASTIC,
+    Personality.KNOWLEDGEABLE,
+    Personality.CASUAL,
+    Personality.PREMIUM,
+)
+
+# Words that describe each trait
+PERSONALITY_KEYWORDS = {
+    Personality.PROFESSIONAL: ('professional', 'courteous', 'formal', 'polite', 'businesslike'),
+    Personality.ENTHUSIASTIC: ('enthusiastic', 'eager', 'excited', 'energetic', 'pushy'),
+    Personality.KNOWLEDGEABLE: ('knowledgeable', 'expert', 'sneakerhead', 'experienced', 'informed'),
+    Personality.CASUAL: ('casual', 'friendly', 'relaxed', 'laid-back', 'chill'),
+    Personality.PREMIUM: ('premium', 'exclusive', 'luxury', 'high-end', 'upscale'),
+}
+
+# Largest edit distance at which a misspelled word ("profesional") still
+# counts as a keyword; long words tolerate one more typo than short ones.
+# Keywords shorter than FUZZY_MIN_LENGTH only match exactly, and typos must
+# keep the first letter, as short everyday words are often one edit away
+# from a keyword ("normal" / "formal", "police" / "polite", "meager" / "eager")
+FUZZY_MAX_DISTANCE = 1
+FUZZY_MAX_DISTANCE_LONG = 2
+FUZZY_LONG_WORD = 9
+FUZZY_MIN_LENGTH = 7
+
+# Prefixes that negate a keyword ("unprofessional", "impolite", "informal")
+NEGATION_PREFIXES = ('non-', 'non', 'dis', 'un', 'in', 'im')
+
+# Words that negate the keyword following within NEGATION_WINDOW words ("not very friendly")
+NEGATION_WORDS = ('not', 'never', 'no', 'hardly', 'isn', 'wasn', 'aren', 'weren')
+NEGATION_WINDOW = 2
+
+_KEYWORD_TRAITS = {keyword: trait for trait, keywords in PERSONALITY_KEYWORDS.items() for keyword in keywords}
+_FUZZY_KEYWORD_TRAITS = tuple((keyword, trait) for keyword, trait in _KEYWORD_TRAITS.items()
+                              if len(keyword) >= FUZZY_MIN_LENGTH)
+_WORD_RE = re.compile(r"[a-z]+(?:-[a-z]+)*")
+
+
+def _within_distance(word: str, keyword: str, max_distance: int) -> bool:
+    """
+    Check whether two words are at most `max_distance` edits apart
+    """
+    if abs(len(word) - len(keyword)) > 1:
+        return False
+    previous = list(range(len(keyword) + 1))
+    for i, char in enumerate(word, 1):
+        current = [i]
+        for j, keyword_char in enumerate(keyword, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char != keyword_char)))
+        if min(current) > max_distance:
+            return False
+        previous = current
+    return previous[-1] <= max_distance
+
+
+def _keyword_trait(word: str) -> Personality:
+    """
+    Match one word against the trait keywords, exactly or (long keywords) with a small typo
+    """
+    trait = _KEYWORD_TRAITS.get(word)
+    if trait is not None:
+        return trait
+    if len(word) < FUZZY_MIN_LENGTH - 1:
+        return Personality.NONE
+    max_distance = FUZZY_MAX_DISTANCE_LONG if len(word) >= FUZZY_LONG_WORD else FUZZY_MAX_DISTANCE
+    for keyword, trait in _FUZZY_KEYWORD_TRAITS:
+        if keyword[0] == word[0] and _within_distance(word, keyword, max_distance):
+            return trait
+    return Personality.NONE
+
+
+@lru_cache(maxsize=1024)
+def _match_word(word: str) -> Personality:
+    """
+    Match one word against the trait keywords, treating negated keywords as no match
+    """
+    trait = _KEYWORD_TRAITS.get(word)
+    if trait is not None:
+        return trait
+    for prefix in NEGATION_PREFIXES:
+        if word.startswith(prefix) and len(word) - len(prefix) >= 4 and _keyword_trait(word[len(prefix):]):
+            return Personality.NONE
+    return _keyword_trait(word)
+
+
+@lru_cache(maxsize=4096)
+def _classify(description: str) -> Personality:
+    """
+    Cached part of classify_personality
+    """
+    traits = Personality.NONE
+    negated_until = -1
+    for position, word in enumerate(_WORD_RE.findall(description.lower())):
+        if word in NEGATION_WORDS:
+            negated_until = position + NEGATION_WINDOW
+            continue
+        trait = _match_word(word)
+        if trait and position <= negated_until:
+            negated_until = -1
+        elif trait:
+            traits |= trait
+    return traits
+
+
+def classify_personality(description: Optional[str]) -> Personality:
+    """
+    Classify a free-text personality description
+
+    Every word is matched against the trait keywords, tolerating small
+    misspellings, and all matching traits are combined, so "Professional
+    and friendly" is PROFESSIONAL | CASUAL. Negated keywords
+    ("unprofessional", "not friendly") don't count. Descriptions are
+    cached, so fleets sharing a few descriptions classify each one once.
+
+    Args:
+        description: Personality description (e.g. "Casual and friendly")
+
+    Returns:
+        Combined traits, Personality.NONE if no keyword matches
+    """
+    if not description:
+        return Personality.NONE
+    return _classify(description)
+
+
+def primary_personality(traits: Personality) -> Personality:
+    """
+    Pick the highest-priority trait
+
+    Args:
+        traits: Combined traits
+
+    Returns:
+        Highest-priority trait in `traits`, or Personality.NONE
+    """
+    for trait in PERSONALITY_PRIORITY:
+        if trait & traits:
+            return trait
+    return Personality.NONE
+
+
+def reseller_personality(reseller: Mapping[str, Any]) -> Personality:
+    """
+    Get a reseller's traits, classified at load time if available
+
+    Args:
+        reseller: Reseller record or dictionary
+
+    Returns:
+        Reseller traits
+    """
+    traits = getattr(reseller, 'traits', None)
+    if traits is None:
+        traits = classify_personality(reseller.get('personality'))
+    return traits
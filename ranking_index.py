@@ -0,0 +1,162 @@
+import heapq
+import itertools
+import threading
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# Entry layout inside the heap: [negated score, position, sequence, key, item, valid]
+# The sequence number is unique per pushed entry, so comparisons never reach
+# the key or item (which may not be comparable), even when a stale and a live
+# entry of the same key share a score and position
+_SCORE, _POSITION, _SEQUENCE, _KEY, _ITEM, _VALID = range(6)
+
+
+class RankingIndex:
+    """
+    Incrementally maintained ranking of offers keyed by score
+
+    Offers live in a max-heap with lazy invalidation: changing one offer's
+    score pushes a fresh entry in O(log n) and marks the old one stale, and
+    the top K offers are read by popping K entries and pushing them back,
+    so no full sort is needed after an update. Ties are broken by the order
+    in which offers were first added, which matches a stable sort of the
+    original reseller list.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty RankingIndex
+        """
+        self._heap: List[list] = []
+        self._entries: Dict[Hashable, list] = {}
+        self._next_position = 0
+        self._sequence = itertools.count()
+        self._stale = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[Hashable, Any, float]]) -> 'RankingIndex':
+        """
+        Build a RankingIndex from already scored offers in O(n)
+
+        Args:
+            items: (key, item, score) tuples in their original order
+
+        Returns:
+            RankingIndex containing all offers
+        """
+        index = cls()
+        for key, item, score in items:
+            old_entry = index._entries.get(key)
+            if old_entry is not None:
+                old_entry[_VALID] = False
+                index._stale += 1
+                position = old_entry[_POSITION]
+            else:
+                position = index._next_position
+                index._next_position += 1
+            entry = [-score, position, next(index._sequence), key, item, True]
+            index._entries[key] = entry
+            index._heap.append(entry)
+        heapq.heapify(index._heap)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def upsert(self, key: Hashable, item: Any, score: float) -> None:
+        """
+        Add an offer or update its score
+
+        Args:
+            key: Unique key of the offer (e.g. the reseller ID)
+            item: Offer returned by ranking queries
+            score: Offer score (higher is better)
+        """
+        with self._lock:
+            old_entry = self._entries.get(key)
+            if old_entry is not None:
+                old_entry[_VALID] = False
+                self._stale += 1
+                position = old_entry[_POSITION]
+            else:
+                position = self._next_position
+                self._next_position += 1
+
+            entry = [-score, position, next(self._sequence), key, item, True]
+            self._entries[key] = entry
+            heapq.heappush(self._heap, entry)
+            self._maybe_compact()
+
+    def remove(self, key: Hashable) -> None:
+        """
+        Remove an offer from the ranking
+
+        Args:
+            key: Unique key of the offer
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                entry[_VALID] = False
+                self._stale += 1
+                self._maybe_compact()
+
+    def score(self, key: Hashable) -> Optional[float]:
+        """
+        Get the current score of an offer
+
+        Args:
+            key: Unique key of the offer
+
+        Returns:
+            Score of the offer or None if it is not ranked
+        """
+        entry = self._entries.get(key)
+        return None if entry is None else -entry[_SCORE]
+
+    def top_k(self, k: int) -> List[Any]:
+        """
+        Get the K best offers without re-sorting the whole ranking
+
+        Args:
+            k: Number of offers to return
+
+        Returns:
+            List of up to K offers, best first
+        """
+        with self._lock:
+            best = []
+            while self._heap and len(best) < k:
+                entry = heapq.heappop(self._heap)
+                if entry[_VALID]:
+                    best.append(entry)
+                else:
+                    self._stale -= 1
+
+            for entry in best:
+                heapq.heappush(self._heap, entry)
+
+            return [entry[_ITEM] for entry in best]
+
+    def ranked(self) -> List[Any]:
+        """
+        Get every offer in ranking order
+
+        Returns:
+            List of all offers, best first
+        """
+        with self._lock:
+            entries = sorted(entry for entry in self._heap if entry[_VALID])
+        return [entry[_ITEM] for entry in entries]
+
+    def _maybe_compact(self) -> None:
+        """
+        Drop stale heap entries once they outnumber the live ones
+        """
+        if self._stale > 64 and self._stale > len(self._entries):
+            self._heap = [entry for entry in self._heap if entry[_VALID]]
+            heapq.heapify(self._heap)
+            self._stale = 0
@@ -0,0 +1,132 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    request takes one token and waits when the bucket is empty, so bursts
+    are allowed up to the capacity while the long-run rate stays within
+    budget.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the TokenBucket
+
+        Args:
+            rate: Number of tokens added per second
+            capacity: Maximum number of stored tokens (defaults to one second's worth, at least 1)
+            clock: Monotonic clock function, replaceable for testing
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, burst: Optional[float] = None) -> 'TokenBucket':
+        """
+        Create a bucket from a requests-per-minute budget
+
+        Args:
+            requests_per_minute: Number of requests allowed per minute
+            burst: Maximum burst size (defaults to one second's worth, at least 1)
+
+        Returns:
+            TokenBucket instance
+        """
+        return cls(requests_per_minute / 60.0, burst)
+
+    def _refill(self) -> None:
+        """
+        Add the tokens accumulated since the last update; the caller holds the lock
+        """
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        Take tokens from the bucket, going into debt if necessary
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            Number of seconds the caller must wait before proceeding
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """
+        Take tokens from the bucket only if they are available right now
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            True if the tokens were taken
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def acquire(self, tokens: float = 1) -> None:
+        """
+        Take tokens from the bucket, blocking until they are available
+
+        Args:
+            tokens: Number of tokens to take
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: float = 1) -> None:
+        """
+        Take tokens from the bucket, waiting without blocking the event loop
+
+        Args:
+            tokens: Number of tokens to take
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0,
+                  rng: Optional[random.Random] = None) -> float:
+    """
+    Compute a jittered exponential backoff delay ("full jitter")
+
+    Args:
+        attempt: Zero-based retry attempt number
+        base: Delay ceiling for the first retry, in seconds
+        cap: Maximum delay ceiling, in seconds
+        rng: Optional random generator, for reproducible delays
+
+    Returns:
+        Number of seconds to wait before the next attempt
+    """
+    ceiling = min(cap, base * (2 ** attempt))
+    return (rng or random).uniform(0, ceiling)
@@ -0,0 +1,325 @@
+import json
+import sys
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Fields stored directly in a slot and exposed under the same key
+_SLOT_KEYS = ('id', 'name', 'product', 'price', 'delivery_time', 'availability',
+              'special_offers', 'personality')
+_SLOT_KEY_SET = frozenset(_SLOT_KEYS)
+
+# Keys of a reseller dictionary that map onto slots without extra storage
+_PLAIN_KEY_SET = _SLOT_KEY_SET | {'contact'}
+_CONTACT_KEY_SET = frozenset(('phone', 'email'))
+
+# Size of each read when streaming a JSON catalog
+_READ_CHUNK_SIZE = 1 << 16
+
+
+def _intern(value: Any) -> Any:
+    """
+    Intern low-cardinality strings so equal values share one object
+    """
+    return sys.intern(value) if type(value) is str else value
+
+
+def _read_only(value: Any) -> Any:
+    """
+    Wrap a copy of a dictionary in a read-only view (other values are returned as-is)
+    """
+    return MappingProxyType(dict(value)) if isinstance(value, dict) else value
+
+
+class ResellerRecord(Mapping):
+    """
+    Compact, read-mostly representation of a reseller offer
+
+    Records behave like the reseller dictionaries found in resellers.json
+    (`record['price']`, `record['contact']['phone']`, ...) but keep their
+    fields in __slots__, intern repeated strings and share identical
+    product dictionaries between records, so a multi-million-row catalog
+    costs a fraction of the memory of nested dicts. Use to_dict() to get a
+    plain, independent dictionary.
+
+    The nested `product` and `contact` mappings are read-only views, since
+    a product may be shared by many records and the contact is rebuilt from
+    its fields on every access; replace them as a whole instead
+    (`record['contact'] = {...}`).
+    """
+
+    __slots__ = _SLOT_KEYS + ('phone', 'email', 'score', 'traits', '_extra')
+
+    def __init__(self, id: Any, name: str, price: float, delivery_time: str, availability: str,
+                 special_offers: Optional[str] = None, personality: Optional[str] = None,
+                 phone: Optional[str] = None, email: Optional[str] = None,
+                 product: Optional[Dict[str, Any]] = None):
+        """
+        Initialize a ResellerRecord
+
+        Args:
+            id: Reseller ID
+            name: Reseller name
+            price: Offer price
+            delivery_time: Delivery time description
+            availability: Availability description
+            special_offers: Special offer description
+            personality: Reseller personality description
+            phone: Contact phone number
+            email: Contact email address
+            product: Product details (may be shared between records; stored read-only)
+        """
+        self.id = id
+        self.name = name
+        self.price = price
+        self.delivery_time = delivery_time
+        self.availability = availability
+        self.special_offers = special_offers
+        self.personality = personality
+        self.phone = phone
+        self.email = email
+        self.product = _read_only(product)
+        self.score = None
+        # Classified personality (see src.utils.personality); not a dictionary key
+        self.traits = None
+        self._extra = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any],
+                  shared_products: Optional[Dict[tuple, Dict[str, Any]]] = None) -> 'ResellerRecord':
+        """
+        Create a record from a reseller dictionary
+
+        Args:
+            data: Reseller dictionary in the resellers.json format
+            shared_products: Optional cache used to share identical product
+                dictionaries between records
+
+        Returns:
+            ResellerRecord instance
+        """
+        contact = data.get('contact') or {}
+        product = data.get('product')
+        if product is not None and shared_products is not None:
+            try:
+                key = tuple(product.items())
+                shared = shared_products.get(key)
+                if shared is None:
+                    shared = shared_products[key] = _read_only(product)
+                product = shared
+            except TypeError:
+                # Unhashable product values can't be shared
+                pass
+
+        record = cls(
+            id=data['id'],
+            name=data['name'],
+            price=data['price'],
+            delivery_time=_intern(data['delivery_time']),
+            availability=_intern(data['availability']),
+            special_offers=_intern(data.get('special_offers')),
+            personality=_intern(data.get('personality')),
+            phone=contact.get('phone'),
+            email=contact.get('email'),
+            product=product
+        )
+
+        extra_keys = data.keys() - _PLAIN_KEY_SET
+        if extra_keys or not contact.keys() <= _CONTACT_KEY_SET:
+            for key in extra_keys:
+                record[key] = data[key]
+            if not contact.keys() <= _CONTACT_KEY_SET:
+                record['contact'] = contact
+
+        return record
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _SLOT_KEY_SET:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        if key == 'contact':
+            return MappingProxyType({'phone': self.phone, 'email': self.email})
+        if key == 'score' and self.score is not None:
+            return self.score
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == 'product':
+            value = _read_only(value)
+        if key in _SLOT_KEY_SET or key == 'score':
+            setattr(self, key, value)
+            if key == 'personality':
+                self.traits = None
+            return
+        if key == 'contact' and isinstance(value, Mapping):
+            self.phone = value.get('phone')
+            self.email = value.get('email')
+            if value.keys() <= _CONTACT_KEY_SET:
+                if self._extra is not None:
+                    self._extra.pop('contact', None)
+                return
+            value = _read_only(value)
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def __iter__(self) -> Iterator[str]:
+        yield 'id'
+        yield 'name'
+        if self._extra is None or 'contact' not in self._extra:
+            yield 'contact'
+        yield from _SLOT_KEYS[2:]
+        if self.score is not None:
+            yield 'score'
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"ResellerRecord(id={self.id!r}, name={self.name!r}, price={self.price!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the record to a plain reseller dictionary
+
+        Returns:
+            Independent dictionary in the resellers.json format
+        """
+        data = {}
+        for key in self:
+            value = self[key]
+            data[key] = dict(value) if isinstance(value, Mapping) else value
+        return data
+
+
+def iter_reseller_sources(data_path: str) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Lazily yield the raw JSON text of each reseller in a catalog file
+
+    JSON-Lines files (.jsonl / .ndjson) are read one line at a time and are
+    not decoded, so callers can skip parsing lines they have already seen.
+    Regular JSON files are streamed incrementally: only the `resellers`
+    array is decoded, one element at a time, so the whole document is never
+    held in memory.
+
+    Args:
+        data_path: Path to the reseller catalog
+
+    Returns:
+        Iterator of (raw_text, data) tuples; `data` is the decoded reseller
+        dictionary, or None if the element has not been decoded yet
+    """
+    if data_path.endswith(('.jsonl', '.ndjson')):
+        with open(data_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line, None
+        return
+
+    decoder = json.JSONDecoder()
+    with open(data_path, 'r') as f:
+        buffer = ''
+        pos = 0
+
+        def read_more() -> bool:
+            nonlocal buffer, pos
+            chunk = f.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                return False
+            # Drop the consumed prefix so the buffer stays bounded
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip(characters: str) -> bool:
+            """
+            Move past the given characters; returns False at the end of the file
+            """
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in characters:
+                    pos += 1
+                if pos < len(buffer) or not read_more():
+                    return pos < len(buffer)
+
+        def decode() -> Tuple[Any, str]:
+            """
+            Decode the JSON value at the current position and move past it;
+            returns the value and its raw text
+            """
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # The value is split across chunks
+                    if not read_more():
+                        raise
+                    continue
+                # A number at the end of the buffer may continue in the next chunk
+                if end == len(buffer) and read_more():
+                    continue
+                raw, pos = buffer[pos:end], end
+                return value, raw
+
+        # Find the start of the resellers array: a top-level array, or the
+        # value of the top-level "resellers" key (other values are skipped)
+        if not skip(' \t\r\n'):
+            raise ValueError(f"No resellers array found in {data_path}")
+        if buffer[pos] == '{':
+            pos += 1
+            while True:
+                if not skip(' \t\r\n,') or buffer[pos] == '}':
+                    raise ValueError(f"No resellers array found in {data_path}")
+                key, _ = decode()
+                if not skip(' \t\r\n:'):
+                    raise ValueError(f"No resellers array found in {data_path}")
+                if key == 'resellers':
+                    break
+                decode()
+        if buffer[pos] != '[':
+            raise ValueError(f"No resellers array found in {data_path}")
+        pos += 1
+
+        while True:
+            # Skip whitespace and separators between elements
+            if not skip(' \t\r\n,'):
+                raise ValueError(f"Unterminated resellers array in {data_path}")
+            if buffer[pos] == ']':
+                return
+
+            item, raw = decode()
+            yield raw, item
+
+
+def iter_reseller_data(data_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield reseller dictionaries from a catalog file
+
+    Args:
+        data_path: Path to the reseller catalog (.json, .jsonl or .ndjson)
+
+    Returns:
+        Iterator of reseller dictionaries
+    """
+    for raw, data in iter_reseller_sources(data_path):
+        yield data if data is not None else json.loads(raw)
+
+
+def iter_reseller_records(data_path: str) -> Iterator[ResellerRecord]:
+    """
+    Lazily yield compact reseller records from a catalog file
+
+    Args:
+        data_path: Path to the reseller catalog (.json, .jsonl or .ndjson)
+
+    Returns:
+        Iterator of ResellerRecord instances
+    """
+    shared_products = {}
+    for data in iter_reseller_data(data_path):
+        yield ResellerRecord.from_dict(data, shared_products)
@@ -0,0 +1,229 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Brotli quality for response bodies; the default (11) is several times
+# slower than gzip for a slightly smaller body
+BROTLI_QUALITY = 5
+
+# Maximum number of responses kept by a VersionedResponseCache
+MAX_CACHED_RESPONSES = 256
+
+
+def _json_default(value: Any) -> Any:
+    """
+    Serialize values the json module doesn't handle (e.g. reseller records)
+    """
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> set:
+    """
+    Parse an Accept-Encoding header
+
+    Args:
+        accept_encoding: Header value
+
+    Returns:
+        Set of content codings the client accepts
+    """
+    encodings = set()
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        params = params.replace(' ', '')
+        if coding and params not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            encodings.add(coding.lower())
+    return encodings
+
+
+class CachedResponse:
+    """
+    Pre-serialized JSON response body with its ETag and compressed variants
+
+    Each encoding gets its own strong ETag (the body hash, suffixed with
+    "-gzip" or "-br" for compressed variants), since their bytes differ;
+    a conditional request matches any variant of the current body.
+    """
+
+    __slots__ = ('body', 'etag', '_gzip', '_brotli', '_lock')
+
+    def __init__(self, payload: Any):
+        """
+        Serialize a payload
+
+        Args:
+            payload: JSON-serializable payload
+        """
+        self.body = json.dumps(payload, separators=(',', ':'), default=_json_default).encode('utf-8')
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=16).hexdigest() + '"'
+        self._gzip = None
+        self._brotli = None
+        self._lock = threading.Lock()
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        """
+        Get the ETag of one encoding of the body
+
+        Args:
+            encoding: Content encoding, or None for the uncompressed body
+
+        Returns:
+            Quoted ETag
+        """
+        return self.etag if encoding is None else self.etag[:-1] + '-' + encoding + '"'
+
+    def _matches(self, if_none_match: str) -> bool:
+        """
+        Check whether an If-None-Match header names any variant of the body
+        """
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag == '*':
+                return True
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag == self.etag or (tag.startswith(self.etag[:-1] + '-') and tag.endswith('"')):
+                return True
+        return False
+
+    @staticmethod
+    def _encoding(encodings: set) -> Optional[str]:
+        """
+        Pick the best encoding the client accepts
+
+        Args:
+            encodings: Content codings the client accepts
+
+        Returns:
+            Content encoding, or None for the uncompressed body
+        """
+        if brotli is not None and 'br' in encodings:
+            return 'br'
+        if 'gzip' in encodings:
+            return 'gzip'
+        return None
+
+    def _encoded(self, encoding: Optional[str]) -> bytes:
+        """
+        Get the body in an encoding, compressing it once
+
+        Args:
+            encoding: Content encoding, or None for the uncompressed body
+
+        Returns:
+            Encoded body
+        """
+        if encoding == 'br':
+            with self._lock:
+                if self._brotli is None:
+                    self._brotli = brotli.compress(self.body, quality=BROTLI_QUALITY)
+            return self._brotli
+        if encoding == 'gzip':
+            with self._lock:
+                if self._gzip is None:
+                    self._gzip = gzip.compress(self.body, compresslevel=6)
+            return self._gzip
+        return self.body
+
+    def select(self, if_none_match: Optional[str] = None,
+               accept_encoding: Optional[str] = None) -> Tuple[int, bytes, Dict[str, str]]:
+        """
+        Pick the response for a request's conditional and encoding headers
+
+        Args:
+            if_none_match: If-None-Match header value
+            accept_encoding: Accept-Encoding header value
+
+        Returns:
+            Tuple of (status code, body, headers); 304 with an empty body if
+            the client already has the current version
+        """
+        encoding = self._encoding(_accepted_encodings(accept_encoding))
+        headers = {'ETag': self.variant_etag(encoding), 'Vary': 'Accept-Encoding', 'Cache-Control': 'no-cache'}
+        if if_none_match and self._matches(if_none_match):
+            return 304, b'', headers
+
+        body = self._encoded(encoding)
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return 200, body, headers
+
+
+class VersionedResponseCache:
+    """
+    Cache of serialized responses invalidated by a data version counter
+
+    Each entry remembers the data version it was built from; a request with
+    a newer version rebuilds the entry once, and every other request just
+    reuses the serialized (and compressed) bytes. Entries built from older
+    versions are dropped as soon as the version changes, and at most
+    `max_entries` responses are kept, least recently used first out, so
+    arbitrary query parameters can't grow the cache without bound.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_RESPONSES):
+        """
+        Initialize an empty VersionedResponseCache
+
+        Args:
+            max_entries: Maximum number of cached responses
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, version: int, build: Callable[[], Any]) -> CachedResponse:
+        """
+        Get the cached response for a key, rebuilding it if the data changed
+
+        Args:
+            key: Cache key (e.g. endpoint and parameters)
+            version: Current data version
+            build: Function returning the payload for the current data
+
+        Returns:
+            Cached response
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+            if self._version is not None and version < self._version:
+                # A request that read the version before it changed; don't cache stale data
+                return CachedResponse(build())
+            if version != self._version:
+                # Every entry was built from an older version
+                self._entries.clear()
+                self._version = version
+            response = CachedResponse(build())
+            self._entries[key] = (version, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return response
+
+    def clear(self) -> None:
+        """
+        Drop all cached responses
+        """
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Run Load Simulation Script
+
+Drives a seeded synthetic workload through the conversation -> extraction ->
+ranking -> logging -> email pipeline in a process pool and reports the
+throughput and per-stage latency percentiles, for sizing hardware ahead of a
+drop.
+"""
+
+import os
+import sys
+import json
+import argparse
+from src.agent.load_simulator import LoadSimulator, format_report
+
+def main():
+    """
+    Main function to run the load test
+    """
+    parser = argparse.ArgumentParser(description="Deal Finder pipeline load test")
+    parser.add_argument("--conversations", type=int, default=10000,
+                        help="Number of synthetic conversations to run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="Number of conversations per task sent to a worker")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Workload seed; the same seed generates the same resellers")
+    parser.add_argument("--output-dir",
+                        help="Keep the call logs written during the run in this directory")
+    parser.add_argument("--json", action="store_true",
+                        help="Print the report as JSON")
+
+    args = parser.parse_args()
+
+    simulator = LoadSimulator(
+        conversations=args.conversations,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        seed=args.seed,
+        output_dir=args.output_dir
+    )
+
+    def show_progress(completed, total):
+        print(f"\r{completed}/{total} conversations", end="", file=sys.stderr, flush=True)
+
+    report = simulator.run(progress=None if args.json else show_progress)
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print(file=sys.stderr)
+        print(format_report(report))
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
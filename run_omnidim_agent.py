@@ -65,31 +65,44 @@ def make_call(agent, phone_number):
     print(f"Call initiated successfully! Call ID: {result.get('id')}")
     return result
 
-def make_bulk_calls(agent, phone_numbers):
+def make_bulk_calls(agent, phones_file, campaign_name="Deal Finder Campaign", shard_size=1000,
+                    max_parallel=4, checkpoint_path=None):
     """
-    Make bulk calls to multiple phone numbers
+    Make bulk calls to every phone number in a file, in resumable campaign shards
     
     Args:
         agent: VoiceAgent instance
-        phone_numbers: List of phone numbers to call
+        phones_file: File with phone numbers, one per line
+        campaign_name: Name of the campaign
+        shard_size: Maximum number of phone numbers per campaign shard
+        max_parallel: Maximum number of shards submitted at the same time
+        checkpoint_path: Optional path of the checkpoint file
     """
-    print(f"Initiating bulk calls to {len(phone_numbers)} phone numbers")
-    result = agent.make_bulk_omnidim_calls(phone_numbers)
-    print(f"Bulk call campaign initiated successfully! Campaign ID: {result.get('id')}")
+    print(f"Initiating bulk calls to the phone numbers in {phones_file}")
+    result = agent.dispatch_bulk_campaign(phones_file, campaign_name=campaign_name, shard_size=shard_size,
+                                          max_parallel=max_parallel, checkpoint_path=checkpoint_path)
+    if result['failed']:
+        print(f"{result['failed']} shards failed; run the command again to retry them")
+    else:
+        print("Bulk call campaign initiated successfully!")
     return result
 
-def get_call_logs(agent, call_id=None):
+def get_call_logs(agent, call_id=None, since_last_sync=False, fetch_details=False, max_workers=8):
     """
-    Get call logs
+    Get call logs, printing each call as soon as it is fetched
     
     Args:
         agent: VoiceAgent instance
         call_id: Optional specific call ID
+        since_last_sync: Only get calls that are new or changed since the last sync
+        fetch_details: Fetch full call details (transcripts) concurrently
+        max_workers: Maximum number of call details fetched at the same time
     """
-    logs = agent.get_omnidim_call_logs(call_id)
-    print(f"Retrieved {len(logs)} call logs")
-    for i, log in enumerate(logs):
-        print(f"\nCall #{i+1} - ID: {log.get('id')}")
+    count = 0
+    for log in agent.iter_omnidim_call_logs(call_id, since_last_sync=since_last_sync,
+                                            fetch_details=fetch_details, max_workers=max_workers):
+        count += 1
+        print(f"\nCall #{count} - ID: {log.get('id')}")
         print(f"Status: {log.get('status')}")
         print(f"Duration: {log.get('duration', 0)} seconds")
         print(f"Created at: {log.get('created_at')}")
@@ -103,7 +116,8 @@ def get_call_logs(agent, call_id=None):
             if len(interactions) > 3:
                 print(f"  ... and {len(interactions) - 3} more interactions")
     
-    return logs
+    print(f"Retrieved {count} call logs")
+    return count
 
 def main():
     # Parse command-line arguments
@@ -112,7 +126,21 @@ def main():
                         default="create", help="Action to perform")
     parser.add_argument("--phone", help="Phone number to call (for 'call' action)")
     parser.add_argument("--phones-file", help="File with phone numbers, one per line (for 'bulk-call' action)")
+    parser.add_argument("--campaign-name", default="Deal Finder Campaign",
+                        help="Campaign name (for 'bulk-call' action)")
+    parser.add_argument("--shard-size", type=int, default=1000,
+                        help="Maximum number of phone numbers per campaign shard (for 'bulk-call' action)")
+    parser.add_argument("--max-parallel", type=int, default=4,
+                        help="Maximum number of shards submitted at the same time (for 'bulk-call' action)")
+    parser.add_argument("--checkpoint",
+                        help="Checkpoint file used to resume an interrupted run (for 'bulk-call' action)")
     parser.add_argument("--call-id", help="Call ID to get logs for (for 'logs' action)")
+    parser.add_argument("--since-last-sync", action="store_true",
+                        help="Only get calls that are new or changed since the last sync (for 'logs' action)")
+    parser.add_argument("--transcripts", action="store_true",
+                        help="Fetch full call details and transcripts (for 'logs' action)")
+    parser.add_argument("--max-workers", type=int, default=8,
+                        help="Maximum number of call details fetched at the same time (for 'logs' action)")
     args = parser.parse_args()
     
     # Set up environment variables if needed
@@ -147,16 +175,8 @@ def main():
             print("Error: --phones-file argument is required for 'bulk-call' action")
             return 1
             
-        # Read phone numbers from file
-        try:
-            with open(args.phones_file, 'r') as f:
-                phone_numbers = [line.strip() for line in f if line.strip()]
-        except Exception as e:
-            print(f"Error reading phone numbers file: {str(e)}")
-            return 1
-            
-        if not phone_numbers:
-            print("No valid phone numbers found in the file")
+        if not os.path.exists(args.phones_file):
+            print(f"Error reading phone numbers file: {args.phones_file} not found")
             return 1
             
         # Make sure we have an agent ID
@@ -164,10 +184,21 @@ def main():
             print("No agent ID found. Creating a new agent...")
             create_or_update_agent(agent)
             
-        make_bulk_calls(agent, phone_numbers)
+        try:
+            result = make_bulk_calls(agent, args.phones_file, campaign_name=args.campaign_name,
+                                     shard_size=args.shard_size, max_parallel=args.max_parallel,
+                                     checkpoint_path=args.checkpoint)
+        except ValueError as e:
+            print(f"Error: {str(e)}")
+            return 1
+            
+        if not result['numbers']:
+            print("No valid phone numbers found in the file")
+            return 1
         
     elif args.action == "logs":
-        get_call_logs(agent, args.call_id)
+        get_call_logs(agent, args.call_id, since_last_sync=args.since_last_sync,
+                      fetch_details=args.transcripts, max_workers=args.max_workers)
         
     print("\nOmnidim integration operation completed successfully!")
     return 0
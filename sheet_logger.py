@@ -1,33 +1,99 @@
 import os
 import json
-import pandas as pd
+import threading
 from typing import Dict, List, Any
-from datetime import datetime
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+
+from src.services.log_writer import AppendOnlyLogWriter
+from src.services.sheets_sink import GoogleSheetsSink
+from src.services.log_archive import ParquetLogArchive
+
+# Worksheet columns used when mirroring the logs to Google Sheets
+CALL_LOG_COLUMNS = ['timestamp', 'speaker', 'message', 'reseller_id', 'reseller_name']
+EXTRACTED_INFO_COLUMNS = ['reseller_id', 'reseller_name', 'product_name', 'price',
+                          'delivery_time', 'availability', 'special_offers']
 
 class SheetLogger:
     """
     Service for logging call interactions to a Google Sheet
     """
     
-    def __init__(self, credentials_path: str = None):
+    def __init__(self, credentials_path: str = None, output_dir: str = None,
+                 batch_size: int = 500, flush_interval: float = 2.0,
+                 spreadsheet_id: str = None, sheets_sink: GoogleSheetsSink = None,
+                 archive_dir: str = None, render_interval: float = 0):
         """
         Initialize the SheetLogger with Google API credentials
         
         Args:
             credentials_path: Path to the Google API credentials JSON file
+            output_dir: Directory for the local log files (defaults to the project root)
+            batch_size: Number of buffered rows that triggers a write to disk
+            flush_interval: Maximum number of seconds a row stays buffered before it is written
+            spreadsheet_id: ID of the Google Sheet to mirror logs to (defaults to the
+                GOOGLE_SHEET_ID environment variable; logs stay local if not set)
+            sheets_sink: Optional preconfigured Google Sheets sink
+            archive_dir: Root directory of the Parquet archive (defaults to the
+                LOG_ARCHIVE_DIR environment variable, then <output_dir>/log_archive)
+            render_interval: Number of seconds between background renders of the
+                HTML and summary views (0 to only render on demand)
         """
-        self.credentials_path = credentials_path
+        self.credentials_path = credentials_path or os.environ.get('GOOGLE_CREDENTIALS_PATH')
         # For demo purposes, we'll simulate the Google Sheets integration
         self.sheet_url = "https://docs.google.com/spreadsheets/d/mock-sheet-id/edit#gid=0"
+        
+        # Real Google Sheets sink, shared by all logs so they use one client and one quota
+        spreadsheet_id = spreadsheet_id or os.environ.get('GOOGLE_SHEET_ID')
+        if sheets_sink is None and spreadsheet_id:
+            sheets_sink = GoogleSheetsSink(
+                spreadsheet_id,
+                credentials_path=self.credentials_path,
+                requests_per_minute=float(os.environ.get('GOOGLE_SHEETS_REQUESTS_PER_MINUTE', '60')),
+                api_base_url=os.environ.get('GOOGLE_SHEETS_API_URL', 'https://sheets.googleapis.com/v4/spreadsheets')
+            )
+        self.sheets_sink = sheets_sink
+        if sheets_sink is not None:
+            self.sheet_url = sheets_sink.spreadsheet_url
+        
+        if output_dir is None:
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            output_dir = os.path.dirname(os.path.dirname(current_dir))
+        self.output_dir = output_dir
+        
+        # Append-only local logs, written in batches
+        self.call_log_writer = AppendOnlyLogWriter(
+            os.path.join(output_dir, 'call_logs.csv'),
+            batch_size=batch_size,
+            flush_interval=flush_interval
+        )
+        self.extracted_info_writer = AppendOnlyLogWriter(
+            os.path.join(output_dir, 'extracted_info.csv'),
+            batch_size=batch_size,
+            flush_interval=flush_interval
+        )
+        
+        # Columnar archive for analytics, partitioned by date and campaign
+        archive_dir = archive_dir or os.environ.get('LOG_ARCHIVE_DIR') or os.path.join(output_dir, 'log_archive')
+        self.archive = ParquetLogArchive(archive_dir)
+        
+        # Views are kept current by a background thread when a render interval is set
+        self.render_interval = render_interval
+        self._render_lock = threading.Lock()
+        self._stop_rendering = threading.Event()
+        self._renderer = None
+        if render_interval > 0:
+            self._renderer = threading.Thread(target=self._run_renderer, name="sheet-logger-renderer", daemon=True)
+            self._renderer.start()
     
-    def log_interactions(self, conversations: List[List[Dict[str, Any]]]) -> str:
+    def log_interactions(self, conversations: List[List[Dict[str, Any]]], campaign: str = None) -> str:
         """
         Log conversation interactions to a Google Sheet
         
+        Rows are appended to the local call log in batches; the HTML and
+        summary views are regenerated every render interval or by render_views().
+        
         Args:
             conversations: List of conversation logs from multiple resellers
+            campaign: Optional campaign name used to partition the archive
             
         Returns:
             URL of the Google Sheet
@@ -37,76 +103,126 @@ class SheetLogger:
         for conversation in conversations:
             all_interactions.extend(conversation)
         
-        # Convert to DataFrame for easier manipulation
-        df = pd.DataFrame(all_interactions)
-        
-        # In a real implementation, we would use:
-        # scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-        # creds = ServiceAccountCredentials.from_json_keyfile_name(self.credentials_path, scope)
-        # client = gspread.authorize(creds)
-        # sheet = client.create('DealFinder Call Logs - ' + datetime.now().strftime('%Y-%m-%d'))
-        # sheet.share('user@example.com', perm_type='user', role='writer')
-        # worksheet = sheet.get_worksheet(0)
-        # worksheet.update([df.columns.values.tolist()] + df.values.tolist())
-        
-        # For demo purposes, save to a CSV file
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(os.path.dirname(current_dir))
-        csv_path = os.path.join(project_root, 'call_logs.csv')
-        df.to_csv(csv_path, index=False)
-        
-        # Also save a more readable HTML version
-        html_path = os.path.join(project_root, 'call_logs.html')
-        df.to_html(html_path, index=False)
-        
-        # Create a mock sheet data file for demo purposes
-        self._create_mock_sheet_data(df)
+        self.call_log_writer.append(all_interactions)
+        self.archive.append('call_logs', all_interactions, campaign=campaign)
+        self._mirror_to_sheet('Call Logs', all_interactions, CALL_LOG_COLUMNS)
         
         return self.sheet_url
     
-    def log_extracted_info(self, extracted_info_list: List[Dict[str, Any]]) -> str:
+    def log_extracted_info(self, extracted_info_list: List[Dict[str, Any]], campaign: str = None) -> str:
         """
         Log extracted information to a Google Sheet
         
         Args:
             extracted_info_list: List of extracted information from conversations
+            campaign: Optional campaign name used to partition the archive
             
         Returns:
             URL of the Google Sheet
         """
-        # Convert to DataFrame for easier manipulation
-        df = pd.DataFrame(extracted_info_list)
+        self.extracted_info_writer.append(extracted_info_list)
+        self.archive.append('extracted_info', extracted_info_list, campaign=campaign)
+        self._mirror_to_sheet('Extracted Info', extracted_info_list, EXTRACTED_INFO_COLUMNS)
         
-        # For demo purposes, save to a CSV file
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(os.path.dirname(current_dir))
-        csv_path = os.path.join(project_root, 'extracted_info.csv')
-        df.to_csv(csv_path, index=False)
+        return self.sheet_url
+    
+    def _mirror_to_sheet(self, worksheet: str, rows: List[Dict[str, Any]], columns: List[str]) -> None:
+        """
+        Queue rows for the Google Sheet, if one is configured
         
-        # Also save a more readable HTML version
-        html_path = os.path.join(project_root, 'extracted_info.html')
-        df.to_html(html_path, index=False)
+        Args:
+            worksheet: Name of the worksheet
+            rows: Row dictionaries
+            columns: Worksheet columns, in order
+        """
+        if self.sheets_sink is None:
+            return
         
-        return self.sheet_url
+        # The sink sends rows from its own thread, so this never waits on the API
+        self.sheets_sink.append_records(worksheet, rows, columns)
     
-    def _create_mock_sheet_data(self, df: pd.DataFrame) -> None:
+    def flush_local(self) -> None:
+        """
+        Write all buffered rows to the local logs and the archive
+        
+        Unlike flush(), this doesn't wait on the Google Sheets API, so it can
+        be called before acknowledging every batch of rows.
+        """
+        self.call_log_writer.flush()
+        self.extracted_info_writer.flush()
+        # Only finalized archive files can be read back after a crash
+        self.archive.flush(finalize=True)
+    
+    def flush(self) -> None:
+        """
+        Write all buffered rows to the local logs, the archive and the Google Sheet
+        """
+        self.flush_local()
+        if self.sheets_sink is not None:
+            try:
+                self.sheets_sink.flush()
+            except Exception as e:
+                # Rows stay buffered in the sink and are retried on the next flush
+                print(f"Error writing to Google Sheets: {e}")
+    
+    def render_views(self) -> None:
+        """
+        Regenerate the HTML views and the mock sheet summary from the logs
+        
+        Only the rows logged since the last call are added to the views.
+        """
+        with self._render_lock:
+            self.call_log_writer.render_html(os.path.join(self.output_dir, 'call_logs.html'))
+            self.extracted_info_writer.render_html(os.path.join(self.output_dir, 'extracted_info.html'))
+            self._create_mock_sheet_data()
+    
+    def _run_renderer(self) -> None:
+        """
+        Periodically regenerate the views until stopped
+        """
+        while not self._stop_rendering.wait(self.render_interval):
+            try:
+                self.render_views()
+            except Exception as e:
+                print(f"Error rendering log views: {e}")
+    
+    def close(self) -> None:
+        """
+        Flush all buffered rows and regenerate the views
+        """
+        self._stop_rendering.set()
+        if self._renderer is not None:
+            self._renderer.join()
+            self._renderer = None
+        self.call_log_writer.close()
+        self.extracted_info_writer.close()
+        self.archive.close()
+        if self.sheets_sink is not None:
+            try:
+                self.sheets_sink.close()
+            except Exception as e:
+                # Rows stay buffered in the sink and are retried on the next flush
+                print(f"Error writing to Google Sheets: {e}")
+        self.render_views()
+    
+    def _create_mock_sheet_data(self) -> None:
         """
         Create a mock Google Sheet data file for demo purposes
         
-        Args:
-            df: DataFrame containing the data to be logged
+        The summary is built from the counters and samples tracked by the
+        call log writer, so it doesn't require reading the log back.
         """
         sheet_data = {
             "sheet_name": "DealFinder Call Logs - 2025-05-25",
             "sheet_url": self.sheet_url,
             "created_at": "2025-05-25T18:00:00+05:30",
-            "columns": df.columns.tolist(),
-            "row_count": len(df),
-            "sample_rows": df.head(5).to_dict('records')
+            "columns": self.call_log_writer.columns,
+            "row_count": self.call_log_writer.row_count,
+            "sample_rows": self.call_log_writer.sample_rows
         }
         
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(os.path.dirname(current_dir))
-        
-        with open(os.path.join(project_root, 'sheet_data.json'), 'w') as f:
+        # Written atomically, as it may be read while the views are refreshed
+        path = os.path.join(self.output_dir, 'sheet_data.json')
+        with open(path + '.tmp', 'w') as f:
             json.dump(sheet_data, f, indent=2)
+        os.replace(path + '.tmp', path)
@@ -0,0 +1,366 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import quote
+import requests
+from oauth2client.service_account import ServiceAccountCredentials
+
+from src.utils.rate_limiter import TokenBucket, backoff_delay
+
+SHEETS_API_BASE_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+SHEETS_SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+
+# Status codes worth retrying: quota exhaustion and transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Appends aren't idempotent, so a request is only repeated right away when it
+# can't have reached the server: on 429 and connection failures. Batches that
+# fail with another retryable status go back to the buffer for a later flush
+UNSENT_RETRYABLE_STATUS_CODES = {429}
+UNSENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.ConnectTimeout)
+
+# Most rows kept buffered; the oldest are dropped beyond this
+MAX_BUFFERED_ROWS = 100000
+
+# Longest Retry-After, in seconds, honored before retrying a request
+MAX_RETRY_AFTER = 60
+
+
+class SheetsAPIError(Exception):
+    """
+    Raised when the Google Sheets API rejects a request
+    """
+
+    def __init__(self, status_code: int, message: str, retryable: bool = False):
+        self.status_code = status_code
+        self.message = message
+        # Whether sending the same rows again later can succeed without duplicating them
+        self.retryable = retryable
+        super().__init__(f"Sheets API error ({status_code}): {message}")
+
+
+class GoogleSheetsSink:
+    """
+    Batched, rate-limited writer for Google Sheets
+
+    Rows from many conversations are buffered per worksheet and sent as a
+    single `values:append` request per worksheet and batch, using one
+    authorized HTTP session. Buffered rows are sent by a background thread
+    once a batch is full or the oldest row is `flush_interval` seconds
+    old, so callers never wait on the API. Requests are paced by a token
+    bucket so the sink stays within the configured requests-per-minute
+    quota. Appends aren't idempotent, so only requests that can't have been
+    applied (quota errors and connection failures) are retried right away,
+    with jittered exponential backoff or after the server's Retry-After
+    (capped at `max_retry_after`). Batches that fail with a server error go
+    back to the buffer for the next flush; batches the API rejects (other
+    4xx) or that may already have been applied (read timeouts) are dropped
+    and logged, so they can't block the other worksheets. At most
+    `max_buffered_rows` rows are kept, dropping the oldest. The API base
+    URL can point at a local fake Sheets server for testing.
+    """
+
+    def __init__(self, spreadsheet_id: str, credentials_path: Optional[str] = None,
+                 requests_per_minute: float = 60, batch_size: int = 500,
+                 flush_interval: float = 5.0, max_retries: int = 5,
+                 api_base_url: str = SHEETS_API_BASE_URL, timeout: float = 30.0,
+                 session: Optional[requests.Session] = None,
+                 max_retry_after: float = MAX_RETRY_AFTER,
+                 max_buffered_rows: int = MAX_BUFFERED_ROWS):
+        """
+        Initialize the GoogleSheetsSink
+
+        Args:
+            spreadsheet_id: ID of the target spreadsheet
+            credentials_path: Path to the service account credentials JSON file
+                (requests are sent unauthenticated if not provided, e.g. to a fake server)
+            requests_per_minute: Sheets API request budget
+            batch_size: Maximum number of rows per append request
+            flush_interval: Maximum number of seconds rows stay buffered (0 to only flush by size)
+            max_retries: Number of retries for quota errors and connection failures
+            api_base_url: Base URL of the Sheets API
+            timeout: Timeout of each request, in seconds
+            session: Optional requests session to reuse
+            max_retry_after: Longest Retry-After, in seconds, honored before a retry
+            max_buffered_rows: Most rows kept buffered (the oldest are dropped beyond this)
+        """
+        self.spreadsheet_id = spreadsheet_id
+        self.credentials_path = credentials_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.api_base_url = api_base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retry_after = max_retry_after
+        self.max_buffered_rows = max_buffered_rows
+        self.rate_limiter = TokenBucket.per_minute(requests_per_minute)
+
+        self.session = session or requests.Session()
+        self._credentials = None
+
+        self._buffers: Dict[str, List[List[Any]]] = {}
+        self._buffered_rows = 0
+        self._oldest_buffered = None
+        # Rows dropped because the API rejected them or the buffer was full
+        self.dropped_rows = 0
+        self._buffer_lock = threading.Lock()
+        # Only one flush talks to the API at a time so batches stay ordered
+        self._send_lock = threading.Lock()
+        self._flusher = None
+        self._flusher_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        # Set to wake the flusher before its interval is up (a full batch, or close)
+        self._wake_event = threading.Event()
+
+    @property
+    def spreadsheet_url(self) -> str:
+        """
+        Browser URL of the spreadsheet
+        """
+        return f"https://docs.google.com/spreadsheets/d/{self.spreadsheet_id}/edit"
+
+    def _auth_headers(self) -> Dict[str, str]:
+        """
+        Get the authorization header, loading and refreshing credentials as needed
+
+        Returns:
+            Headers to add to each request
+        """
+        if not self.credentials_path:
+            return {}
+
+        if self._credentials is None:
+            self._credentials = ServiceAccountCredentials.from_json_keyfile_name(
+                self.credentials_path, SHEETS_SCOPES
+            )
+        # get_access_token() refreshes the token when it has expired
+        token = self._credentials.get_access_token().access_token
+        return {'Authorization': f'Bearer {token}'}
+
+    @staticmethod
+    def _cell_value(value: Any) -> Any:
+        """
+        Convert a value to something the Sheets API accepts
+
+        Args:
+            value: Raw cell value
+
+        Returns:
+            String, number or boolean cell value
+        """
+        if value is None:
+            return ''
+        if isinstance(value, (str, int, float, bool)):
+            return value
+        return str(value)
+
+    def append_rows(self, worksheet: str, rows: Iterable[List[Any]]) -> None:
+        """
+        Buffer rows for appending to a worksheet
+
+        Never waits on the API: full batches are handed to the background flusher.
+
+        Args:
+            worksheet: Name of the worksheet
+            rows: Rows of cell values
+        """
+        rows = [[self._cell_value(value) for value in row] for row in rows]
+        if not rows:
+            return
+
+        with self._buffer_lock:
+            if not self._buffered_rows:
+                self._oldest_buffered = time.monotonic()
+            self._buffers.setdefault(worksheet, []).extend(rows)
+            self._buffered_rows += len(rows)
+            self._trim_locked()
+            batch_full = self._buffered_rows >= self.batch_size
+
+        self._ensure_flusher()
+        if batch_full:
+            self._wake_event.set()
+
+    def append_records(self, worksheet: str, records: Iterable[Dict[str, Any]], columns: List[str]) -> None:
+        """
+        Buffer dictionaries for appending to a worksheet
+
+        Args:
+            worksheet: Name of the worksheet
+            records: Row dictionaries
+            columns: Worksheet columns, in order
+        """
+        self.append_rows(worksheet, ([record.get(column) for column in columns] for record in records))
+
+    def _trim_locked(self) -> None:
+        """
+        Drop the oldest buffered rows beyond the buffer cap; the caller holds the buffer lock
+        """
+        excess = self._buffered_rows - self.max_buffered_rows
+        if excess <= 0:
+            return
+        print(f"Google Sheets buffer full, dropping the {excess} oldest rows")
+        self.dropped_rows += excess
+        self._buffered_rows -= excess
+        # Worksheets are in buffering order and each one's rows oldest first
+        for worksheet in list(self._buffers):
+            rows = self._buffers[worksheet]
+            if excess < len(rows):
+                del rows[:excess]
+                return
+            excess -= len(rows)
+            del self._buffers[worksheet]
+
+    def _buffer_expired(self) -> bool:
+        """
+        Check whether the oldest buffered row has waited longer than the flush interval
+        """
+        return (bool(self.flush_interval) and self._oldest_buffered is not None
+                and time.monotonic() - self._oldest_buffered >= self.flush_interval)
+
+    def flush(self) -> int:
+        """
+        Send all buffered rows, one append request per worksheet and batch
+
+        Batches the API rejects are dropped and logged. On any other error
+        the unsent rows go back to the buffer and the error is raised.
+
+        Returns:
+            Number of rows sent
+        """
+        with self._send_lock:
+            with self._buffer_lock:
+                buffers = self._buffers
+                self._buffers = {}
+                self._buffered_rows = 0
+                self._oldest_buffered = None
+
+            sent = 0
+            pending = list(buffers.items())
+            while pending:
+                worksheet, rows = pending[0]
+                try:
+                    self._append_batch(worksheet, rows[:self.batch_size])
+                except SheetsAPIError as e:
+                    if e.retryable:
+                        self._requeue(pending)
+                        raise
+                    # Sending the batch again would fail again or duplicate it
+                    dropped = min(len(rows), self.batch_size)
+                    print(f"Dropping {dropped} rows for worksheet '{worksheet}': {e}")
+                    with self._buffer_lock:
+                        self.dropped_rows += dropped
+                except BaseException:
+                    # Failed before the request was sent (credentials, serialization)
+                    # or interrupted: put unsent rows back in front of anything buffered meanwhile
+                    self._requeue(pending)
+                    raise
+                else:
+                    sent += min(len(rows), self.batch_size)
+                if len(rows) > self.batch_size:
+                    pending[0] = (worksheet, rows[self.batch_size:])
+                else:
+                    pending.pop(0)
+            return sent
+
+    def _requeue(self, pending: List[tuple]) -> None:
+        """
+        Return unsent rows to the buffer after a failed flush
+
+        Args:
+            pending: (worksheet, rows) pairs that were not sent
+        """
+        with self._buffer_lock:
+            buffers = dict(pending)
+            for worksheet, rows in self._buffers.items():
+                buffers.setdefault(worksheet, []).extend(rows)
+            self._buffers = buffers
+            self._buffered_rows = sum(len(rows) for rows in buffers.values())
+            if self._oldest_buffered is None:
+                self._oldest_buffered = time.monotonic()
+            self._trim_locked()
+
+    def _append_batch(self, worksheet: str, rows: List[List[Any]]) -> Dict[str, Any]:
+        """
+        Send one append request, retrying it only while it can't have been applied
+
+        Args:
+            worksheet: Name of the worksheet
+            rows: Rows of cell values
+
+        Returns:
+            Response body from the Sheets API
+        """
+        url = f"{self.api_base_url}/{self.spreadsheet_id}/values/{quote(worksheet)}:append"
+        params = {'valueInputOption': 'RAW', 'insertDataOption': 'INSERT_ROWS'}
+        body = {'values': rows}
+
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            headers = self._auth_headers()
+            try:
+                response = self.session.post(url, params=params, json=body,
+                                             headers=headers, timeout=self.timeout)
+            except UNSENT_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise SheetsAPIError(0, f"Network error: {str(e)}", retryable=True)
+            except requests.exceptions.RequestException as e:
+                # The rows may already have been appended (e.g. a read timeout)
+                raise SheetsAPIError(0, f"Network error after sending: {str(e)}")
+            else:
+                if response.status_code < 400:
+                    return response.json() if response.content else {}
+                retryable = response.status_code in RETRYABLE_STATUS_CODES
+                if response.status_code not in UNSENT_RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    raise SheetsAPIError(response.status_code, response.text, retryable=retryable)
+                retry_after = response.headers.get('Retry-After')
+                if retry_after and retry_after.isdigit():
+                    time.sleep(min(int(retry_after), self.max_retry_after))
+                    attempt += 1
+                    continue
+
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+
+    def _ensure_flusher(self) -> None:
+        """
+        Start the background thread that sends full batches and expired rows
+        """
+        with self._flusher_lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+
+            self._stop_event.clear()
+            self._flusher = threading.Thread(target=self._run_flusher, name="sheets-sink-flusher", daemon=True)
+            self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        """
+        Flush full batches and expired buffered rows until stopped
+        """
+        while not self._stop_event.is_set():
+            self._wake_event.wait(self.flush_interval or None)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                return
+            with self._buffer_lock:
+                due = self._buffered_rows >= self.batch_size or self._buffer_expired()
+            if due:
+                try:
+                    self.flush()
+                except Exception as e:
+                    # Retryable rows are back in the buffer and retried on the next wake-up
+                    print(f"Error writing to Google Sheets: {e}")
+
+    def close(self) -> None:
+        """
+        Stop the background flusher and send the buffered rows
+        """
+        with self._flusher_lock:
+            flusher, self._flusher = self._flusher, None
+        self._stop_event.set()
+        self._wake_event.set()
+        if flusher is not None:
+            flusher.join()
+        self.flush()
+        self.session.close()
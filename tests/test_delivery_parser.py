@@ -0,0 +1,34 @@
+import pytest
+
+from src.utils.delivery_parser import (
+    AVAILABILITY_IN_STOCK, AVAILABILITY_LIMITED, AVAILABILITY_UNKNOWN,
+    parse_availability_tier, parse_delivery_window
+)
+
+
+@pytest.mark.parametrize('availability, tier', [
+    ('In Stock', AVAILABILITY_IN_STOCK),
+    ('Limited Stock (2 pairs left)', AVAILABILITY_LIMITED),
+    ('In stock, only 2 left', AVAILABILITY_LIMITED),
+    ('Not in stock', AVAILABILITY_UNKNOWN),
+    ('Pre-order', AVAILABILITY_UNKNOWN),
+    # A bare "limited" keeps its limited-stock score unless another phrase says more
+    ('Limited', AVAILABILITY_LIMITED),
+    ('Limited edition – few left', AVAILABILITY_LIMITED),
+    ('Limited edition, in stock', AVAILABILITY_IN_STOCK),
+    ('Limited edition, sold out', AVAILABILITY_UNKNOWN),
+    ('', AVAILABILITY_UNKNOWN),
+])
+def test_availability_tiers(availability, tier):
+    assert parse_availability_tier(availability) == tier
+
+
+@pytest.mark.parametrize('delivery_time, window', [
+    ('3-5 business days', (3, 5)),
+    ('2 to 3 weeks', (14, 21)),
+    ('Next day delivery', (1, 1)),
+    ('Within 48 hours', (2, 2)),
+    ('Ships 2025-06-01', None),
+])
+def test_delivery_windows(delivery_time, window):
+    assert parse_delivery_window(delivery_time) == window
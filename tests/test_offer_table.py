@@ -0,0 +1,46 @@
+from src.utils.offer_table import OfferTable
+from src.utils.reseller_records import ResellerRecord
+
+RESELLER = {
+    'id': 7,
+    'name': 'SoleSociety',
+    'contact': {'phone': '+1-555-234-5678', 'email': 'sales@solesociety.com'},
+    'product': {'sku': 'DZ5485-612', 'name': "Air Jordan 1 High OG 'Chicago Reimagined'", 'size': 'US 10'},
+    'price': 349.99,
+    'availability': 'In Stock',
+    'delivery_time': '2-3 business days',
+    'special_offers': 'Free shipping on orders over $300',
+    'personality': 'Casual and friendly',
+    'offers': [
+        {'price': 299.99},
+        {'size': 'US 11', 'price': 359.99},
+    ]
+}
+
+
+def score(offer):
+    return 1000 - offer['price']
+
+
+def build_table():
+    reseller = ResellerRecord.from_dict(RESELLER)
+    reseller['score'] = score(reseller)
+    return reseller, OfferTable.from_resellers([reseller], score)
+
+
+def test_extra_offer_for_the_main_product_does_not_replace_it():
+    reseller, table = build_table()
+
+    assert table.get((7, 'DZ5485-612', 'US 10')) is reseller
+    assert table.top_k(5, sku='DZ5485-612', size='US 10') == [reseller]
+    assert [offer['price'] for offer in table.top_k(5)] == [349.99, 359.99]
+
+
+def test_other_sizes_are_added():
+    _, table = build_table()
+
+    offer = table.get((7, 'DZ5485-612', 'US 11'))
+
+    assert offer['price'] == 359.99
+    assert offer['score'] == score(offer)
+    assert len(table) == 2
@@ -0,0 +1,168 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from src.services.omnidim_async import AsyncOmnidimClient, OmnidimAPIError
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """
+    Record the delays the client sleeps for instead of waiting them out
+    """
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, 'sleep', fake_sleep)
+    return delays
+
+
+def make_client(handler, **kwargs):
+    kwargs.setdefault('requests_per_second', 1000)
+    return AsyncOmnidimClient(api_key='test-key', base_url='http://omnidim.test/api/v1',
+                              transport=httpx.MockTransport(handler), **kwargs)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_get_retries_server_errors(sleeps):
+    responses = [httpx.Response(503), httpx.Response(502), httpx.Response(200, json={'id': 7})]
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return responses.pop(0)
+
+    async def scenario():
+        async with make_client(handler) as client:
+            return await client.get_call(7)
+
+    assert run(scenario()) == {'status': 200, 'json': {'id': 7}}
+    assert len(requests) == 3
+    assert requests[0].url.path == '/api/v1/calls/logs/7'
+    assert requests[0].headers['Authorization'] == 'Bearer test-key'
+    assert len(sleeps) == 2
+
+
+def test_get_gives_up_after_max_retries(sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500, text='boom')
+
+    async def scenario():
+        async with make_client(handler, max_retries=2) as client:
+            await client.get_call(1)
+
+    with pytest.raises(OmnidimAPIError) as error:
+        run(scenario())
+    assert error.value.status_code == 500
+    assert len(calls) == 3
+
+
+def test_retry_after_header_is_honored(sleeps):
+    responses = [httpx.Response(429, headers={'Retry-After': '3'}), httpx.Response(200, json={})]
+
+    async def scenario():
+        async with make_client(lambda request: responses.pop(0)) as client:
+            return await client.get_call(1)
+
+    assert run(scenario())['status'] == 200
+    assert sleeps == [3]
+
+
+def test_post_is_not_retried_on_server_errors(sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(json.loads(request.content))
+        return httpx.Response(503)
+
+    async def scenario():
+        async with make_client(handler) as client:
+            await client.make_call(5, '+15555550100')
+
+    with pytest.raises(OmnidimAPIError) as error:
+        run(scenario())
+    assert error.value.status_code == 503
+    assert calls == [{'agent_id': 5, 'to_number': '+15555550100', 'call_context': {}}]
+
+
+def test_post_is_not_retried_on_read_timeouts(sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ReadTimeout('timed out', request=request)
+
+    async def scenario():
+        async with make_client(handler) as client:
+            await client.make_call(5, '+15555550100')
+
+    with pytest.raises(OmnidimAPIError):
+        run(scenario())
+    assert len(calls) == 1
+
+
+def test_post_is_retried_when_not_sent(sleeps):
+    outcomes = ['connect', 429, 200]
+
+    def handler(request):
+        outcome = outcomes.pop(0)
+        if outcome == 'connect':
+            raise httpx.ConnectError('connection refused', request=request)
+        return httpx.Response(outcome, json={'id': 1})
+
+    async def scenario():
+        async with make_client(handler) as client:
+            return await client.create_bulk_call_campaign(5, ['+15555550100'], 'Drop')
+
+    assert run(scenario())['json'] == {'id': 1}
+    assert outcomes == []
+
+
+def test_connection_pool_is_bounded():
+    # MockTransport bypasses the connection pool, so count the connections
+    # a real local server sees while many requests run at once
+    open_connections = 0
+    peak_connections = 0
+
+    async def handle(reader, writer):
+        nonlocal open_connections, peak_connections
+        open_connections += 1
+        peak_connections = max(peak_connections, open_connections)
+        try:
+            while await reader.readuntil(b'\r\n\r\n'):
+                await asyncio.sleep(0.02)
+                body = b'{"id": 1}'
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                             b'Content-Length: %d\r\n\r\n%s' % (len(body), body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            open_connections -= 1
+            writer.close()
+
+    async def scenario():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            async with AsyncOmnidimClient(api_key='test-key', base_url=f'http://127.0.0.1:{port}/api/v1',
+                                          max_connections=3, max_keepalive_connections=3,
+                                          requests_per_second=1000) as client:
+                return await client.get_calls(range(30))
+
+    results = run(scenario())
+    assert len(results) == 30
+    assert all(result == {'status': 200, 'json': {'id': 1}} for result in results.values())
+    assert 1 <= peak_connections <= 3
@@ -0,0 +1,28 @@
+import pytest
+
+from src.utils.personality import Personality, classify_personality
+
+
+@pytest.mark.parametrize('description, expected', [
+    ('Professional and courteous', Personality.PROFESSIONAL),
+    ('Casual and friendly', Personality.CASUAL),
+    ('Profesional and frendly', Personality.PROFESSIONAL | Personality.CASUAL),
+    ('Very knowledgable sneakerhead', Personality.KNOWLEDGEABLE),
+    ('Enthusiastc about drops', Personality.ENTHUSIASTIC),
+])
+def test_keywords_and_typos_are_matched(description, expected):
+    assert classify_personality(description) == expected
+
+
+@pytest.mark.parametrize('description', [
+    'Normal seller',
+    'Works with police',
+    'Meager stock',
+    'Prompt and clear',
+    'Formerly a chef',
+    'Unprofessional and impolite',
+    'Not very friendly',
+    'Never casual',
+])
+def test_lookalike_and_negated_words_are_not_matched(description):
+    assert classify_personality(description) == Personality.NONE
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+import src.utils.reseller_records as reseller_records
+from src.utils.reseller_records import iter_reseller_data, iter_reseller_sources
+
+RESELLERS = [
+    {'id': 1, 'name': 'SneakerHub', 'price': 329.99, 'availability': 'In Stock',
+     'delivery_time': '2 business days', 'product': {'sku': 'DZ5485-612', 'size': 'US 10'}},
+    {'id': 2, 'name': 'KicksMaster', 'price': 345.5, 'availability': 'Limited Stock',
+     'delivery_time': '1-2 business days', 'product': {'sku': 'DZ5485-612', 'size': 'US 9'}},
+]
+
+
+@pytest.fixture(params=[65536, 7], ids=['one-chunk', 'small-chunks'])
+def chunk_size(request, monkeypatch):
+    monkeypatch.setattr(reseller_records, '_READ_CHUNK_SIZE', request.param)
+    return request.param
+
+
+def write(tmp_path, document):
+    path = tmp_path / 'resellers.json'
+    path.write_text(json.dumps(document, indent=2))
+    return str(path)
+
+
+def test_top_level_array(tmp_path, chunk_size):
+    assert list(iter_reseller_data(write(tmp_path, RESELLERS))) == RESELLERS
+
+
+def test_metadata_mentioning_resellers_before_the_array(tmp_path, chunk_size):
+    document = {
+        'description': 'List of "resellers" with [their] offers',
+        'version': 12345,
+        'sources': {'resellers': ['ignored']},
+        'resellers': RESELLERS,
+        'notes': 'trailing "resellers" text'
+    }
+
+    assert list(iter_reseller_data(write(tmp_path, document))) == RESELLERS
+
+
+def test_raw_text_is_each_element(tmp_path, chunk_size):
+    sources = list(iter_reseller_sources(write(tmp_path, {'resellers': RESELLERS})))
+
+    assert [json.loads(raw) for raw, _ in sources] == RESELLERS
+
+
+@pytest.mark.parametrize('document', [{'description': 'no "resellers": [] here'}, {'resellers': {}}])
+def test_missing_resellers_array(tmp_path, document):
+    with pytest.raises(ValueError):
+        list(iter_reseller_sources(write(tmp_path, document)))
@@ -0,0 +1,244 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pytest
+import requests
+
+from src.services import sheets_sink as sheets_sink_module
+from src.services.sheets_sink import GoogleSheetsSink, SheetsAPIError
+
+
+class FakeSheetsServer:
+    """
+    Local stand-in for the Sheets `values:append` endpoint
+
+    Responses are taken from `responses` in order (status code and headers),
+    then every request succeeds; appended rows are recorded per worksheet.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+        self.rows = {}
+        self.delay = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                url = urlparse(self.path)
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                worksheet = unquote(url.path.rsplit('/values/', 1)[1]).rsplit(':append', 1)[0]
+                with fake.lock:
+                    fake.requests.append({'worksheet': worksheet, 'params': parse_qs(url.query),
+                                          'values': body['values']})
+                    status, headers = fake.responses.pop(0) if fake.responses else (200, {})
+                    if status < 400:
+                        fake.rows.setdefault(worksheet, []).extend(body['values'])
+                # Not time.sleep, which tests replace to skip the sink's backoff
+                threading.Event().wait(fake.delay)
+                payload = json.dumps({'updates': {'updatedRows': len(body['values'])}}).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v4/spreadsheets"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def server():
+    fake = FakeSheetsServer()
+    yield fake
+    fake.close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """
+    Record the delays the sink sleeps for instead of waiting them out
+    """
+    delays = []
+    monkeypatch.setattr(sheets_sink_module.time, 'sleep', delays.append)
+    return delays
+
+
+def make_sink(server, **kwargs):
+    kwargs.setdefault('requests_per_minute', 60000)
+    kwargs.setdefault('flush_interval', 0)
+    return GoogleSheetsSink('sheet-id', api_base_url=server.url, **kwargs)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_flush_sends_one_request_per_worksheet(server):
+    sink = make_sink(server)
+    sink.append_rows('Call Logs', [['a', 1], ['b', None]])
+    sink.append_records('Extracted Info', [{'name': 'Hub', 'price': 350.0}], ['name', 'price'])
+    sink.append_rows('Call Logs', [['c', True]])
+
+    assert sink.flush() == 4
+    sink.close()
+
+    assert len(server.requests) == 2
+    assert server.rows == {'Call Logs': [['a', 1], ['b', ''], ['c', True]], 'Extracted Info': [['Hub', 350.0]]}
+    assert server.requests[0]['params'] == {'valueInputOption': ['RAW'], 'insertDataOption': ['INSERT_ROWS']}
+
+
+def test_full_batches_are_sent_in_the_background(server):
+    sink = make_sink(server, batch_size=3)
+    sink.append_rows('Call Logs', [['a'], ['b'], ['c'], ['d']])
+
+    assert wait_for(lambda: len(server.rows.get('Call Logs', [])) == 4)
+    assert [len(request['values']) for request in server.requests] == [3, 1]
+    sink.close()
+
+
+def test_expired_rows_are_sent_by_the_flusher(server):
+    sink = make_sink(server, flush_interval=0.05)
+    sink.append_rows('Call Logs', [['a']])
+
+    assert wait_for(lambda: server.rows.get('Call Logs') == [['a']])
+    sink.close()
+
+
+def test_server_errors_are_requeued_for_the_next_flush(server, sleeps):
+    # An append that failed on the server may still have been applied, so it
+    # isn't repeated right away; the rows are retried by the next flush
+    server.responses = [(503, {})]
+    sink = make_sink(server)
+    sink.append_rows('Call Logs', [['a']])
+
+    with pytest.raises(SheetsAPIError) as error:
+        sink.flush()
+    assert error.value.status_code == 503
+    assert len(server.requests) == 1
+
+    assert sink.flush() == 1
+    sink.close()
+    assert server.rows == {'Call Logs': [['a']]}
+    assert sleeps == []
+
+
+def test_quota_errors_are_retried(server, sleeps):
+    server.responses = [(429, {}), (429, {})]
+    sink = make_sink(server)
+    sink.append_rows('Call Logs', [['a']])
+
+    assert sink.flush() == 1
+    sink.close()
+    assert len(server.requests) == 3
+    assert server.rows == {'Call Logs': [['a']]}
+    assert len(sleeps) == 2
+
+
+def test_connection_errors_are_retried(server, sleeps):
+    sink = make_sink(server)
+    real_post = sink.session.post
+    failures = [requests.exceptions.ConnectionError('connection refused')]
+
+    def post(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return real_post(*args, **kwargs)
+
+    sink.session.post = post
+    sink.append_rows('Call Logs', [['a']])
+
+    assert sink.flush() == 1
+    sink.close()
+    assert server.rows == {'Call Logs': [['a']]}
+    assert len(sleeps) == 1
+
+
+def test_read_timeouts_are_not_retried(server, sleeps):
+    server.delay = 0.5
+    sink = make_sink(server, timeout=0.1)
+    sink.append_rows('Call Logs', [['a']])
+
+    # The server may have applied the append, so the rows aren't sent again
+    assert sink.flush() == 0
+    server.delay = 0
+    assert sink.flush() == 0
+    sink.close()
+    assert server.rows == {'Call Logs': [['a']]}
+    assert sink.dropped_rows == 1
+
+
+def test_retry_after_is_capped(server, sleeps):
+    server.responses = [(429, {'Retry-After': '3600'}), (429, {'Retry-After': '2'})]
+    sink = make_sink(server, max_retry_after=30)
+    sink.append_rows('Call Logs', [['a']])
+
+    assert sink.flush() == 1
+    sink.close()
+    assert sleeps == [30, 2]
+
+
+def test_rejected_rows_are_dropped(server, sleeps):
+    server.responses = [(400, {})]
+    sink = make_sink(server)
+    sink.append_rows('Missing', [['a'], ['b']])
+    sink.append_rows('Call Logs', [['c']])
+
+    # The rejected batch doesn't hold back the other worksheets
+    assert sink.flush() == 1
+    assert sink.flush() == 0
+    sink.close()
+    assert server.rows == {'Call Logs': [['c']]}
+    assert sink.dropped_rows == 2
+    assert sleeps == []
+
+
+def test_buffer_drops_the_oldest_rows_when_full(server):
+    sink = make_sink(server, max_buffered_rows=3, batch_size=100)
+    sink.append_rows('Call Logs', [['a'], ['b']])
+    sink.append_rows('Extracted Info', [['c'], ['d']])
+
+    assert sink.dropped_rows == 1
+    assert sink.flush() == 3
+    sink.close()
+    assert server.rows == {'Call Logs': [['b']], 'Extracted Info': [['c'], ['d']]}
+
+
+def test_rows_stay_buffered_on_any_error(server):
+    sink = make_sink(server)
+    real_auth_headers = sink._auth_headers
+    failures = [RuntimeError('credentials unavailable')]
+
+    def auth_headers():
+        if failures:
+            raise failures.pop()
+        return real_auth_headers()
+
+    sink._auth_headers = auth_headers
+    sink.append_rows('Call Logs', [['a']])
+
+    with pytest.raises(RuntimeError):
+        sink.flush()
+    assert sink.flush() == 1
+    sink.close()
+    assert server.rows == {'Call Logs': [['a']]}
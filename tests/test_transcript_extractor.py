@@ -0,0 +1,37 @@
+from src.utils.conversation_handler import ConversationHandler
+from src.utils.transcript_extractor import TranscriptExtractor
+
+RESELLER = {
+    'id': 7,
+    'name': 'SoleSociety',
+    'contact': {'phone': '+1-555-234-5678', 'email': 'sales@solesociety.com'},
+    'product': {'sku': 'DZ5485-612', 'name': "Air Jordan 1 High OG 'Chicago Reimagined'", 'size': 'US 10'},
+    'price': 349.99,
+    'availability': 'In Stock',
+    'delivery_time': '2-3 business days',
+    'special_offers': 'Free shipping on orders over $300',
+    'personality': 'Casual and friendly'
+}
+
+
+def test_simulated_conversation_is_extracted():
+    conversation_log, _ = ConversationHandler(RESELLER, seed=1).simulate_full_conversation()
+
+    extracted = TranscriptExtractor().extract(conversation_log)
+
+    assert extracted['reseller_id'] == 7
+    assert extracted['reseller_name'] == 'SoleSociety'
+    assert extracted['price'] == 349.99
+
+
+def test_plain_dictionaries_and_strings_are_accepted():
+    interactions = [
+        {'speaker': 'agent', 'message': 'How much are they?', 'reseller_id': 3, 'reseller_name': 'KicksMaster'},
+        'They are $360.',
+    ]
+
+    extracted = TranscriptExtractor().extract(interactions)
+
+    assert extracted['reseller_id'] == 3
+    assert extracted['reseller_name'] == 'KicksMaster'
+    assert extracted['price'] == 360.0
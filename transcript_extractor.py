@@ -0,0 +1,327 @@
+import re
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Speakers whose turns are ours rather than the reseller's
+AGENT_SPEAKERS = frozenset({'agent', 'assistant', 'bot', 'ai', 'system'})
+
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Currency amounts: "$349.99", "$1,200", "350 dollars"
+_AMOUNT_RE = re.compile(
+    r'\$\s?(?P<dollars>\d{1,3}(?:,\d{3})+|\d+)(?:\.(?P<cents>\d{1,2}))?'
+    r'|\b(?P<spoken>\d+(?:\.\d{1,2})?)\s*(?:dollars|bucks|usd)\b',
+    re.IGNORECASE
+)
+
+# Words just before an amount that mark it as the asking price...
+_PRICE_CUE_RE = re.compile(
+    r'\b(?:price[ds]?|pricing|cost[s]?|sell(?:ing)?|asking|going for|charge|do it for|'
+    r"let (?:it|them) go for|is|it'?s|they'?re|are|at|for)\W*$",
+    re.IGNORECASE
+)
+# ...and words around an amount that mark it as part of a promotion instead
+_PROMO_CUE_RE = re.compile(
+    r'\b(?:over|above|orders?|off|discount|save|saving|shipping|credit|coupon|minimum)\b',
+    re.IGNORECASE
+)
+
+# Delivery windows: "3-5 business days", "2 to 3 weeks", "next day", "same-day"
+_DELIVERY_RE = re.compile(
+    r'\b(?:(?P<low>\d+)\s*(?:-|–|to)\s*(?P<high>\d+)|(?P<single>\d+))\s*'
+    r'(?P<business>business\s+|working\s+)?(?P<unit>days?|weeks?)\b'
+    r'|\b(?P<next>next[- ]day|overnight|tomorrow)\b'
+    r'|\b(?P<same>same[- ]day)\b',
+    re.IGNORECASE
+)
+_DELIVERY_CUE_RE = re.compile(r'\b(?:deliver\w*|ship\w*|arriv\w*|get (?:it|them|there))\b', re.IGNORECASE)
+
+# Stock phrases, one named alternative per availability state; alternatives
+# earlier in the pattern win where phrases overlap ("not in stock")
+_AVAILABILITY_RE = re.compile(
+    r"\b(?P<out>out of stock|sold out|not (?:currently )?in stock|no longer available|unavailable|"
+    r"don'?t have (?:any|it|them|this)(?: in stock)?)\b"
+    r"|\b(?:only\s+)?(?P<count>\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s+"
+    r"(?:pairs?|units?)(?:\s+(?:left|remaining))?\b"
+    r"|\bonly\s+(?P<count_left>\d+|one|two|three|four|five)\s+left\b"
+    r"|\b(?P<limited>limited (?:stock|quantit(?:y|ies)|supply|availability)|low stock|running low|last (?:pair|few)|"
+    r"almost gone|few left)\b"
+    r"|\b(?P<preorder>pre-?orders?|back-?orders?(?:ed)?)\b"
+    r"|\b(?P<in_stock>in[- ]stock|available (?:now|today|to ship)|ready to ship)\b"
+    r"|\b(?P<have>(?:we|i) (?:do )?(?:still )?have (?:it|them|this|these|those|plenty))\b",
+    re.IGNORECASE
+)
+
+# (group, availability, confidence) of each availability alternative, most specific first
+_AVAILABILITY_STATES = (
+    ('count', 'Limited Stock ({count} {pairs} left)', 0.95),
+    ('count_left', 'Limited Stock ({count} {pairs} left)', 0.9),
+    ('limited', 'Limited Stock', 0.85),
+    ('out', 'Out of Stock', 0.9),
+    ('preorder', 'Pre-order', 0.8),
+    ('in_stock', 'In Stock', 0.9),
+    ('have', 'In Stock', 0.6),
+)
+
+_NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10
+}
+
+# Promotions: "special offer: ...", or a sentence mentioning a typical promotion
+_PROMO_LEAD_RE = re.compile(r'\b(?:special offer|promotion|promo|deal)s?\b[^:]*?(?::|\bis\b)\s*(?P<text>.+)',
+                            re.IGNORECASE)
+_PROMO_RE = re.compile(
+    r'\d+(?:\.\d+)?\s*%|\bfree (?:shipping|returns|delivery|gift|\w+ (?:kit|laces|shoelaces))\b|\bdiscount\b|'
+    r'\bcoupon\b|\bpromo(?:tion)? code\b|\bbuy now,? pay later\b|\bincludes?\b.*\bfree\b|\bexclusive\b.*\bkit\b',
+    re.IGNORECASE
+)
+
+
+def _speaker(interaction: Any) -> str:
+    """
+    Get the speaker of an interaction
+    """
+    if isinstance(interaction, str):
+        return ''
+    return str(interaction.get('speaker') or interaction.get('role') or '').lower()
+
+
+def _message(interaction: Any) -> str:
+    """
+    Get the text of an interaction
+    """
+    if isinstance(interaction, str):
+        return interaction
+    return str(interaction.get('message') or interaction.get('content') or interaction.get('text') or '')
+
+
+class TranscriptExtractor:
+    """
+    Rule-based extraction of offer details from call transcripts
+
+    Every pattern is compiled once at import time. Reseller turns are split
+    into sentences and scanned for currency amounts, delivery windows, stock
+    phrases and promotions; each extracted field gets a confidence score
+    based on how explicit the phrasing was and whether the transcript
+    contradicts itself, so callers can decide which fields to trust.
+    """
+
+    def __init__(self, min_confidence: float = 0.7):
+        """
+        Initialize the TranscriptExtractor
+
+        Args:
+            min_confidence: Minimum confidence a field needs to update an offer
+        """
+        self.min_confidence = min_confidence
+
+    @staticmethod
+    def _sentences(interactions: Iterable[Any]) -> List[str]:
+        """
+        Split the reseller's turns of a transcript into sentences
+        """
+        sentences = []
+        for interaction in interactions:
+            if _speaker(interaction) in AGENT_SPEAKERS:
+                continue
+            message = _message(interaction).strip()
+            if message:
+                sentences.extend(_SENTENCE_SPLIT_RE.split(message))
+        return sentences
+
+    @staticmethod
+    def _extract_price(sentences: List[str]) -> Tuple[Optional[float], float]:
+        """
+        Find the asking price; later mentions win, since resellers revise their price
+
+        Returns:
+            Tuple of (price or None, confidence)
+        """
+        best = None
+        best_rank = -1
+        amounts = set()
+        for sentence in sentences:
+            for match in _AMOUNT_RE.finditer(sentence):
+                if match.group('spoken'):
+                    amount = float(match.group('spoken'))
+                else:
+                    amount = float(match.group('dollars').replace(',', ''))
+                    if match.group('cents'):
+                        amount += int(match.group('cents').ljust(2, '0')) / 100
+                if amount <= 0:
+                    continue
+
+                before = sentence[max(0, match.start() - 40):match.start()]
+                after = sentence[match.end():match.end() + 20]
+                if _PROMO_CUE_RE.search(before[-15:]) or _PROMO_CUE_RE.match(after.strip()):
+                    continue
+                amounts.add(amount)
+                rank = 1 if _PRICE_CUE_RE.search(before) else 0
+                if rank >= best_rank:
+                    best, best_rank = amount, rank
+
+        if best is None:
+            return None, 0.0
+        confidence = 0.95 if best_rank else 0.6
+        if len(amounts) > 1:
+            confidence -= 0.15
+        return round(best, 2), confidence
+
+    @staticmethod
+    def _extract_delivery(sentences: List[str]) -> Tuple[Optional[str], float]:
+        """
+        Find the delivery window, normalized to e.g. "3-5 business days" or "Next day delivery"
+
+        Returns:
+            Tuple of (delivery time or None, confidence)
+        """
+        found = None
+        confidence = 0.0
+        for sentence in sentences:
+            cue = _DELIVERY_CUE_RE.search(sentence) is not None
+            for match in _DELIVERY_RE.finditer(sentence):
+                if match.group('next'):
+                    delivery_time = 'Next day delivery'
+                elif match.group('same'):
+                    delivery_time = 'Same day delivery'
+                else:
+                    unit = match.group('unit').lower().rstrip('s')
+                    business = 'business ' if match.group('business') else ''
+                    if match.group('single'):
+                        count = match.group('single')
+                        delivery_time = f"{count} {business}{unit}{'' if count == '1' else 's'}"
+                    else:
+                        delivery_time = f"{match.group('low')}-{match.group('high')} {business}{unit}s"
+                match_confidence = 0.9 if cue else 0.55
+                if match_confidence >= confidence:
+                    found, confidence = delivery_time, match_confidence
+        return found, confidence
+
+    @staticmethod
+    def _extract_availability(sentences: List[str]) -> Tuple[Optional[str], float]:
+        """
+        Find the stock level, preferring the most specific phrase
+
+        Returns:
+            Tuple of (availability or None, confidence)
+        """
+        matches = {}
+        for sentence in sentences:
+            for match in _AVAILABILITY_RE.finditer(sentence):
+                matches[match.lastgroup] = match
+
+        for group, template, confidence in _AVAILABILITY_STATES:
+            match = matches.get(group)
+            if match is None:
+                continue
+            if group in ('count', 'count_left'):
+                count = match.group(group).lower()
+                count = _NUMBER_WORDS.get(count, count)
+                return template.format(count=count, pairs='pair' if str(count) == '1' else 'pairs'), confidence
+            # "In stock" next to "out of stock" means the reseller contradicted itself
+            if group == 'out' and ('in_stock' in matches or 'have' in matches):
+                confidence -= 0.3
+            return template, confidence
+        return None, 0.0
+
+    @staticmethod
+    def _extract_special_offers(sentences: List[str]) -> Tuple[Optional[str], float]:
+        """
+        Find the promotion the reseller mentioned
+
+        Returns:
+            Tuple of (promotion text or None, confidence)
+        """
+        for sentence in sentences:
+            match = _PROMO_LEAD_RE.search(sentence)
+            if match:
+                return match.group('text').strip().rstrip('.!?'), 0.9
+        for sentence in sentences:
+            if _PROMO_RE.search(sentence):
+                return sentence.strip().rstrip('.!?'), 0.6
+        return None, 0.0
+
+    def extract(self, interactions: Iterable[Any], reseller_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Extract offer details from one transcript
+
+        Args:
+            interactions: Transcript turns (mappings with speaker and message, or strings)
+            reseller_name: Reseller name (defaults to the one recorded in the interactions)
+
+        Returns:
+            Extracted info dictionary with price, availability, delivery_time and
+            special_offers (None if not found), a `<field>_confidence` for each
+            field, and the overall `confidence` of the fields that were found
+        """
+        interactions = interactions if isinstance(interactions, list) else list(interactions)
+        sentences = self._sentences(interactions)
+
+        reseller_id = None
+        for interaction in interactions:
+            if isinstance(interaction, Mapping):
+                reseller_id = reseller_id if reseller_id is not None else interaction.get('reseller_id')
+                reseller_name = reseller_name or interaction.get('reseller_name')
+
+        price, price_confidence = self._extract_price(sentences)
+        availability, availability_confidence = self._extract_availability(sentences)
+        delivery_time, delivery_confidence = self._extract_delivery(sentences)
+        special_offers, special_offers_confidence = self._extract_special_offers(sentences)
+
+        found = [confidence for confidence in (price_confidence, availability_confidence,
+                                               delivery_confidence, special_offers_confidence) if confidence]
+        return {
+            'reseller_id': reseller_id,
+            'reseller_name': reseller_name,
+            'price': price,
+            'availability': availability,
+            'delivery_time': delivery_time,
+            'special_offers': special_offers,
+            'price_confidence': round(price_confidence, 2),
+            'availability_confidence': round(availability_confidence, 2),
+            'delivery_time_confidence': round(delivery_confidence, 2),
+            'special_offers_confidence': round(special_offers_confidence, 2),
+            'confidence': round(sum(found) / len(found), 2) if found else 0.0
+        }
+
+    def extract_batch(self, transcripts: Iterable[Iterable[Any]]) -> List[Dict[str, Any]]:
+        """
+        Extract offer details from many transcripts
+
+        Args:
+            transcripts: Transcripts, each a list of interactions
+
+        Returns:
+            List of extracted info dictionaries, in input order
+        """
+        extract = self.extract
+        return [extract(interactions) for interactions in transcripts]
+
+    def update_offer(self, data_processor: Any, extracted: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Apply the confident fields of an extraction to the reseller's offer
+
+        Args:
+            data_processor: DataProcessor holding the offers
+            extracted: Extracted info dictionary returned by extract()
+
+        Returns:
+            Updated offer dictionary, or None if the reseller is unknown or
+            no field was confident enough
+        """
+        reseller = None
+        if extracted.get('reseller_id') is not None:
+            reseller = data_processor.get_reseller_by_id(extracted['reseller_id'])
+        if reseller is None:
+            reseller = data_processor.find_reseller(name=extracted.get('reseller_name'))
+        if reseller is None:
+            return None
+
+        updates = {
+            field: extracted[field] for field in ('price', 'availability', 'delivery_time')
+            if extracted.get(field) is not None and extracted[f"{field}_confidence"] >= self.min_confidence
+        }
+        if not updates:
+            return None
+        return data_processor.update_reseller(reseller['id'], **updates)
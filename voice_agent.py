@@ -1,8 +1,7 @@
 import os
 import json
-from typing import Dict, List, Any, Tuple, Optional
+from typing import Dict, Iterator, List, Any, Tuple, Optional
 import sys
-import time
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -16,21 +15,27 @@ sys.path.append(project_root)
 
 from src.utils.data_processor import DataProcessor
 from src.utils.conversation_handler import ConversationHandler
+from src.utils.call_scheduler import CallScheduler
 from src.services.email_service import EmailService
 from src.services.sheet_logger import SheetLogger
 from src.services.omnidim_service import OmnidimService
+from src.services.call_log_sync import CallLogSync
+from src.services.campaign_dispatcher import CampaignDispatcher
 
 class VoiceAgent:
     """
     Main voice agent implementation that coordinates the entire workflow
     """
     
-    def __init__(self, omnidim_api_key: Optional[str] = None):
+    def __init__(self, omnidim_api_key: Optional[str] = None,
+                 max_concurrent_calls: int = 8, call_pacing: float = 1.0):
         """
         Initialize the VoiceAgent with necessary components
         
         Args:
             omnidim_api_key: Optional API key for Omnidim. If not provided, will be loaded from environment.
+            max_concurrent_calls: Maximum number of reseller calls in flight at the same time
+            call_pacing: Minimum number of seconds between two calls to the same reseller
         """
         self.data_processor = DataProcessor()
         self.email_service = EmailService()
@@ -50,6 +55,10 @@ class VoiceAgent:
         # Store agent and call information
         self.omnidim_agent_id = os.environ.get('OMNIDIM_AGENT_ID', None)
         
+        # Call scheduling settings
+        self.max_concurrent_calls = max_concurrent_calls
+        self.call_pacing = call_pacing
+        
         # Store conversation logs and extracted information
         self.all_conversations = []
         self.all_extracted_info = []
@@ -69,31 +78,26 @@ class VoiceAgent:
         resellers = self.data_processor.get_all_resellers()
         print(f"Found {len(resellers)} resellers to contact")
         
-        # Simulate conversations with each reseller
-        for i, reseller in enumerate(resellers):
-            print(f"\nCalling reseller {i+1}/{len(resellers)}: {reseller['name']}...")
-            
-            # Create a conversation handler for this reseller
-            conversation_handler = ConversationHandler(reseller)
+        # Simulate conversations with the resellers concurrently
+        scheduler = CallScheduler(max_in_flight=self.max_concurrent_calls, pacing=self.call_pacing)
+        completed = 0
+        for reseller, result, error in scheduler.run(resellers, self._simulate_conversation):
+            completed += 1
+            if error is not None:
+                print(f"\nCall {completed}/{len(resellers)} to {reseller['name']} failed: {str(error)}")
+                continue
             
-            # Simulate the full conversation
-            print("Simulating conversation...")
-            conversation_log, extracted_info = conversation_handler.simulate_full_conversation()
+            conversation_log, extracted_info = result
             
             # Store the results
             self.all_conversations.append(conversation_log)
             self.all_extracted_info.append(extracted_info)
             
             # Print a sample of the conversation
-            print(f"Conversation with {reseller['name']} completed")
+            print(f"\nCall {completed}/{len(resellers)}: conversation with {reseller['name']} completed")
             print(f"Sample exchange:")
             print(f"Agent: {conversation_log[0]['message']}")
             print(f"{reseller['name']}: {conversation_log[1]['message']}")
-            
-            # Add a small delay between calls for realism
-            if i < len(resellers) - 1:
-                print("Waiting before next call...")
-                time.sleep(1)
         
         print("\nAll calls completed!")
         print("=" * 50)
@@ -114,6 +118,8 @@ class VoiceAgent:
         # Log the extracted information to a Google Sheet
         print("Logging extracted information to Google Sheet...")
         info_sheet_url = self.sheet_logger.log_extracted_info(self.all_extracted_info)
+        self.sheet_logger.flush()
+        self.sheet_logger.render_views()
         
         # Send an email with the top offers
         print("\nSending email with top offers...")
@@ -125,25 +131,47 @@ class VoiceAgent:
         
         # Return the results
         return {
-            "top_offers": top_offers,
+            "top_offers": [offer.to_dict() for offer in top_offers],
             "sheet_url": sheet_url,
             "email_status": email_response['status_code'],
             "conversation_count": len(self.all_conversations),
             "total_interactions": sum(len(conv) for conv in self.all_conversations)
         }
     
-    def generate_omnidimension_prompt(self) -> str:
+    def _simulate_conversation(self, reseller: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Simulate the full conversation with a single reseller
+        
+        Args:
+            reseller: Reseller data dictionary
+            
+        Returns:
+            Tuple containing (conversation_log, extracted_info)
+        """
+        conversation_handler = ConversationHandler(reseller)
+        return conversation_handler.simulate_full_conversation()
+    
+    def generate_omnidimension_prompt(self, product_name: str = None, size: str = None) -> str:
         """
         Generate a prompt for OmniDimension to create the voice agent
         
+        Args:
+            product_name: Product to ask resellers about (defaults to the first reseller's product)
+            size: Size to ask for (defaults to the first reseller's product size)
+            
         Returns:
             OmniDimension prompt
         """
-        prompt = """
+        resellers = self.data_processor.get_all_resellers()
+        product = (resellers[0].get('product') if resellers else None) or {}
+        product_name = product_name or product.get('name') or "Air Jordan 1 High OG 'Chicago Reimagined'"
+        size = size or product.get('size') or "US 10"
+        
+        prompt = f"""
 # DealFinder Voice Agent
 
 ## Agent Purpose
-Create a voice agent that helps users find the best deals for limited edition Air Jordan 1 sneakers by calling multiple resellers, gathering pricing and availability details, comparing offers, and recommending the top 3 best options.
+Create a voice agent that helps users find the best deals for the limited edition {product_name} by calling multiple resellers, gathering pricing and availability details, comparing offers, and recommending the top 3 best options.
 
 ## Agent Capabilities
 1. Make outbound calls to resellers
@@ -164,7 +192,7 @@ Create a voice agent that helps users find the best deals for limited edition Ai
 ## Call Flow
 
 ### Introduction
-"Hello, I'm calling from DealFinder AI. I'm interested in purchasing the Air Jordan 1 High OG 'Chicago Reimagined' in size US 10. Could you tell me about your current pricing and availability?"
+"Hello, I'm calling from DealFinder AI. I'm interested in purchasing the {product_name} in size {size}. Could you tell me about your current pricing and availability?"
 
 ### Information Gathering
 - Ask about current price
@@ -240,7 +268,8 @@ Create a voice agent that helps users find the best deals for limited edition Ai
                     "payload_template": {
                         "user_email": "{{user.email}}",
                         "top_offers": "{{workflow.top_offers}}",
-                        "timestamp": "{{timestamp}}"
+                        "timestamp": "{{timestamp}}",
+                        "conversation_id": "{{conversation_id}}"
                     },
                     "trigger": "workflow_complete"
                 }
@@ -354,6 +383,42 @@ Create a voice agent that helps users find the best deals for limited edition Ai
         print(f"Initiated Omnidim call to {phone_number}, call ID: {call_data.get('id')}")
         return call_data
     
+    def call_resellers(self, resellers: Optional[List[Dict[str, Any]]] = None,
+                       metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Call several resellers concurrently using the Omnidim voice agent
+        
+        Calls are dispatched through the CallScheduler, so at most
+        `max_concurrent_calls` are in flight and each reseller is paced
+        individually instead of waiting on one global delay.
+        
+        Args:
+            resellers: Resellers to call (defaults to all known resellers)
+            metadata: Optional metadata for every call
+            
+        Returns:
+            List of call details in completion order
+        """
+        if not self.omnidim_enabled or not self.omnidim_service:
+            raise ValueError("Omnidim service is not enabled or initialized")
+            
+        if not self.omnidim_agent_id:
+            raise ValueError("No agent ID available. Create an agent first or set OMNIDIM_AGENT_ID environment variable")
+        
+        if resellers is None:
+            resellers = self.data_processor.get_all_resellers()
+        
+        scheduler = CallScheduler(max_in_flight=self.max_concurrent_calls, pacing=self.call_pacing)
+        calls = []
+        for reseller, call_data, error in scheduler.run(
+                resellers, lambda r: self.make_omnidim_call(r['contact']['phone'], metadata)):
+            if error is not None:
+                print(f"Failed to call {reseller['name']}: {str(error)}")
+                continue
+            calls.append(call_data)
+        
+        return calls
+    
     def make_bulk_omnidim_calls(self, phone_numbers: List[str], 
                                campaign_name: str = "Deal Finder Campaign",
                                metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -391,30 +456,110 @@ Create a voice agent that helps users find the best deals for limited edition Ai
         print(f"Initiated bulk Omnidim calls to {len(phone_numbers)} resellers, campaign ID: {campaign_data.get('id')}")
         return campaign_data
     
-    def get_omnidim_call_logs(self, call_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    def dispatch_bulk_campaign(self, phones_file: str, campaign_name: str = "Deal Finder Campaign",
+                               shard_size: int = 1000, max_parallel: int = 4,
+                               checkpoint_path: Optional[str] = None,
+                               metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
-        Get logs for Omnidim calls
+        Call every reseller in a phones file as a sharded, resumable bulk campaign
+        
+        Args:
+            phones_file: File with phone numbers, one per line
+            campaign_name: Name of the campaign
+            shard_size: Maximum number of phone numbers per campaign shard
+            max_parallel: Maximum number of shards submitted at the same time
+            checkpoint_path: Path of the checkpoint file (defaults to
+                <phones_file>.checkpoint.json)
+            metadata: Optional metadata for the campaign
+            
+        Returns:
+            Summary with shard and phone number counts
+        """
+        if not self.omnidim_enabled or not self.omnidim_service:
+            raise ValueError("Omnidim service is not enabled or initialized")
+            
+        if not self.omnidim_agent_id:
+            raise ValueError("No agent ID available. Create an agent first or set OMNIDIM_AGENT_ID environment variable")
+        
+        # Default metadata if not provided
+        if metadata is None:
+            metadata = {
+                "product": "Limited Edition Air Jordan 1 High OG 'Chicago Reimagined' Sneakers",
+                "user_email": "user@example.com"
+            }
+        
+        dispatcher = CampaignDispatcher(
+            self.omnidim_service,
+            self.omnidim_agent_id,
+            checkpoint_path or phones_file + '.checkpoint.json',
+            shard_size=shard_size,
+            max_parallel=max_parallel
+        )
+        summary = dispatcher.dispatch(phones_file, campaign_name, metadata)
+        
+        print(f"Dispatched {summary['submitted']} of {summary['shards']} campaign shards "
+              f"({summary['numbers']} numbers, {summary['duplicates']} duplicates, {summary['invalid']} invalid)")
+        if summary['unconfirmed']:
+            print(f"{summary['unconfirmed']} interrupted shards need checking before they are submitted again")
+        return summary
+    
+    def iter_omnidim_call_logs(self, call_id: Optional[str] = None, since_last_sync: bool = False,
+                               fetch_details: bool = False, sync_state_path: Optional[str] = None,
+                               max_workers: int = 8) -> Iterator[Dict[str, Any]]:
+        """
+        Stream logs for Omnidim calls page by page
         
         Args:
             call_id: Optional specific call ID to get logs for
+            since_last_sync: Only return calls that are new or changed since the last sync
+            fetch_details: Fetch each call's full details (transcript), up to
+                `max_workers` at the same time
+            sync_state_path: Path of the sync state file (defaults to
+                omnidim_sync_state.json in the project root)
+            max_workers: Maximum number of call details fetched at the same time
             
         Returns:
-            List of call logs
+            Iterator of call logs
         """
         if not self.omnidim_enabled or not self.omnidim_service:
             raise ValueError("Omnidim service is not enabled or initialized")
         
         if call_id:
             # Get logs for a specific call
-            call_data = self.omnidim_service.get_call(call_id)
-            return [call_data]
+            yield self.omnidim_service.get_call(call_id)
+            return
+        
+        # Get logs for all calls associated with the agent
+        if not self.omnidim_agent_id:
+            raise ValueError("No agent ID available. Create an agent first or set OMNIDIM_AGENT_ID environment variable")
+        
+        if not since_last_sync and not fetch_details:
+            yield from self.omnidim_service.iter_calls(agent_id=self.omnidim_agent_id)
+            return
+        
+        call_log_sync = CallLogSync(
+            self.omnidim_service,
+            sync_state_path or os.path.join(project_root, 'omnidim_sync_state.json'),
+            max_workers=max_workers
+        )
+        if since_last_sync:
+            yield from call_log_sync.sync(self.omnidim_agent_id, fetch_details=fetch_details)
         else:
-            # Get logs for all calls associated with the agent
-            if not self.omnidim_agent_id:
-                raise ValueError("No agent ID available. Create an agent first or set OMNIDIM_AGENT_ID environment variable")
-                
-            return self.omnidim_service.list_calls(agent_id=self.omnidim_agent_id)
-
+            calls = self.omnidim_service.iter_calls(agent_id=self.omnidim_agent_id)
+            for call, details, error in call_log_sync.iter_call_details(calls):
+                yield {**call, **details} if isinstance(details, dict) else call
+    
+    def get_omnidim_call_logs(self, call_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get logs for Omnidim calls
+        
+        Args:
+            call_id: Optional specific call ID to get logs for
+            
+        Returns:
+            List of call logs
+        """
+        return list(self.iter_omnidim_call_logs(call_id))
 
 if __name__ == "__main__":
     # Create and run the voice agent
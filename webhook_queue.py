@@ -0,0 +1,297 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.services.webhook_spool import WebhookSpool
+
+# Marker telling a worker to exit once everything queued before it is processed
+_STOP = object()
+
+
+class WebhookQueue:
+    """
+    Bounded ingestion queue for webhook payloads
+
+    Webhook endpoints only enqueue their payload and return, so they are
+    acknowledged immediately; a pool of worker threads takes payloads off
+    the queue in batches of up to `batch_size` and hands each batch to the
+    handler registered for its kind (e.g. one log call for many
+    conversations). When the queue is full, submit() fails instead of
+    blocking so the API can answer 429 and the caller retries later.
+    Stopping the queue rejects new payloads and drains what is queued.
+
+    If a batch fails, its payloads are handled again one at a time, so one
+    bad payload doesn't fail the others; handlers must therefore be
+    idempotent. With a spool, every accepted payload is first written to
+    it and only removed once its handler succeeded; payloads left over
+    from a previous run are replayed when the queue starts, and failed
+    payloads are retried every `retry_interval` seconds until the spool
+    gives up on them.
+    """
+
+    def __init__(self, handlers: Dict[str, Callable[[List[Any]], None]], max_size: int = 10000,
+                 workers: int = 4, batch_size: int = 100, batch_wait: float = 0.05,
+                 spool: Optional[WebhookSpool] = None, compact_interval: float = 30.0,
+                 retry_interval: float = 30.0):
+        """
+        Initialize the WebhookQueue
+
+        Args:
+            handlers: Handler per payload kind, called with a list of payloads
+            max_size: Maximum number of queued payloads
+            workers: Number of worker threads
+            batch_size: Maximum number of payloads processed together
+            batch_wait: Number of seconds a worker waits to fill a batch
+            spool: Optional durable spool payloads are written to before being queued
+            compact_interval: Minimum number of seconds between spool compactions
+            retry_interval: Number of seconds between retries of failed spooled payloads
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        self.handlers = handlers
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.spool = spool
+        self.compact_interval = compact_interval
+        self.retry_interval = retry_interval
+        self._last_compaction = time.monotonic()
+        self._replayer = None
+        self._stopped = threading.Event()
+        # Spool entries queued by the replayer and not processed yet
+        self._requeued: set = set()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._threads: List[threading.Thread] = []
+        self._accepting = False
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {'accepted': 0, 'rejected': 0, 'processed': 0, 'failed': 0, 'replayed': 0, 'retried': 0}
+
+    @property
+    def size(self) -> int:
+        """
+        Number of payloads waiting to be processed
+        """
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        """
+        Start the worker threads
+        """
+        with self._lock:
+            if self._threads:
+                return
+            # Payloads accepted from now on are queued directly, not replayed
+            replay_until = self.spool.last_id() if self.spool is not None else 0
+            self._stopped.clear()
+            self._accepting = True
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run_worker, name=f"webhook-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            if self.spool is not None:
+                self._replayer = threading.Thread(target=self._replay_spool, args=(replay_until,),
+                                                  name="webhook-replay", daemon=True)
+                self._replayer.start()
+
+    def _replay_spool(self, last_id: int) -> None:
+        """
+        Queue the payloads spooled by a previous run, then retry failed
+        payloads every retry interval until the queue stops
+
+        Args:
+            last_id: ID of the newest payload left by the previous run
+        """
+        for entry_id, kind, payload in self.spool.pending(last_id):
+            if not self._requeue(entry_id, kind, payload, wait=True):
+                # Left in the spool for the next start
+                return
+            with self._stats_lock:
+                self.stats['replayed'] += 1
+
+        while not self._stopped.wait(self.retry_interval):
+            for entry_id, kind, payload in self.spool.pending(self.spool.last_id(), failed_only=True):
+                with self._stats_lock:
+                    if entry_id in self._requeued:
+                        continue
+                if not self._requeue(entry_id, kind, payload, wait=False):
+                    # The queue is full; try again next interval
+                    break
+                with self._stats_lock:
+                    self.stats['retried'] += 1
+
+    def _requeue(self, entry_id: int, kind: str, payload: Any, wait: bool) -> bool:
+        """
+        Queue a spooled payload
+
+        Args:
+            entry_id: Spool entry ID
+            kind: Payload kind
+            payload: Payload
+            wait: Wait for room in the queue instead of giving up when it is full
+
+        Returns:
+            False if the payload couldn't be queued (the queue is full or stopped)
+        """
+        if kind not in self.handlers:
+            self.spool.ack([entry_id])
+            return True
+        with self._stats_lock:
+            self._requeued.add(entry_id)
+        while self._accepting:
+            try:
+                self._queue.put((kind, payload, entry_id), timeout=0.1)
+                return True
+            except queue.Full:
+                if not wait:
+                    break
+        with self._stats_lock:
+            self._requeued.discard(entry_id)
+        return False
+
+    def submit(self, kind: str, payload: Any) -> bool:
+        """
+        Enqueue a payload without blocking
+
+        Args:
+            kind: Payload kind, selecting the handler
+            payload: Payload passed to the handler
+
+        Returns:
+            True if the payload was queued, False if the queue is full or stopped
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"No handler for webhook kind: {kind}")
+
+        if self._accepting and not self._queue.full():
+            entry_id = self.spool.append(kind, payload) if self.spool is not None else None
+            try:
+                self._queue.put_nowait((kind, payload, entry_id))
+                with self._stats_lock:
+                    self.stats['accepted'] += 1
+                return True
+            except queue.Full:
+                if entry_id is not None:
+                    self.spool.ack([entry_id])
+        with self._stats_lock:
+            self.stats['rejected'] += 1
+        return False
+
+    def _next_batch(self) -> Optional[List[tuple]]:
+        """
+        Wait for the next batch of payloads
+
+        Returns:
+            List of (kind, payload, spool entry ID) tuples, or None once the worker must stop
+        """
+        item = self._queue.get()
+        if item is _STOP:
+            return None
+
+        batch = [item]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Hand the stop marker back so this worker exits after its batch
+                self._queue.put(item)
+                break
+            batch.append(item)
+        return batch
+
+    def _run_worker(self) -> None:
+        """
+        Process batches until a stop marker is received
+        """
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            items_by_kind: Dict[str, List[tuple]] = {}
+            for kind, payload, entry_id in batch:
+                items_by_kind.setdefault(kind, []).append((payload, entry_id))
+
+            for kind, items in items_by_kind.items():
+                processed, failed = self._handle(kind, items)
+                if self.spool is not None:
+                    # Failed payloads stay in the spool and are retried later
+                    self.spool.ack(entry_id for entry_id in processed if entry_id is not None)
+                    self.spool.fail(entry_id for entry_id in failed if entry_id is not None)
+                with self._stats_lock:
+                    self._requeued.difference_update(processed)
+                    self._requeued.difference_update(failed)
+                    self.stats['processed'] += len(processed)
+                    self.stats['failed'] += len(failed)
+
+            if self.spool is not None and self._queue.empty():
+                self._maybe_compact()
+
+    def _handle(self, kind: str, items: List[tuple]) -> Tuple[List[Optional[int]], List[Optional[int]]]:
+        """
+        Run a kind's handler on a batch, falling back to one payload at a time
+
+        Args:
+            kind: Payload kind
+            items: (payload, spool entry ID) tuples
+
+        Returns:
+            Tuple of (processed entry IDs, failed entry IDs); payloads without
+            a spool entry are listed as None
+        """
+        try:
+            self.handlers[kind]([payload for payload, _ in items])
+            return [entry_id for _, entry_id in items], []
+        except Exception as e:
+            print(f"Error processing {len(items)} '{kind}' webhooks: {str(e)}")
+            if len(items) == 1:
+                return [], [items[0][1]]
+
+        processed, failed = [], []
+        for payload, entry_id in items:
+            try:
+                self.handlers[kind]([payload])
+                processed.append(entry_id)
+            except Exception as e:
+                print(f"Error processing '{kind}' webhook {entry_id}: {str(e)}")
+                failed.append(entry_id)
+        return processed, failed
+
+    def _maybe_compact(self) -> None:
+        """
+        Compact the spool if the last compaction is older than the compaction interval
+        """
+        with self._stats_lock:
+            now = time.monotonic()
+            if now - self._last_compaction < self.compact_interval:
+                return
+            self._last_compaction = now
+        self.spool.compact()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop accepting payloads, process everything already queued and stop the workers
+
+        Args:
+            timeout: Maximum number of seconds to wait for each worker
+        """
+        with self._lock:
+            self._accepting = False
+            self._stopped.set()
+            threads, self._threads = self._threads, []
+            # Stop markers queue up behind the pending payloads, so those are drained first
+            for _ in threads:
+                self._queue.put(_STOP)
+        for thread in threads:
+            thread.join(timeout)
+        if self._replayer is not None:
+            self._replayer.join(timeout)
+            self._replayer = None
+        if self.spool is not None:
+            self.spool.compact()
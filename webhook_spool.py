@@ -0,0 +1,166 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Iterable, Iterator, Tuple
+
+
+class WebhookSpool:
+    """
+    Durable write-ahead spool for webhook payloads, backed by SQLite in WAL mode
+
+    Payloads are appended (one small sequential WAL write) before the
+    webhook is acknowledged and deleted once they have been processed, so
+    payloads that were accepted but not processed when the server stopped
+    are replayed on the next start. Failed payloads stay in the spool with
+    their attempt count raised, to be retried, until they have failed
+    `max_attempts` times. compact() checkpoints the WAL into the database
+    and returns freed pages to the file system.
+    """
+
+    def __init__(self, db_path: str, synchronous: str = 'NORMAL', max_attempts: int = 3):
+        """
+        Initialize the WebhookSpool
+
+        Args:
+            db_path: Path of the SQLite database file
+            synchronous: SQLite synchronous mode; NORMAL survives process crashes,
+                FULL also survives power loss at the cost of an fsync per payload
+            max_attempts: Number of failed attempts after which a payload is dropped
+        """
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        # auto_vacuum only takes effect if set before the first table is created
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spool ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "kind TEXT NOT NULL, "
+            "payload TEXT NOT NULL, "
+            "created_at REAL NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def append(self, kind: str, payload: Any) -> int:
+        """
+        Durably append a payload
+
+        Args:
+            kind: Payload kind
+            payload: JSON-serializable payload
+
+        Returns:
+            ID of the spooled payload
+        """
+        data = json.dumps(payload, separators=(',', ':'), default=str)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO spool (kind, payload, created_at) VALUES (?, ?, ?)",
+                (kind, data, time.time())
+            )
+            return cursor.lastrowid
+
+    def ack(self, entry_ids: Iterable[int]) -> None:
+        """
+        Remove processed payloads from the spool
+
+        Args:
+            entry_ids: IDs of the processed payloads
+        """
+        entry_ids = [(entry_id,) for entry_id in entry_ids]
+        if not entry_ids:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("DELETE FROM spool WHERE id = ?", entry_ids)
+            self._conn.execute("COMMIT")
+
+    def last_id(self) -> int:
+        """
+        Get the ID of the newest spooled payload
+
+        Returns:
+            Newest payload ID, or 0 if the spool is empty
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM spool").fetchone()[0]
+
+    def fail(self, entry_ids: Iterable[int]) -> None:
+        """
+        Record a failed attempt at processing payloads
+
+        Payloads that have now failed `max_attempts` times are dropped.
+
+        Args:
+            entry_ids: IDs of the payloads that failed
+        """
+        entry_ids = [(entry_id,) for entry_id in entry_ids]
+        if not entry_ids:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("UPDATE spool SET attempts = attempts + 1 WHERE id = ?", entry_ids)
+            dropped = self._conn.execute("DELETE FROM spool WHERE attempts >= ?", (self.max_attempts,)).rowcount
+            self._conn.execute("COMMIT")
+        if dropped:
+            print(f"Dropped {dropped} spooled webhooks after {self.max_attempts} failed attempts")
+
+    def pending(self, last_id: int, batch_size: int = 500,
+                failed_only: bool = False) -> Iterator[Tuple[int, str, Any]]:
+        """
+        Iterate over spooled payloads, oldest first
+
+        Reading a payload doesn't count as an attempt; only fail() does.
+
+        Args:
+            last_id: ID of the newest payload to return (see last_id())
+            batch_size: Number of payloads read per query
+            failed_only: Only return payloads that already failed at least once
+
+        Returns:
+            Iterator of (id, kind, payload) tuples
+        """
+        min_attempts = 1 if failed_only else 0
+        after_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, kind, payload FROM spool WHERE id > ? AND id <= ? AND attempts >= ? "
+                    "ORDER BY id LIMIT ?",
+                    (after_id, last_id, min_attempts, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for entry_id, kind, data in rows:
+                yield entry_id, kind, json.loads(data)
+            after_id = rows[-1][0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def compact(self) -> None:
+        """
+        Checkpoint the WAL into the database and release free pages
+        """
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            # incremental_vacuum frees one page per step, so run it to completion
+            self._conn.execute("PRAGMA incremental_vacuum").fetchall()
+
+    def close(self) -> None:
+        """
+        Compact the spool and close the database
+        """
+        self.compact()
+        with self._lock:
+            self._conn.close()